@@ -1,187 +1,430 @@
-import datetime
 import os
-import random
 import secrets
-import uuid
 
 from flask import Flask, jsonify, request, send_from_directory
-
-from api.utils import DEV_PATHS, QUOTES, require_api_key
+from werkzeug.http import generate_etag
+
+from api import compression, generation, idempotency, metrics, ratelimit, sessions
+from api.idempotency import idempotent
+from api.index import encode_cursor
+from api.metrics import phase
+from api.ratelimit import rate_limit_cost, require_api_key
+from api.roadmaps import (
+    generate_roadmap,
+    roadmap_etag,
+    roadmap_progress,
+    roadmap_summary,
+    validate_listing_args,
+    validate_milestone_changes,
+    validate_roadmap_spec,
+    with_progress,
+)
+from api.store import store_from_config
+from api.templating import FragmentCache, init_bytecode_cache
+from api.utils import DEV_PATHS, QUOTES, JSONProvider, cache_publicly
 from api.views import bp as views_bp
 
 app = Flask(__name__, template_folder="templates", static_folder="static")
+app.json = JSONProvider(app)
 app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-key")
+# "internal" dispatches UI -> API calls in-process, "http" loops back through request.url_root
+app.config["API_DISPATCH"] = os.environ.get("API_DISPATCH", "internal")
+# Most roadmaps returned by one GET /roadmaps call, for ids=... and for a listing page
+app.config["ROADMAP_BATCH_LIMIT"] = int(os.environ.get("ROADMAP_BATCH_LIMIT", 50))
+app.config["CREATE_BATCH_LIMIT"] = int(os.environ.get("CREATE_BATCH_LIMIT", 500))
+# Cache lifetime in seconds for responses that never change at runtime, such as / and /paths
+app.config["STATIC_CACHE_MAX_AGE"] = int(os.environ.get("STATIC_CACHE_MAX_AGE", 86400))
+# "memory" keeps roadmaps in the process, "sqlite" persists them to ROADMAP_DB_PATH
+app.config["ROADMAP_STORE"] = os.environ.get("ROADMAP_STORE", "memory")
+app.config["ROADMAP_DB_PATH"] = os.environ.get("ROADMAP_DB_PATH", "/tmp/roadmaps.sqlite3")
+# Number of serialized roadmap bodies the memory store keeps ready to send, 0 disables the cache
+app.config["ROADMAP_BODY_CACHE_SIZE"] = int(os.environ.get("ROADMAP_BODY_CACHE_SIZE", 10000))
+# Lock stripes in the memory store, more shards means less contention between threads
+app.config["ROADMAP_STORE_SHARDS"] = int(os.environ.get("ROADMAP_STORE_SHARDS", 16))
+# Capacity of the memory store, or of the cache in front of SQLite. The least recently used roadmaps
+# are evicted past either limit, 0 means unlimited. The byte cap is an estimate of the heap the roadmaps, their
+# index entries and cached bodies take, which RSS exceeds by about a third.
+app.config["ROADMAP_MAX_ENTRIES"] = int(os.environ.get("ROADMAP_MAX_ENTRIES", 0))
+app.config["ROADMAP_MAX_BYTES"] = int(os.environ.get("ROADMAP_MAX_BYTES", 32 * 1024 * 1024))
+# Seconds a roadmap may go unread before it expires, 0 disables the idle TTL
+app.config["ROADMAP_IDLE_TTL"] = int(os.environ.get("ROADMAP_IDLE_TTL", 0))
+app.config["ROADMAP_EXPIRE_AFTER_END_DATE"] = os.environ.get("ROADMAP_EXPIRE_AFTER_END_DATE", "0") == "1"
+# Snapshot file that keeps the memory store across restarts, with a write-ahead log beside it at <path>.log.
+# Empty keeps roadmaps in memory only.
+app.config["ROADMAP_SNAPSHOT_PATH"] = os.environ.get("ROADMAP_SNAPSHOT_PATH", "")
+# "always" fsyncs the log on every write, "interval" at most once per ROADMAP_FSYNC_INTERVAL seconds, "never" leaves
+# it to the OS
+app.config["ROADMAP_FSYNC"] = os.environ.get("ROADMAP_FSYNC", "interval")
+app.config["ROADMAP_FSYNC_INTERVAL"] = float(os.environ.get("ROADMAP_FSYNC_INTERVAL", 1))
+# A new snapshot is written, and the log compacted, once the log passes this many bytes, or once this many
+# seconds have passed since the last snapshot when there were writes, 0 disables the timer
+app.config["ROADMAP_SNAPSHOT_LOG_BYTES"] = int(os.environ.get("ROADMAP_SNAPSHOT_LOG_BYTES", 16 * 1024 * 1024))
+app.config["ROADMAP_SNAPSHOT_INTERVAL"] = int(os.environ.get("ROADMAP_SNAPSHOT_INTERVAL", 300))
+# Keep a bounded memory cache in front of the sqlite backend
+app.config["ROADMAP_CACHE"] = os.environ.get("ROADMAP_CACHE", "0") == "1"
+# Threads the UI uses to load independent API calls in parallel with API_DISPATCH=http, 0 loads them one by one
+app.config["API_FANOUT_WORKERS"] = int(os.environ.get("API_FANOUT_WORKERS", 8))
+# Seconds a page waits for its API calls before rendering with whatever has arrived
+app.config["PAGE_DEADLINE"] = float(os.environ.get("PAGE_DEADLINE", 5))
+# Per-route latency histograms, Server-Timing headers and the /metrics endpoint
+app.config["METRICS_ENABLED"] = os.environ.get("METRICS_ENABLED", "1") == "1"
+# Compiled templates are kept here between cold starts, empty disables the bytecode cache
+app.config["JINJA_BYTECODE_CACHE_DIR"] = os.environ.get("JINJA_BYTECODE_CACHE_DIR", "/tmp/jinja-bytecode")
+# Rendered roadmap page bodies kept by id and version, 0 disables fragment caching
+app.config["FRAGMENT_CACHE_SIZE"] = int(os.environ.get("FRAGMENT_CACHE_SIZE", 500))
+# gzip, or brotli when installed, for JSON and HTML bodies of at least COMPRESS_MIN_SIZE bytes
+app.config["COMPRESS_ENABLED"] = os.environ.get("COMPRESS_ENABLED", "1") == "1"
+app.config["COMPRESS_MIN_SIZE"] = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+app.config["COMPRESS_LEVEL"] = int(os.environ.get("COMPRESS_LEVEL", 6))
+app.config["COMPRESS_BROTLI_QUALITY"] = int(os.environ.get("COMPRESS_BROTLI_QUALITY", 5))
+# Compressed bodies kept for responses with an ETag, 0 compresses every response again
+app.config["COMPRESS_CACHE_SIZE"] = int(os.environ.get("COMPRESS_CACHE_SIZE", 1000))
+# "cookie" keeps the session in Flask's signed cookie, "memory" or "sqlite" keep it server-side and put only
+# an opaque session id in the cookie
+app.config["SESSION_BACKEND"] = os.environ.get("SESSION_BACKEND", "cookie")
+app.config["SESSION_DB_PATH"] = os.environ.get("SESSION_DB_PATH", "/tmp/sessions.sqlite3")
+# Seconds a server-side session lives after it was last saved, sessions in use are saved again past half that
+app.config["SESSION_TTL"] = int(os.environ.get("SESSION_TTL", 30 * 24 * 3600))
+# Sessions the memory backend keeps before dropping the least recently saved, 0 is unlimited
+app.config["SESSION_MAX_ENTRIES"] = int(os.environ.get("SESSION_MAX_ENTRIES", 10000))
+# Requests per minute allowed for each API key, with bursts of up to RATE_LIMIT_BURST, 0 disables rate limiting.
+# UI pages dispatched in-process are limited per client address instead of sharing the UI's key.
+# "memory" keeps the token buckets in this process, "sqlite" shares them through RATE_LIMIT_DB_PATH.
+app.config["RATE_LIMIT_PER_MINUTE"] = int(os.environ.get("RATE_LIMIT_PER_MINUTE", 600))
+app.config["RATE_LIMIT_BURST"] = int(os.environ.get("RATE_LIMIT_BURST", 60))
+app.config["RATE_LIMIT_BACKEND"] = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+app.config["RATE_LIMIT_DB_PATH"] = os.environ.get("RATE_LIMIT_DB_PATH", "/tmp/rate-limits.sqlite3")
+# API key requests served at once before the rest are turned away with 429, 0 is unlimited
+app.config["MAX_CONCURRENT_REQUESTS"] = int(os.environ.get("MAX_CONCURRENT_REQUESTS", 16))
+# Seconds a POST /create response is kept for replay to retries with the same Idempotency-Key, and how many are kept
+app.config["IDEMPOTENCY_TTL"] = int(os.environ.get("IDEMPOTENCY_TTL", 24 * 3600))
+app.config["IDEMPOTENCY_MAX_ENTRIES"] = int(os.environ.get("IDEMPOTENCY_MAX_ENTRIES", 10000))
+# "static" builds roadmaps from DEV_PATHS, "llm" asks an OpenAI-compatible model and accepts any interest
+app.config["GENERATION_MODE"] = os.environ.get("GENERATION_MODE", "static")
+app.config["LLM_BASE_URL"] = os.environ.get("LLM_BASE_URL", "https://api.openai.com/v1")
+app.config["LLM_API_KEY"] = os.environ.get("LLM_API_KEY", "")
+app.config["LLM_MODEL"] = os.environ.get("LLM_MODEL", "gpt-4o-mini")
+# Seconds a model call may take in total before the roadmap falls back to DEV_PATHS
+app.config["LLM_TIMEOUT"] = float(os.environ.get("LLM_TIMEOUT", 8))
+# Generated contents kept by normalized interests and timeframe
+app.config["LLM_CACHE_SIZE"] = int(os.environ.get("LLM_CACHE_SIZE", 256))
 app.register_blueprint(views_bp)
+sessions.init_app(app)
+ratelimit.init_app(app)
+idempotency.init_app(app)
+generation.init_app(app)
+init_bytecode_cache(app)
+app.extensions["roadmap_fragments"] = FragmentCache(app.config["FRAGMENT_CACHE_SIZE"])
+
+METRICS = metrics.Metrics()
+if app.config["METRICS_ENABLED"]:
+    metrics.init_app(app, METRICS)
+# Registered after metrics so its after_request hook runs first and shows up in Server-Timing
+compression.init_app(app)
+
+
+def serialize_roadmap(roadmap):
+    return app.json.dumps(with_progress(roadmap)).encode()
+
+
+ROADMAPS_DB = store_from_config(app.config, serialize_roadmap)
 
-# Simulated database
-ROADMAPS_DB = {}
+
+# Body and ETag for payloads that never change, built once at startup
+def prebuild(payload):
+    body = f"{app.json.dumps(payload)}\n".encode()
+    return body, generate_etag(body)
+
+
+def prebuilt_response(prebuilt):
+    body, etag = prebuilt
+    response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    return cache_publicly(response, app.config["STATIC_CACHE_MAX_AGE"])
+
+
+HOME_PAYLOAD = prebuild(
+    {
+        "service": "Developer Roadmap API",
+        "version": "1.0.0",
+        "endpoints": [
+            {"path": "/create", "method": "POST", "description": "Create a new roadmap"},
+            {"path": "/create/batch", "method": "POST", "description": "Create many roadmaps, streamed as NDJSON"},
+            {"path": "/roadmap/<roadmap_id>", "method": "GET", "description": "Retrieve a specific roadmap"},
+            {"path": "/roadmaps?ids=<id>,...", "method": "GET", "description": "Retrieve several roadmaps"},
+            {"path": "/roadmaps", "method": "GET", "description": "List roadmaps, filtered and paginated"},
+            {
+                "path": "/roadmap/<roadmap_id>/milestones",
+                "method": "PATCH",
+                "description": "Update several milestones at once",
+            },
+            {"path": "/quote", "method": "GET", "description": "Get a random inspirational quote"},
+            {"path": "/paths", "method": "GET", "description": "List available development paths"},
+        ],
+        "usage": "Send a POST request to /create with name, interests (array), and timeframe (months)",
+    }
+)
+
+PATHS_PAYLOAD = prebuild(
+    {
+        "available_paths": list(DEV_PATHS.keys()),
+        "description": "These paths can be used in the 'interests' field when creating a roadmap",
+    }
+)
 
 
 @app.route("/", methods=["GET"])
 def home():
-    return jsonify(
-        {
-            "service": "Developer Roadmap API",
-            "version": "1.0.0",
-            "endpoints": [
-                {"path": "/create", "method": "POST", "description": "Create a new roadmap"},
-                {"path": "/roadmap/<roadmap_id>", "method": "GET", "description": "Retrieve a specific roadmap"},
-                {"path": "/quote", "method": "GET", "description": "Get a random inspirational quote"},
-                {"path": "/paths", "method": "GET", "description": "List available development paths"},
-            ],
-            "usage": "Send a POST request to /create with name, interests (array), and timeframe (months)",
-        }
-    )
+    return prebuilt_response(HOME_PAYLOAD)
 
 
 @app.route("/quote", methods=["GET"])
 def get_random_quote():
-    return jsonify(secrets.choice(QUOTES))
+    response = jsonify(secrets.choice(QUOTES))
+    response.cache_control.no_store = True
+    return response
 
 
 @app.route("/paths", methods=["GET"])
 def get_paths():
-    return jsonify(
-        {
-            "available_paths": list(DEV_PATHS.keys()),
-            "description": "These paths can be used in the 'interests' field when creating a roadmap",
-        }
-    )
+    return prebuilt_response(PATHS_PAYLOAD)
 
 
 @app.route("/create", methods=["POST"])
 @require_api_key
+@idempotent
 def create_roadmap():
-    data = request.json
+    generator = app.extensions.get("content_generator")
+    spec, error = validate_roadmap_spec(request.json, custom_interests=generator is not None)
+    if error:
+        return jsonify(error), 400
+
+    if request.args.get("stream") == "1":
+        # Streamed results aren't kept for replay, so a retried stream would create a second roadmap
+        if "Idempotency-Key" in request.headers:
+            return jsonify({"error": "Idempotency-Key can't be combined with stream=1"}), 400
+        return app.response_class(stream_created_roadmap(spec, generator), mimetype="application/x-ndjson")
+
+    paths = DEV_PATHS
+    if generator is not None:
+        with phase("generate"):
+            paths = generation.with_fallback(
+                generator.content(spec["interests"], spec["timeframe"]), spec["interests"]
+            )
+        if paths is None:
+            return jsonify(GENERATION_UNAVAILABLE), 503
 
-    # Validate required fields
-    required_fields = ["name", "interests", "timeframe"]
-    if not all(field in data for field in required_fields):
-        return jsonify({"error": "Missing required fields", "required_fields": required_fields}), 400
+    roadmap = generate_roadmap(spec, paths)
+    with phase("store"):
+        ROADMAPS_DB.put(roadmap)
 
-    # Validate interests
-    interests = data["interests"]
-    if not interests or not all(interest in DEV_PATHS for interest in interests):
-        return jsonify({"error": "Invalid interests provided", "available_paths": list(DEV_PATHS.keys())}), 400
+    return jsonify(created_payload(roadmap))
 
-    # Validate timeframe
-    try:
-        timeframe = int(data["timeframe"])
-        if timeframe < 1 or timeframe > 24:
-            return jsonify({"error": "Timeframe must be between 1 and 24 months"}), 400
-    except ValueError:
-        return jsonify({"error": "Timeframe must be a number"}), 400
-
-    # Generate a unique ID for the roadmap
-    roadmap_id = str(uuid.uuid4())
-
-    # Calculate milestone dates
-    start_date = datetime.datetime.now()
-    end_date = start_date + datetime.timedelta(days=timeframe * 30)
-
-    # Create personalized roadmap
-    roadmap = []
-
-    # Distribute milestones across the timeframe
-    for interest in interests:
-        path_data = DEV_PATHS[interest]
-
-        # Create milestones with dates
-        milestone_count = min(timeframe, len(path_data["milestones"]))
-        selected_milestones = path_data["milestones"][:milestone_count]
-
-        for i, milestone in enumerate(selected_milestones):
-            milestone_date = start_date + datetime.timedelta(days=(i + 1) * (timeframe * 30 // (milestone_count + 1)))
-            roadmap.append(
-                {
-                    "path": interest,
-                    "milestone": milestone,
-                    "target_date": milestone_date.strftime("%Y-%m-%d"),
-                    "completed": False,
-                }
-            )
 
-    # Sort roadmap by date
-    roadmap.sort(key=lambda x: x["target_date"])
-
-    # Create the roadmap
-    time_roadmap = {
-        "id": roadmap_id,
-        "name": data["name"],
-        "interests": interests,
-        "timeframe": timeframe,
-        "created_at": start_date.strftime("%Y-%m-%d"),
-        "end_date": end_date.strftime("%Y-%m-%d"),
-        "roadmap": roadmap,
-        "resources": {
-            interest: selected_resources
-            for interest, selected_resources in [
-                (i, random.sample(DEV_PATHS[i]["resources"], min(3, len(DEV_PATHS[i]["resources"]))))
-                for i in interests
-            ]
-        },
-        "tips": {
-            interest: selected_tips
-            for interest, selected_tips in [
-                (i, random.sample(DEV_PATHS[i]["tips"], min(2, len(DEV_PATHS[i]["tips"])))) for i in interests
-            ]
-        },
-        "quote": secrets.choice(QUOTES),
+GENERATION_UNAVAILABLE = {
+    "error": "Roadmap generation is unavailable, retry later or choose from the available paths",
+    "available_paths": list(DEV_PATHS.keys()),
+}
+
+
+def created_payload(roadmap):
+    return {
+        "message": "Roadmap created successfully",
+        "roadmap_id": roadmap["id"],
+        "summary": roadmap_summary(roadmap),
     }
 
-    # Store in our simulated database
-    ROADMAPS_DB[roadmap_id] = time_roadmap
 
-    return jsonify(
-        {
-            "message": "Roadmap created successfully",
-            "roadmap_id": roadmap_id,
-            "summary": {
-                "name": time_roadmap["name"],
-                "timeframe": f"{timeframe} months",
-                "paths": interests,
-                "milestones_count": len(roadmap),
-            },
-        }
-    )
+# NDJSON for POST /create?stream=1: {"delta": ...} lines carry model output as it arrives, the last line is
+# the usual /create body, or an error when there is nothing to fall back to
+def stream_created_roadmap(spec, generator):
+    paths = DEV_PATHS
+    if generator is not None:
+        content = None
+        for event, value in generator.events(spec["interests"], spec["timeframe"]):
+            if event == "delta":
+                yield app.json.dumps({"delta": value}) + "\n"
+            else:
+                content = value
+        paths = generation.with_fallback(content, spec["interests"])
+        if paths is None:
+            yield app.json.dumps(GENERATION_UNAVAILABLE) + "\n"
+            return
+
+    roadmap = generate_roadmap(spec, paths)
+    ROADMAPS_DB.put(roadmap)
+    yield app.json.dumps(created_payload(roadmap)) + "\n"
+
+
+# Each roadmap in a batch costs a token, so batching doesn't get round the rate limit
+def batch_cost(request):
+    data = request.get_json(silent=True)
+    specs = data.get("roadmaps") if isinstance(data, dict) else None
+    return len(specs) if isinstance(specs, list) and specs else 1
+
+
+@app.route("/create/batch", methods=["POST"])
+@require_api_key
+@rate_limit_cost(batch_cost)
+def create_roadmap_batch():
+    data = request.json
+    specs = data.get("roadmaps") if isinstance(data, dict) else None
+    if not specs or not isinstance(specs, list):
+        return jsonify({"error": "Missing 'roadmaps' list in request body"}), 400
+
+    limit = app.config["CREATE_BATCH_LIMIT"]
+    if len(specs) > limit:
+        return jsonify({"error": f"At most {limit} roadmaps can be created at once"}), 400
+
+    # Validate everything before generating anything, then write all roadmaps in one go
+    validated = [validate_roadmap_spec(spec) for spec in specs]
+    roadmaps = [generate_roadmap(spec) if spec else None for spec, _ in validated]
+    with phase("store"):
+        ROADMAPS_DB.put_many([roadmap for roadmap in roadmaps if roadmap])
+
+    def generate():
+        for index, roadmap in enumerate(roadmaps):
+            if roadmap:
+                line = {"index": index, "roadmap_id": roadmap["id"], "summary": roadmap_summary(roadmap)}
+            else:
+                line = {"index": index, **validated[index][1]}
+            yield app.json.dumps(line) + "\n"
+
+    return app.response_class(generate(), mimetype="application/x-ndjson")
 
 
 @app.route("/roadmap/<roadmap_id>", methods=["GET"])
 def get_roadmap(roadmap_id):
-    if roadmap_id not in ROADMAPS_DB:
+    with phase("store"):
+        entry = ROADMAPS_DB.get_serialized(roadmap_id)
+    if entry is None:
         return jsonify({"error": "Roadmap not found"}), 404
 
-    return jsonify(ROADMAPS_DB[roadmap_id])
+    # Polling clients that already hold the current version get an empty 304
+    version, body = entry
+    etag = roadmap_etag(roadmap_id, version)
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+def roadmap_results(roadmap_ids, entries):
+    # Found roadmaps are spliced in from their serialized bodies instead of being encoded again
+    results = []
+    for roadmap_id in roadmap_ids:
+        if roadmap_id in entries:
+            body = entries[roadmap_id][1]
+            results.append(b'{"id":%s,"roadmap":%s}' % (app.json.dumps(roadmap_id).encode(), body))
+        else:
+            results.append(app.json.dumps({"id": roadmap_id, "error": "Roadmap not found"}).encode())
+    return b"[" + b",".join(results) + b"]"
+
+
+@app.route("/roadmaps", methods=["GET"])
+def get_roadmaps():
+    if "ids" not in request.args:
+        return list_roadmaps()
+
+    ids = list(dict.fromkeys(i for i in request.args["ids"].split(",") if i))
+    if not ids:
+        return jsonify({"error": "Missing 'ids' query parameter"}), 400
+
+    limit = app.config["ROADMAP_BATCH_LIMIT"]
+    if len(ids) > limit:
+        return jsonify({"error": f"At most {limit} ids can be requested at once"}), 400
+
+    with phase("store"):
+        entries = ROADMAPS_DB.get_many_serialized(ids)
+
+    with phase("serialize"):
+        body = b'{"results":' + roadmap_results(ids, entries) + b"}\n"
+    return app.response_class(body, mimetype="application/json")
+
+
+# Pages through roadmaps oldest first using the store's secondary indexes, so the cost depends on
+# the page size rather than on how many roadmaps are stored
+def list_roadmaps():
+    filters, error = validate_listing_args(request.args, app.config["ROADMAP_BATCH_LIMIT"])
+    if error:
+        return jsonify(error), 400
+
+    with phase("store"):
+        ids, next_key = ROADMAPS_DB.list_ids(**filters)
+        entries = ROADMAPS_DB.get_many_serialized(ids)
+
+    with phase("serialize"):
+        # Roadmaps that expired or were evicted since the index lookup are left out of the page
+        ids = [roadmap_id for roadmap_id in ids if roadmap_id in entries]
+        next_cursor = app.json.dumps(next_key and encode_cursor(next_key)).encode()
+        body = b'{"results":' + roadmap_results(ids, entries) + b',"next_cursor":' + next_cursor + b"}\n"
+    return app.response_class(body, mimetype="application/json")
 
 
 @app.route("/roadmap/<roadmap_id>/milestone/<int:milestone_index>", methods=["PUT"])
 @require_api_key
 def update_milestone(roadmap_id, milestone_index):
-    if roadmap_id not in ROADMAPS_DB:
+    data = request.json
+    if "completed" not in data:
+        if roadmap_id not in ROADMAPS_DB:
+            return jsonify({"error": "Roadmap not found"}), 404
+        return jsonify({"error": "Missing 'completed' field in request body"}), 400
+
+    try:
+        with phase("store"):
+            roadmap = ROADMAPS_DB.update_milestone(roadmap_id, milestone_index, bool(data["completed"]))
+    except KeyError:
         return jsonify({"error": "Roadmap not found"}), 404
+    except IndexError:
+        return jsonify({"error": "Invalid milestone index"}), 400
 
-    roadmap = ROADMAPS_DB[roadmap_id]
+    return jsonify(
+        {
+            "message": "Milestone updated successfully",
+            "milestone": roadmap["roadmap"][milestone_index],
+            "all_completed": roadmap["completed_count"] == len(roadmap["roadmap"]),
+            "progress": roadmap_progress(roadmap),
+        }
+    )
 
-    if milestone_index >= len(roadmap["roadmap"]) or milestone_index < 0:
-        return jsonify({"error": "Invalid milestone index"}), 400
 
-    data = request.json
-    if "completed" in data:
-        roadmap["roadmap"][milestone_index]["completed"] = bool(data["completed"])
+@app.route("/roadmap/<roadmap_id>/milestones", methods=["PATCH"])
+@require_api_key
+def update_milestones(roadmap_id):
+    changes, error = validate_milestone_changes(request.get_json(silent=True))
+    if error:
+        if roadmap_id not in ROADMAPS_DB:
+            return jsonify({"error": "Roadmap not found"}), 404
+        return jsonify(error), 400
+
+    # Every index is checked before anything is written, so a bad index leaves the roadmap untouched
+    try:
+        with phase("store"):
+            roadmap = ROADMAPS_DB.update_milestones(roadmap_id, changes)
+    except KeyError:
+        return jsonify({"error": "Roadmap not found"}), 404
+    except IndexError as e:
+        return jsonify({"error": f"Invalid milestone index: {e.args[0]}"}), 400
+
+    return jsonify(
+        {
+            "message": "Milestones updated successfully",
+            "milestones": {str(index): roadmap["roadmap"][index] for index in sorted(changes)},
+            "completed_count": roadmap["completed_count"],
+            "all_completed": roadmap["completed_count"] == len(roadmap["roadmap"]),
+            "progress": roadmap_progress(roadmap),
+        }
+    )
 
-        # Check if all milestones are completed
-        all_completed = all(milestone["completed"] for milestone in roadmap["roadmap"])
 
-        return jsonify(
-            {
-                "message": "Milestone updated successfully",
-                "milestone": roadmap["roadmap"][milestone_index],
-                "all_completed": all_completed,
-                "progress": sum(1 for m in roadmap["roadmap"] if m["completed"]) / len(roadmap["roadmap"]) * 100,
-            }
-        )
-    else:
-        return jsonify({"error": "Missing 'completed' field in request body"}), 400
+@app.route("/metrics", methods=["GET"])
+@require_api_key
+def get_metrics():
+    body = METRICS.render() + metrics.render_store_stats(ROADMAPS_DB.stats())
+    return app.response_class(body, mimetype="text/plain; version=0.0.4")
 
 
 @app.route("/favicon.ico")
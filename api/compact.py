@@ -0,0 +1,214 @@
+import datetime
+import sys
+import threading
+import weakref
+
+from api.utils import DEV_PATHS, QUOTES
+
+# Stable integer ids for everything a roadmap can reference in DEV_PATHS and QUOTES
+PATH_NAMES = tuple(DEV_PATHS)
+PATH_IDS = {name: i for i, name in enumerate(PATH_NAMES)}
+MILESTONE_IDS = [{text: i for i, text in enumerate(DEV_PATHS[name]["milestones"])} for name in PATH_NAMES]
+RESOURCE_IDS = [{text: i for i, text in enumerate(DEV_PATHS[name]["resources"])} for name in PATH_NAMES]
+TIP_IDS = [{text: i for i, text in enumerate(DEV_PATHS[name]["tips"])} for name in PATH_NAMES]
+QUOTE_IDS = {(quote["text"], quote["author"]): i for i, quote in enumerate(QUOTES)}
+
+ROADMAP_FIELDS = {
+    "id",
+    "name",
+    "interests",
+    "timeframe",
+    "created_at",
+    "end_date",
+    "roadmap",
+    "completed_count",
+    "version",
+    "resources",
+    "tips",
+    "quote",
+}
+
+
+# The part of a roadmap that only depends on its interests and timeframe: path ids, milestones as
+# (path id, milestone id) byte pairs in date order, and each milestone's day offset from created_at.
+# Schedules are immutable and interned, so every roadmap with the same content references one instance.
+class Schedule:
+    __slots__ = ("interests", "milestones", "offsets", "__weakref__")
+
+    def __init__(self, interests, milestones, offsets):
+        self.interests = interests
+        self.milestones = milestones
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def approximate_size(self):
+        return sys.getsizeof(self) + sum(
+            sys.getsizeof(part) for part in (self.interests, self.milestones, self.offsets)
+        )
+
+
+# Live schedules by content, an entry goes away with the last roadmap that references it
+_schedules = weakref.WeakValueDictionary()
+_schedules_lock = threading.Lock()
+# Resource and tip index samples, bounded by the permutations DEV_PATHS allows
+_samples = {}
+
+
+def intern_schedule(interests, milestones, offsets):
+    key = (interests, milestones, offsets)
+    with _schedules_lock:
+        schedule = _schedules.get(key)
+        if schedule is None:
+            schedule = _schedules[key] = Schedule(interests, milestones, offsets)
+        return schedule
+
+
+def intern_sample(indices):
+    return _samples.setdefault(indices, indices)
+
+
+# Returns (live schedules, their estimated heap bytes)
+def schedule_stats():
+    with _schedules_lock:
+        schedules = list(_schedules.values())
+    return len(schedules), sum(schedule.approximate_size() for schedule in schedules)
+
+
+# A roadmap as a shared Schedule plus indices into DEV_PATHS/QUOTES and a completion bitset. Only the
+# name, dates, completion and sampled resources belong to the roadmap, completing milestones never
+# touches the schedule, and a roadmap whose milestones change is given a new schedule of its own.
+class CompactRoadmap:
+    __slots__ = (
+        "name",
+        "schedule",
+        "timeframe",
+        "created",
+        "completed",
+        "completed_count",
+        "version",
+        "resources",
+        "tips",
+        "quote",
+    )
+
+    def __len__(self):
+        return len(self.schedule)
+
+    # Shared schedules and samples are left out, schedule_stats() accounts for the schedules
+    def approximate_size(self):
+        parts = (self.name, self.completed, self.resources, self.tips)
+        return sys.getsizeof(self) + sum(sys.getsizeof(part) for part in parts)
+
+    def is_completed(self, milestone_index):
+        return bool(self.completed >> milestone_index & 1)
+
+    # Flips a milestone, returns True when the roadmap changed
+    def set_completed(self, milestone_index, completed):
+        if self.is_completed(milestone_index) == completed:
+            return False
+        self.completed ^= 1 << milestone_index
+        self.completed_count += 1 if completed else -1
+        self.version += 1
+        return True
+
+    # A copy with the given completion state, everything else is immutable and shared
+    def with_completion(self, completed, completed_count, version):
+        record = CompactRoadmap()
+        record.name = self.name
+        record.schedule = self.schedule
+        record.timeframe = self.timeframe
+        record.created = self.created
+        record.completed = completed
+        record.completed_count = completed_count
+        record.version = version
+        record.resources = self.resources
+        record.tips = self.tips
+        record.quote = self.quote
+        return record
+
+    def expand_milestone(self, milestone_index, start=None):
+        start = start or datetime.date.fromordinal(self.created)
+        schedule = self.schedule
+        path = PATH_NAMES[schedule.milestones[milestone_index * 2]]
+        return {
+            "path": path,
+            "milestone": DEV_PATHS[path]["milestones"][schedule.milestones[milestone_index * 2 + 1]],
+            "target_date": (start + datetime.timedelta(days=schedule.offsets[milestone_index])).isoformat(),
+            "completed": self.is_completed(milestone_index),
+        }
+
+    # Rebuilds the JSON shape the API returns
+    def expand(self, roadmap_id):
+        start = datetime.date.fromordinal(self.created)
+        interests = [PATH_NAMES[path_id] for path_id in self.schedule.interests]
+        return {
+            "id": roadmap_id,
+            "name": self.name,
+            "interests": interests,
+            "timeframe": self.timeframe,
+            "created_at": start.isoformat(),
+            "end_date": (start + datetime.timedelta(days=self.timeframe * 30)).isoformat(),
+            "roadmap": [self.expand_milestone(i, start) for i in range(len(self))],
+            "completed_count": self.completed_count,
+            "version": self.version,
+            "resources": {
+                interests[n]: [DEV_PATHS[interests[n]]["resources"][i] for i in indices]
+                for n, indices in enumerate(self.resources)
+            },
+            "tips": {
+                interests[n]: [DEV_PATHS[interests[n]]["tips"][i] for i in indices]
+                for n, indices in enumerate(self.tips)
+            },
+            "quote": dict(QUOTES[self.quote]),
+        }
+
+
+# Returns a CompactRoadmap, or None when the roadmap references content outside DEV_PATHS/QUOTES
+def compact_roadmap(roadmap):
+    if roadmap.keys() != ROADMAP_FIELDS:
+        return None
+
+    try:
+        record = CompactRoadmap()
+        record.name = roadmap["name"]
+        record.timeframe = roadmap["timeframe"]
+        start = datetime.date.fromisoformat(roadmap["created_at"])
+        record.created = start.toordinal()
+
+        milestones = bytearray()
+        offsets = []
+        record.completed = 0
+        for i, milestone in enumerate(roadmap["roadmap"]):
+            path_id = PATH_IDS[milestone["path"]]
+            milestones.append(path_id)
+            milestones.append(MILESTONE_IDS[path_id][milestone["milestone"]])
+            offset = (datetime.date.fromisoformat(milestone["target_date"]) - start).days
+            if not 0 <= offset <= 0xFFFF:
+                return None
+            offsets.append(offset)
+            if milestone["completed"]:
+                record.completed |= 1 << i
+        interests = bytes(PATH_IDS[interest] for interest in roadmap["interests"])
+        record.schedule = intern_schedule(interests, bytes(milestones), tuple(offsets))
+        record.completed_count = roadmap["completed_count"]
+        record.version = roadmap["version"]
+
+        # One entry per interest, duplicates included, so expand() rebuilds the same dicts
+        record.resources = tuple(
+            intern_sample(bytes(RESOURCE_IDS[PATH_IDS[path]][text] for text in roadmap["resources"][path]))
+            for path in roadmap["interests"]
+        )
+        record.tips = tuple(
+            intern_sample(bytes(TIP_IDS[PATH_IDS[path]][text] for text in roadmap["tips"][path]))
+            for path in roadmap["interests"]
+        )
+        record.quote = QUOTE_IDS[(roadmap["quote"]["text"], roadmap["quote"]["author"])]
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+
+    # Anything the indices can't reproduce exactly, such as odd types, stays a plain dict
+    if record.expand(roadmap["id"]) != roadmap:
+        return None
+    return record
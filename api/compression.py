@@ -0,0 +1,127 @@
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import current_app, request
+
+from api.metrics import phase
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/css",
+    "text/html",
+    "text/plain",
+}
+
+# Server preference, used when the client rates several encodings equally
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(data, encoding, config):
+    if encoding == "br":
+        return brotli.compress(data, quality=config["COMPRESS_BROTLI_QUALITY"])
+    return gzip.compress(data, compresslevel=config["COMPRESS_LEVEL"], mtime=0)
+
+
+# Compresses chunk by chunk, flushing after each one so streamed lines reach the client as they are produced
+def compress_stream(chunks, encoding, config):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=config["COMPRESS_BROTLI_QUALITY"])
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(config["COMPRESS_LEVEL"], zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+# Compressed bodies of responses that carry an ETag, so a cached payload is only compressed once per encoding
+class CompressedBodyCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._bodies = OrderedDict()
+
+    def get_or_compress(self, key, data, encoding, config):
+        if self.max_entries <= 0:
+            return compress(data, encoding, config)
+
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is not None:
+                self._bodies.move_to_end(key)
+                return body
+
+        body = compress(data, encoding, config)
+        with self._lock:
+            self._bodies[key] = body
+            if len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+        return body
+
+    def __len__(self):
+        return len(self._bodies)
+
+
+def compress_response(response, cache):
+    config = current_app.config
+    if (
+        response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is None:
+        return response
+
+    with phase("compress"):
+        if response.is_streamed:
+            response.response = compress_stream(response.iter_encoded(), encoding, config)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < config["COMPRESS_MIN_SIZE"]:
+                return response
+
+            etag, _ = response.get_etag()
+            if etag is not None:
+                key = (etag, len(data), response.mimetype, encoding)
+                response.set_data(cache.get_or_compress(key, data, encoding, config))
+            else:
+                response.set_data(compress(data, encoding, config))
+
+    response.headers["Content-Encoding"] = encoding
+    # The compressed body is a different byte sequence with the same meaning, which is what a weak ETag says.
+    # Conditional requests compare weakly, so 304s keep working whichever encoding the client got.
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    cache = CompressedBodyCache(app.config["COMPRESS_CACHE_SIZE"])
+    app.extensions["compressed_bodies"] = cache
+
+    def compress_after_request(response):
+        if current_app.config["COMPRESS_ENABLED"]:
+            return compress_response(response, cache)
+        return response
+
+    app.after_request(compress_after_request)
@@ -0,0 +1,207 @@
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from api.utils import DEV_PATHS
+
+# Items kept per list and characters per item from a model reply, whatever it sends
+MAX_ITEMS = 5
+MAX_TEXT_LENGTH = 200
+CONTENT_FIELDS = ("milestones", "resources", "tips")
+
+SYSTEM_PROMPT = (
+    "You plan learning roadmaps for software developers. Reply with a single JSON object and nothing else. "
+    "It maps every requested interest, spelled exactly as given, to an object with three lists of short strings: "
+    f'"milestones" ({MAX_ITEMS} concrete project milestones from beginner to advanced), '
+    f'"resources" ({MAX_ITEMS} learning resources) and "tips" ({MAX_ITEMS} practical tips).'
+)
+
+
+def content_key(interests, timeframe):
+    return tuple(sorted(set(interests))), timeframe
+
+
+# Returns {interest: {"milestones": [...], "resources": [...], "tips": [...]}} for every interest, or None
+# when the reply doesn't provide usable lists for all of them
+def parse_content(text, interests):
+    try:
+        reply = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(reply, dict):
+        return None
+
+    content = {}
+    for interest in interests:
+        entry = reply.get(interest)
+        if not isinstance(entry, dict):
+            return None
+        content[interest] = {}
+        for field in CONTENT_FIELDS:
+            items = entry.get(field)
+            if not isinstance(items, list):
+                return None
+            items = [item.strip()[:MAX_TEXT_LENGTH] for item in items if isinstance(item, str) and item.strip()]
+            if not items:
+                return None
+            content[interest][field] = items[:MAX_ITEMS]
+    return content
+
+
+# Yields the reply text of an OpenAI-compatible /chat/completions call as it streams in
+def stream_completion(base_url, api_key, model, interests, timeframe, timeout):
+    # urllib is only needed when generation is enabled, so it is kept off the cold start path
+    import urllib.request
+
+    body = {
+        "model": model,
+        "stream": True,
+        "response_format": {"type": "json_object"},
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": json.dumps({"interests": list(interests), "timeframe_months": timeframe})},
+        ],
+    }
+    headers = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    request = urllib.request.Request(
+        f"{base_url.rstrip('/')}/chat/completions", data=json.dumps(body).encode(), headers=headers, method="POST"
+    )
+
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        for line in response:
+            line = line.strip()
+            if not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                return
+            choices = json.loads(data).get("choices") or [{}]
+            delta = choices[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+class Flight:
+    __slots__ = ("done", "content")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.content = None
+
+
+_DONE = object()
+
+
+# Roadmap content from a model, cached by normalized (interests, timeframe). Identical requests that
+# arrive while a call is running wait for it instead of making their own.
+class ContentGenerator:
+    def __init__(self, base_url, api_key, model, timeout, cache_size, complete=stream_completion):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.complete = complete
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._flights = {}
+        self.hits = self.misses = self.fallbacks = 0
+
+    # The upstream call runs in its own thread so the deadline holds even while a read is blocked
+    def _upstream(self, interests, timeframe):
+        deadline = time.monotonic() + self.timeout
+        chunks = queue.Queue()
+
+        def run():
+            try:
+                for delta in self.complete(
+                    self.base_url, self.api_key, self.model, interests, timeframe, self.timeout
+                ):
+                    chunks.put(delta)
+                chunks.put(_DONE)
+            except Exception as e:
+                chunks.put(e)
+
+        threading.Thread(target=run, name="content-generation", daemon=True).start()
+        while True:
+            item = chunks.get(timeout=max(0, deadline - time.monotonic()))
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    # Yields ("delta", text) while a reply streams in, then ("content", content or None). Only the caller
+    # that makes the upstream call sees deltas, cache hits and waiting duplicates get the content alone.
+    def events(self, interests, timeframe):
+        key = content_key(interests, timeframe)
+        with self._lock:
+            content = self._cache.get(key)
+            if content is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = Flight()
+                    self.misses += 1
+
+        if content is not None:
+            yield "content", content
+            return
+        if not leader:
+            flight.done.wait(self.timeout)
+            yield "content", flight.content
+            return
+
+        chunks = []
+        try:
+            for delta in self._upstream(*key):
+                chunks.append(delta)
+                yield "delta", delta
+            flight.content = parse_content("".join(chunks), key[0])
+        # Any upstream failure, timeout or malformed stream falls back to static content
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.content is not None:
+                    self._cache[key] = flight.content
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+                else:
+                    self.fallbacks += 1
+            flight.done.set()
+        yield "content", flight.content
+
+    def content(self, interests, timeframe):
+        for event, value in self.events(interests, timeframe):
+            if event == "content":
+                return value
+
+
+# Generated content, or DEV_PATHS when generation failed and every interest has a static path, otherwise None
+def with_fallback(content, interests):
+    if content is not None:
+        return content
+    if all(interest in DEV_PATHS for interest in interests):
+        return DEV_PATHS
+    return None
+
+
+def init_app(app):
+    config = app.config
+    if config["GENERATION_MODE"] == "llm":
+        app.extensions["content_generator"] = ContentGenerator(
+            config["LLM_BASE_URL"],
+            config["LLM_API_KEY"],
+            config["LLM_MODEL"],
+            config["LLM_TIMEOUT"],
+            config["LLM_CACHE_SIZE"],
+        )
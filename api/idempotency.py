@@ -0,0 +1,125 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from flask import current_app, g, jsonify, make_response, request
+
+from api.ratelimit import too_many_requests
+
+StoredResponse = namedtuple("StoredResponse", "status mimetype body")
+
+# Longest a duplicate waits for the original request before giving up with 409
+WAIT_TIMEOUT = 30
+
+
+class Execution:
+    __slots__ = ("fingerprint", "expires", "done", "response")
+
+    def __init__(self, fingerprint, expires):
+        self.fingerprint = fingerprint
+        self.expires = expires
+        self.done = threading.Event()
+        # Set once the first request finished with a response worth replaying
+        self.response = None
+
+
+# Responses by (API key name, Idempotency-Key), including executions that are still running so concurrent
+# duplicates wait for the first one instead of doing the work again
+class IdempotencyCache:
+    def __init__(self, ttl, max_entries, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        # Oldest first, every entry has the same ttl so expired ones are always at the front
+        self._executions = OrderedDict()
+
+    # Returns the execution for key and whether the caller started it and has to finish or abandon it
+    def begin(self, key, fingerprint):
+        now = self.clock()
+        with self._lock:
+            while self._executions and next(iter(self._executions.values())).expires <= now:
+                self._executions.popitem(last=False)
+            execution = self._executions.get(key)
+            if execution is not None:
+                return execution, False
+            execution = self._executions[key] = Execution(fingerprint, now + self.ttl)
+            if len(self._executions) > self.max_entries:
+                self._executions.popitem(last=False)
+            return execution, True
+
+    def finish(self, execution, response):
+        execution.response = response
+        execution.done.set()
+
+    # Forgets a failed execution so the next retry runs the request again
+    def abandon(self, key, execution):
+        with self._lock:
+            if self._executions.get(key) is execution:
+                del self._executions[key]
+        execution.done.set()
+
+    def __len__(self):
+        return len(self._executions)
+
+
+def replay(stored):
+    response = current_app.response_class(stored.body, status=stored.status, mimetype=stored.mimetype)
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+# Runs a request carrying an Idempotency-Key at most once per API key. Retries with the same key and body
+# get the first response replayed, the same key with a different body is rejected with 422. Only responses
+# below 500 are kept, so failed attempts can be retried. Requires require_api_key to run first.
+def idempotent(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if idempotency_key is None:
+            return f(*args, **kwargs)
+        if not 0 < len(idempotency_key) <= 255:
+            return jsonify({"error": "Idempotency-Key must be 1 to 255 characters"}), 400
+
+        cache = current_app.extensions["idempotency"]
+        limiter = current_app.extensions["rate_limiter"]
+        key = (g.api_key.name, idempotency_key)
+        fingerprint = hashlib.sha256(request.path.encode() + b"\n" + request.get_data()).digest()
+        while True:
+            execution, started = cache.begin(key, fingerprint)
+            if execution.fingerprint != fingerprint:
+                return jsonify({"error": "Idempotency-Key was already used with a different request"}), 422
+            if started:
+                break
+            # Duplicates wait without a concurrency slot, so they can't crowd out requests that have work to do
+            limiter.release_slot()
+            if not execution.done.wait(WAIT_TIMEOUT):
+                return jsonify({"error": "A request with this Idempotency-Key is still in progress"}), 409
+            if execution.response is not None:
+                return replay(execution.response)
+
+        # A duplicate whose original failed runs the request itself, which needs its slot back
+        if not limiter.acquire_slot():
+            cache.abandon(key, execution)
+            return too_many_requests("Too many requests in progress, retry shortly", 1)
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except BaseException:
+            cache.abandon(key, execution)
+            raise
+        if response.status_code >= 500 or response.is_streamed:
+            cache.abandon(key, execution)
+        else:
+            cache.finish(execution, StoredResponse(response.status_code, response.mimetype, response.get_data()))
+        return response
+
+    return decorated_function
+
+
+def init_app(app):
+    app.extensions["idempotency"] = IdempotencyCache(
+        app.config["IDEMPOTENCY_TTL"], app.config["IDEMPOTENCY_MAX_ENTRIES"]
+    )
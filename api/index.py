@@ -0,0 +1,206 @@
+import base64
+import binascii
+import threading
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+
+STATUSES = ("not_started", "in_progress", "completed")
+
+
+def roadmap_status(completed_count, milestones_count):
+    if completed_count == 0:
+        return "not_started"
+    if completed_count == milestones_count:
+        return "completed"
+    return "in_progress"
+
+
+# Cursors are the (created_at, id) key of the last roadmap on a page, opaque to clients
+def encode_cursor(key):
+    return base64.urlsafe_b64encode("\n".join(key).encode()).decode().rstrip("=")
+
+
+# Raises ValueError for anything that wasn't produced by encode_cursor
+def decode_cursor(cursor):
+    try:
+        created_at, roadmap_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split("\n")
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+    return created_at, roadmap_id
+
+
+# A sorted list of keys split into blocks of at most 2 * BLOCK_SIZE, so adding or removing a key shifts one block
+# instead of every key after it, and its cost doesn't grow with the number of keys. _maxes holds the last key of
+# each block, a bisect over it finds the block a key belongs to.
+class SortedKeys:
+    BLOCK_SIZE = 512
+
+    def __init__(self, keys=()):
+        self._blocks = []
+        self._maxes = []
+        self._len = 0
+        self.reset(sorted(keys))
+
+    # Replaces the contents with keys, which must already be sorted
+    def reset(self, keys):
+        size = self.BLOCK_SIZE
+        self._blocks = [keys[i : i + size] for i in range(0, len(keys), size)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._len = len(keys)
+
+    def add(self, key):
+        self._len += 1
+        if not self._blocks:
+            self._blocks.append([key])
+            self._maxes.append(key)
+            return
+        n = min(bisect_left(self._maxes, key), len(self._blocks) - 1)
+        block = self._blocks[n]
+        insort(block, key)
+        self._maxes[n] = block[-1]
+        if len(block) > 2 * self.BLOCK_SIZE:
+            self._blocks.insert(n + 1, block[self.BLOCK_SIZE :])
+            del block[self.BLOCK_SIZE :]
+            self._maxes.insert(n, block[-1])
+
+    # The key has to be present
+    def remove(self, key):
+        n = bisect_left(self._maxes, key)
+        block = self._blocks[n]
+        del block[bisect_left(block, key)]
+        self._len -= 1
+        if block:
+            self._maxes[n] = block[-1]
+        else:
+            del self._blocks[n]
+            del self._maxes[n]
+
+    # Keys from start onwards, or only those after it when inclusive is false
+    def iter_from(self, start=None, inclusive=True):
+        if start is None:
+            n = i = 0
+        else:
+            find = bisect_left if inclusive else bisect_right
+            n = find(self._maxes, start)
+            i = find(self._blocks[n], start) if n < len(self._blocks) else 0
+        for block in self._blocks[n:]:
+            yield from block[i:]
+            i = 0
+
+    def __iter__(self):
+        return self.iter_from()
+
+    def __len__(self):
+        return self._len
+
+
+# Secondary indexes for listing roadmaps without scanning the store. Every roadmap's (created_at, id)
+# key is kept in SortedKeys for each combination of interest (or any) and status (or any), so a page
+# is a bisect to its starting key plus at most limit entries after it.
+class RoadmapIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # id -> (key, interests, status)
+        self._entries = {}
+        self._lists = {}
+
+    def _list_names(self, interests, status):
+        for interest in (None, *interests):
+            yield interest, None
+            yield interest, status
+
+    def _insert(self, key, interests, status):
+        for name in self._list_names(interests, status):
+            self._list(name).add(key)
+
+    def _delete(self, key, interests, status):
+        for name in self._list_names(interests, status):
+            self._lists[name].remove(key)
+
+    def _list(self, name):
+        keys = self._lists.get(name)
+        if keys is None:
+            keys = self._lists[name] = SortedKeys()
+        return keys
+
+    def add(self, roadmap_id, created_at, interests, status):
+        interests = tuple(dict.fromkeys(interests))
+        key = (created_at, roadmap_id)
+        with self._lock:
+            entry = self._entries.get(roadmap_id)
+            if entry is not None:
+                self._delete(*entry)
+            self._entries[roadmap_id] = (key, interests, status)
+            self._insert(key, interests, status)
+
+    # Adds (roadmap id, created_at, interests, status) entries at once. Keys are sorted once and appended in
+    # order, so each list is rebuilt once instead of taking an insert per key.
+    def add_many(self, entries):
+        entries = {
+            roadmap_id: (created_at, tuple(dict.fromkeys(interests)), status)
+            for roadmap_id, created_at, interests, status in entries
+        }
+        # Two stable sorts on plain strings are several times faster than one on (created_at, id) tuples
+        order = sorted(entries)
+        order.sort(key=lambda roadmap_id: entries[roadmap_id][0])
+
+        with self._lock:
+            for roadmap_id in order:
+                entry = self._entries.get(roadmap_id)
+                if entry is not None:
+                    self._delete(*entry)
+
+            # The lists a key goes into only depend on its interests and status, which few combinations share.
+            # New keys are collected in order per list, then merged with the keys the list already has.
+            targets, added = {}, {}
+            for roadmap_id in order:
+                created_at, interests, status = entries[roadmap_id]
+                key = (created_at, roadmap_id)
+                self._entries[roadmap_id] = (key, interests, status)
+                lists = targets.get((interests, status))
+                if lists is None:
+                    names = self._list_names(interests, status)
+                    lists = targets[(interests, status)] = [added.setdefault(name, []) for name in names]
+                for keys in lists:
+                    keys.append(key)
+            for name, keys in added.items():
+                existing = self._list(name)
+                if existing:
+                    keys = sorted([*existing, *keys])
+                existing.reset(keys)
+
+    def remove(self, roadmap_id):
+        with self._lock:
+            entry = self._entries.pop(roadmap_id, None)
+            if entry is not None:
+                self._delete(*entry)
+
+    def set_status(self, roadmap_id, status):
+        with self._lock:
+            entry = self._entries.get(roadmap_id)
+            if entry is None or entry[2] == status:
+                return
+            key, interests, old_status = entry
+            for interest in (None, *interests):
+                self._lists[(interest, old_status)].remove(key)
+                self._list((interest, status)).add(key)
+            self._entries[roadmap_id] = (key, interests, status)
+
+    # Returns up to limit ids in (created_at, id) order and the cursor key for the next page, or None
+    def page(self, interest=None, status=None, created_from=None, created_to=None, after=None, limit=20):
+        with self._lock:
+            keys = self._lists.get((interest, status))
+            if keys is None:
+                return [], None
+            if after is not None and (not created_from or after >= (created_from,)):
+                page = list(islice(keys.iter_from(after, inclusive=False), limit + 1))
+            else:
+                page = list(islice(keys.iter_from((created_from,) if created_from else None), limit + 1))
+
+        if created_to is not None:
+            page = [key for key in page if key[0] <= created_to]
+        next_key = page[limit - 1] if len(page) > limit else None
+        return [roadmap_id for _, roadmap_id in page[:limit]], next_key
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,283 @@
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from functools import lru_cache
+
+from api.compact import CompactRoadmap, intern_sample, intern_schedule
+
+# A snapshot is a header, the distinct schedules and samples its roadmaps share, then one record per roadmap.
+# Compact roadmaps are stored as their indices, anything else as the roadmap's JSON.
+SNAPSHOT_MAGIC = b"RMSNAP01"
+# magic, sequence number of the last logged write it includes, schedules, samples, roadmaps
+SNAPSHOT_HEADER = struct.Struct("<8sQIII")
+# interests, milestones
+SCHEDULE_HEADER = struct.Struct("<BH")
+# kind, id length, name length, schedule, timeframe, created ordinal, completed_count, version, quote, bitset length,
+# followed by the id, the name, the completion bitset and a (resources, tips) sample pair per interest
+COMPACT_RECORD = struct.Struct("<BBHIHIHQHB")
+# kind, JSON length, followed by the JSON
+JSON_RECORD = struct.Struct("<BI")
+COMPACT, JSON = 0, 1
+
+# A log entry is its length and CRC-32, then the sequence number, the operation and the operation's JSON arguments
+LOG_HEADER = struct.Struct("<II")
+LOG_ENTRY = struct.Struct("<QB")
+PUT, UPDATE = 1, 2
+
+# "always" syncs every write before it returns, "interval" at most once per fsync_interval, "never" leaves it to
+# the OS. Writes reach the OS before returning under every policy, so a crashed process loses nothing, the
+# policy only decides what a crashed machine can lose.
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+# (resources, tips) sample indices for a roadmap with count interests
+@lru_cache(maxsize=None)
+def sample_pairs(count):
+    return struct.Struct(f"<{count * 2}H")
+
+
+def encode_snapshot(sequence, records):
+    schedules, samples, parts, count = {}, {}, [], 0
+    for roadmap_id, record in records:
+        count += 1
+        if isinstance(record, CompactRoadmap):
+            schedule = schedules.setdefault(record.schedule, len(schedules))
+            indices = []
+            for n, resources in enumerate(record.resources):
+                indices += (
+                    samples.setdefault(resources, len(samples)),
+                    samples.setdefault(record.tips[n], len(samples)),
+                )
+            try:
+                encoded_id, name = roadmap_id.encode(), record.name.encode()
+                completed = record.completed.to_bytes((record.completed.bit_length() + 7) // 8, "little")
+                parts.append(
+                    COMPACT_RECORD.pack(
+                        COMPACT,
+                        len(encoded_id),
+                        len(name),
+                        schedule,
+                        record.timeframe,
+                        record.created,
+                        record.completed_count,
+                        record.version,
+                        record.quote,
+                        len(completed),
+                    )
+                )
+            # Values the fixed fields can't hold, such as a name that isn't UTF-8 text, fall back to JSON
+            except (struct.error, AttributeError, UnicodeEncodeError):
+                record = record.expand(roadmap_id)
+            else:
+                parts += (encoded_id, name, completed, sample_pairs(len(indices) // 2).pack(*indices))
+                continue
+        data = json.dumps(record).encode()
+        parts += (JSON_RECORD.pack(JSON, len(data)), data)
+
+    header = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, sequence, len(schedules), len(samples), count)]
+    for schedule in schedules:
+        header += (
+            SCHEDULE_HEADER.pack(len(schedule.interests), len(schedule)),
+            schedule.interests,
+            schedule.milestones,
+            struct.pack(f"<{len(schedule)}H", *schedule.offsets),
+        )
+    for sample in samples:
+        header += (bytes((len(sample),)), sample)
+    return b"".join(header + parts)
+
+
+# Returns the snapshot's sequence number and its (roadmap id, record) pairs, or (0, []) when there is no
+# snapshot yet. The file is memory-mapped, so only the pages being decoded are read in.
+def read_snapshot(path):
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        return 0, []
+
+    with file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, sequence, schedule_count, sample_count, count = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a roadmap snapshot: {path}")
+        offset = SNAPSHOT_HEADER.size
+
+        schedules = []
+        for _ in range(schedule_count):
+            interests_count, milestones_count = SCHEDULE_HEADER.unpack_from(data, offset)
+            offset += SCHEDULE_HEADER.size
+            interests = data[offset : offset + interests_count]
+            offset += interests_count
+            milestones = data[offset : offset + milestones_count * 2]
+            offsets = struct.unpack_from(f"<{milestones_count}H", data, offset + milestones_count * 2)
+            offset += milestones_count * 4
+            schedules.append(intern_schedule(interests, milestones, offsets))
+
+        samples = []
+        for _ in range(sample_count):
+            length = data[offset]
+            samples.append(intern_sample(data[offset + 1 : offset + 1 + length]))
+            offset += 1 + length
+
+        records = []
+        unpack_record = COMPACT_RECORD.unpack_from
+        for _ in range(count):
+            if data[offset] == JSON:
+                length = JSON_RECORD.unpack_from(data, offset)[1]
+                offset += JSON_RECORD.size
+                roadmap = json.loads(data[offset : offset + length])
+                offset += length
+                records.append((roadmap["id"], roadmap))
+                continue
+
+            record = CompactRoadmap()
+            (
+                _,
+                id_length,
+                name_length,
+                schedule,
+                record.timeframe,
+                record.created,
+                record.completed_count,
+                record.version,
+                record.quote,
+                completed_length,
+            ) = unpack_record(data, offset)
+            offset += COMPACT_RECORD.size
+            roadmap_id = data[offset : offset + id_length].decode()
+            offset += id_length
+            record.name = data[offset : offset + name_length].decode()
+            offset += name_length
+            record.completed = int.from_bytes(data[offset : offset + completed_length], "little")
+            offset += completed_length
+            record.schedule = schedules[schedule]
+            pairs = sample_pairs(len(record.schedule.interests))
+            indices = pairs.unpack_from(data, offset)
+            offset += pairs.size
+            record.resources = tuple(samples[i] for i in indices[::2])
+            record.tips = tuple(samples[i] for i in indices[1::2])
+            records.append((roadmap_id, record))
+
+        if offset != len(data):
+            raise ValueError(f"Corrupt roadmap snapshot: {path}")
+    return sequence, records
+
+
+def fsync_directory(path):
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# Replaces the snapshot atomically: written beside it, synced, renamed over it and the rename synced. Snapshots
+# are synced under every fsync policy because the log before them is dropped once they are in place.
+def write_snapshot(path, data):
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    fsync_directory(path)
+
+
+def encode_entry(sequence, operation, args):
+    payload = LOG_ENTRY.pack(sequence, operation) + json.dumps(args).encode()
+    return LOG_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+# Returns the (sequence, operation, args) entries of a log and the length of its valid prefix. Reading stops
+# at the first entry that is cut short or fails its checksum, such as one being written when the process died.
+def read_log(data):
+    entries, offset = [], 0
+    while offset + LOG_HEADER.size <= len(data):
+        length, checksum = LOG_HEADER.unpack_from(data, offset)
+        payload = data[offset + LOG_HEADER.size : offset + LOG_HEADER.size + length]
+        if length < LOG_ENTRY.size or len(payload) != length or zlib.crc32(payload) != checksum:
+            break
+        sequence, operation = LOG_ENTRY.unpack_from(payload)
+        try:
+            args = json.loads(payload[LOG_ENTRY.size :])
+        except ValueError:
+            break
+        entries.append((sequence, operation, args))
+        offset += LOG_HEADER.size + length
+    return entries, offset
+
+
+# Append-only log of store writes. Callers serialize appends and compactions.
+class RoadmapLog:
+    def __init__(self, path, fsync="interval", fsync_interval=1.0, clock=time.monotonic):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        self.path = path
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.clock = clock
+        self.size = 0
+        self.synced_at = clock()
+        self._fd = None
+
+    # Returns the entries in the log, drops a torn tail and opens the log for appending
+    def open(self):
+        try:
+            with open(self.path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            data = b""
+        entries, self.size = read_log(data)
+
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        if self.size < len(data):
+            os.ftruncate(self._fd, self.size)
+            self.sync()
+        elif not data and self.fsync != "never":
+            fsync_directory(self.path)
+        return entries
+
+    def append(self, entries):
+        data = b"".join(encode_entry(*entry) for entry in entries)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._fd, view) :]
+        self.size += len(data)
+
+    # Syncs what has been appended when the fsync policy asks for it
+    def commit(self):
+        if self.fsync == "always" or (
+            self.fsync == "interval" and self.clock() - self.synced_at >= self.fsync_interval
+        ):
+            self.sync()
+
+    def sync(self):
+        os.fsync(self._fd)
+        self.synced_at = self.clock()
+
+    # Drops the first offset bytes, which a snapshot now covers, by rewriting the rest to a new log
+    def compact(self, offset):
+        with open(self.path, "rb") as file:
+            file.seek(offset)
+            tail = file.read()
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(tail)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        fsync_directory(self.path)
+
+        os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        self.size = len(tail)
+        self.synced_at = self.clock()
+
+    def close(self):
+        if self._fd is not None:
+            if self.fsync != "never":
+                self.sync()
+            os.close(self._fd)
+            self._fd = None
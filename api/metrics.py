@@ -0,0 +1,144 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+
+# Upper bounds in seconds, Prometheus style
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._phases = {}
+
+    def observe(self, route, method, status, duration, phases):
+        with self._lock:
+            key = (route, method, status)
+            histogram = self._requests.get(key) or self._requests.setdefault(key, Histogram())
+            histogram.observe(duration)
+            for phase_name, phase_duration in phases.items():
+                key = (route, phase_name)
+                histogram = self._phases.get(key) or self._phases.setdefault(key, Histogram())
+                histogram.observe(phase_duration)
+
+    def render(self):
+        with self._lock:
+            requests = {key: (list(h.counts), h.sum) for key, h in self._requests.items()}
+            phases = {key: (list(h.counts), h.sum) for key, h in self._phases.items()}
+
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route, method and status.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (route, method, status), data in sorted(requests.items()):
+            labels = f'route="{route}",method="{method}",status="{status}"'
+            lines.extend(render_histogram("http_request_duration_seconds", labels, *data))
+
+        lines.extend(
+            [
+                "# HELP http_request_phase_duration_seconds Time spent in each phase of a request by route.",
+                "# TYPE http_request_phase_duration_seconds histogram",
+            ]
+        )
+        for (route, phase_name), data in sorted(phases.items()):
+            labels = f'route="{route}",phase="{phase_name}"'
+            lines.extend(render_histogram("http_request_phase_duration_seconds", labels, *data))
+
+        return "\n".join(lines) + "\n"
+
+
+STORE_STATS = {
+    "entries": ("gauge", "Roadmaps held in memory."),
+    "bytes": ("gauge", "Estimated heap size of the roadmaps held in memory and their cached bodies."),
+    "hits": ("counter", "Roadmap lookups served from memory."),
+    "misses": ("counter", "Roadmap lookups that found nothing in memory."),
+    "evictions": ("counter", "Roadmaps evicted to stay within the store's capacity."),
+    "expirations": ("counter", "Roadmaps dropped after their TTL or end date."),
+}
+
+
+def render_store_stats(stats):
+    lines = []
+    for key, value in stats.items():
+        kind, description = STORE_STATS[key]
+        name = f"roadmap_store_{key}_total" if kind == "counter" else f"roadmap_store_{key}"
+        lines.extend([f"# HELP {name} {description}", f"# TYPE {name} {kind}", f"{name} {value}"])
+    return "".join(line + "\n" for line in lines)
+
+
+def render_histogram(name, labels, counts, total):
+    bounds = BUCKETS + ("+Inf",)
+    cumulative = 0
+    for i, count in enumerate(counts):
+        bound = bounds[i]
+        cumulative += count
+        yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+    yield f"{name}_sum{{{labels}}} {total}"
+    yield f"{name}_count{{{labels}}} {cumulative}"
+
+
+# Adds the time spent inside the block to the named phase of the current request
+@contextmanager
+def phase(name):
+    if not has_request_context() or "request_phases" not in g:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = g.request_phases
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def init_app(app, metrics):
+    def start_timer():
+        g.request_start = time.perf_counter()
+        g.request_phases = {}
+
+    def record(response):
+        start = g.pop("request_start", None)
+        if start is None:
+            return response
+
+        duration = time.perf_counter() - start
+        phases = g.pop("request_phases")
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.observe(route, request.method, response.status_code, duration, phases)
+
+        timings = [f"{name};dur={value * 1000:.3f}" for name, value in phases.items()]
+        timings.append(f"total;dur={duration * 1000:.3f}")
+        response.headers["Server-Timing"] = ", ".join(timings)
+        return response
+
+    def start_render(sender, **extra):
+        if "request_phases" in g:
+            g.render_start = time.perf_counter()
+
+    def finish_render(sender, **extra):
+        start = g.pop("render_start", None)
+        if start is not None:
+            phases = g.request_phases
+            phases["render"] = phases.get("render", 0.0) + time.perf_counter() - start
+
+    app.before_request(start_timer)
+    app.after_request(record)
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(finish_render, app, weak=False)
@@ -0,0 +1,267 @@
+import hashlib
+import hmac
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from flask import current_app, g, jsonify, make_response, request
+
+from api.store import connect, transaction
+
+ApiKey = namedtuple("ApiKey", "name digest per_minute")
+Quota = namedtuple("Quota", "allowed limit remaining reset retry_after")
+
+
+def key_digest(key):
+    return hashlib.sha256(key.encode()).digest()
+
+
+# Keys are indexed by their SHA-256 digest, so a lookup costs one hash and one dict probe however many keys
+# there are, and the plaintext keys aren't kept in memory
+class KeyIndex:
+    def __init__(self, keys=()):
+        self._keys = {key.digest: key for key in keys}
+
+    # API_KEY is the "default" key, API_KEYS adds "name:key" or "name:key:requests_per_minute" entries
+    @classmethod
+    def from_env(cls, api_key, api_keys):
+        keys = [ApiKey("default", key_digest(api_key), None)] if api_key else []
+        for entry in (api_keys or "").split(","):
+            name, _, rest = entry.strip().partition(":")
+            key, _, per_minute = rest.partition(":")
+            if name and key:
+                keys.append(ApiKey(name, key_digest(key), int(per_minute) if per_minute else None))
+        return cls(keys)
+
+    def lookup(self, key):
+        if not key:
+            return None
+        digest = key_digest(key)
+        api_key = self._keys.get(digest)
+        if api_key is None or not hmac.compare_digest(api_key.digest, digest):
+            return None
+        return api_key
+
+    def __len__(self):
+        return len(self._keys)
+
+
+_key_index = (None, KeyIndex())
+
+
+# Keys come from the environment so they can be rotated without a deploy, the index is only rebuilt when the
+# variables change
+def api_keys():
+    global _key_index
+    raw = (os.environ.get("API_KEY"), os.environ.get("API_KEYS"))
+    cached_raw, index = _key_index
+    if raw != cached_raw:
+        index = KeyIndex.from_env(*raw)
+        _key_index = (raw, index)
+    return index
+
+
+def refill(tokens, updated, now, rate, burst):
+    return min(burst, tokens + (now - updated) * rate)
+
+
+# A request costing more than the burst is let through on a full bucket and leaves it in debt, so the key waits
+# until the rest is paid off
+def spend(tokens, cost, burst):
+    allowed = tokens >= min(cost, burst)
+    return allowed, tokens - cost if allowed else tokens
+
+
+def bucket_quota(allowed, tokens, rate, burst, cost):
+    return Quota(
+        allowed,
+        burst,
+        max(0, int(tokens)),
+        math.ceil((burst - tokens) / rate),
+        0 if allowed else max(1, math.ceil((min(cost, burst) - tokens) / rate)),
+    )
+
+
+# One token bucket per name, refilled at rate tokens per second up to burst, kept in this process. Past
+# MAX_BUCKETS the least recently used bucket is dropped, which only ever hands its name a full bucket early.
+class MemoryTokenBuckets:
+    MAX_BUCKETS = 10000
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        # name -> (tokens, updated), least recently used first
+        self._buckets = OrderedDict()
+
+    def take(self, name, rate, burst, cost=1):
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(name, (burst, now))
+            allowed, tokens = spend(refill(tokens, updated, now, rate, burst), cost, burst)
+            self._buckets[name] = (tokens, now)
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        return bucket_quota(allowed, tokens, rate, burst, cost)
+
+
+# The same buckets in a SQLite table, shared by every process that opens the same file. Every PURGE_INTERVAL-th
+# take deletes the buckets idle for longer than PURGE_AGE seconds, which have refilled at any rate of at least
+# burst / PURGE_AGE tokens per second.
+class SQLiteTokenBuckets:
+    PURGE_INTERVAL = 100
+    PURGE_AGE = 3600
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._local = threading.local()
+        self._takes = 0
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = connect(self.path)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def take(self, name, rate, burst, cost=1):
+        self._takes += 1
+        with transaction(self._connection(), "IMMEDIATE") as connection:
+            now = self.clock()
+            row = connection.execute("SELECT tokens, updated FROM rate_limits WHERE name = ?", (name,)).fetchone()
+            allowed, tokens = spend(refill(*row, now, rate, burst) if row else burst, cost, burst)
+            connection.execute(
+                "INSERT INTO rate_limits (name, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (name, tokens, now),
+            )
+            if self._takes % self.PURGE_INTERVAL == 0:
+                connection.execute("DELETE FROM rate_limits WHERE updated < ?", (now - self.PURGE_AGE,))
+        return bucket_quota(allowed, tokens, rate, burst, cost)
+
+
+def too_many_requests(message, retry_after):
+    response = make_response(jsonify({"error": message}), 429)
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+def set_quota_headers(response, quota):
+    response.headers["RateLimit-Limit"] = str(quota.limit)
+    response.headers["RateLimit-Remaining"] = str(quota.remaining)
+    response.headers["RateLimit-Reset"] = str(quota.reset)
+    return response
+
+
+# WSGI environ key naming the client a UI page calls the API for, set when the call is dispatched in-process.
+# Such calls share the UI's key but get a bucket per client, so one visitor can't use up the UI's quota for
+# everyone. Unlike a header, an environ key can't be sent by an HTTP client.
+UI_CLIENT = "api.ui_client"
+
+
+# Views that do the work of several requests declare what a request costs, in tokens, as cost(request)
+def rate_limit_cost(cost):
+    def decorator(f):
+        f.rate_limit_cost = cost
+        return f
+
+    return decorator
+
+
+# Admission control for API key protected routes. Requests past the concurrency limit or their key's rate
+# are turned away with 429 before the view runs, so shed requests cost no generation or storage work.
+class RateLimiter:
+    def __init__(self, buckets, max_concurrent):
+        self.buckets = buckets
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent > 0 else None
+
+    def take(self, api_key, cost=1):
+        config = current_app.config
+        per_minute = config["RATE_LIMIT_PER_MINUTE"] if api_key.per_minute is None else api_key.per_minute
+        if per_minute <= 0:
+            return None
+        client = request.environ.get(UI_CLIENT)
+        name = api_key.name if client is None else f"{api_key.name}:ui:{client}"
+        return self.buckets.take(name, per_minute / 60, config["RATE_LIMIT_BURST"], cost)
+
+    # Takes a concurrency slot for the current request unless it holds one already. Requests that go on to wait
+    # without doing any work give theirs back with release_slot and take one again before they do work.
+    def acquire_slot(self):
+        if self._slots is None or g.get("holds_slot"):
+            return True
+        g.holds_slot = self._slots.acquire(blocking=False)
+        return g.holds_slot
+
+    def release_slot(self):
+        if g.pop("holds_slot", False):
+            self._slots.release()
+
+    # A streamed body does its work while it is sent, so it keeps the request's slot until it is exhausted or
+    # closed, whichever comes first. Not every WSGI server closes a body it has read to the end.
+    def hold_slot_while_streaming(self, response):
+        if not g.pop("holds_slot", False):
+            return
+        once = threading.Lock()
+
+        def release():
+            if once.acquire(blocking=False):
+                self._slots.release()
+
+        def stream(body):
+            try:
+                yield from body
+            finally:
+                release()
+
+        response.response = stream(response.response)
+        response.call_on_close(release)
+
+    def call(self, api_key, view, *args, **kwargs):
+        if not self.acquire_slot():
+            return too_many_requests("Too many requests in progress, retry shortly", 1)
+        try:
+            cost = getattr(view, "rate_limit_cost", None)
+            quota = self.take(api_key, 1 if cost is None else cost(request))
+            if quota is not None and not quota.allowed:
+                return set_quota_headers(too_many_requests("Rate limit exceeded", quota.retry_after), quota)
+            response = make_response(view(*args, **kwargs))
+            if response.is_streamed:
+                self.hold_slot_while_streaming(response)
+        finally:
+            self.release_slot()
+        return set_quota_headers(response, quota) if quota is not None else response
+
+
+# Authenticates X-API-Key, then runs the view under the key's rate limit and the global concurrency limit
+def require_api_key(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        api_key = api_keys().lookup(request.headers.get("X-API-Key"))
+        if api_key is None:
+            return jsonify({"error": "Invalid or missing API key"}), 401
+        g.api_key = api_key
+        return current_app.extensions["rate_limiter"].call(api_key, f, *args, **kwargs)
+
+    return decorated_function
+
+
+def create_buckets(backend, path=None):
+    if backend == "memory":
+        return MemoryTokenBuckets()
+    if backend == "sqlite":
+        return SQLiteTokenBuckets(path)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+def init_app(app):
+    config = app.config
+    app.extensions["rate_limiter"] = RateLimiter(
+        create_buckets(config["RATE_LIMIT_BACKEND"], config["RATE_LIMIT_DB_PATH"]), config["MAX_CONCURRENT_REQUESTS"]
+    )
@@ -0,0 +1,183 @@
+import datetime
+import random
+import secrets
+import uuid
+
+from api.index import STATUSES, decode_cursor
+from api.schedule import build_milestones
+from api.utils import DEV_PATHS, QUOTES
+
+REQUIRED_FIELDS = ["name", "interests", "timeframe"]
+# Bounds on free-form interests, which end up in the generation prompt
+MAX_CUSTOM_INTERESTS = 5
+MAX_INTEREST_LENGTH = 40
+# No roadmap comes close to this many milestones. Larger indices are rejected before they reach a backend,
+# so they always fit the 64-bit integers SQLite binds.
+MAX_MILESTONES = 2**16
+
+
+# Returns (spec, None) for a valid /create body and (None, error) otherwise. With custom_interests any
+# short topic is accepted and normalized, otherwise interests must be DEV_PATHS keys.
+def validate_roadmap_spec(data, custom_interests=False):
+    # Validate required fields
+    if not isinstance(data, dict) or not all(field in data for field in REQUIRED_FIELDS):
+        return None, {"error": "Missing required fields", "required_fields": REQUIRED_FIELDS}
+
+    # Validate name, it is stored and echoed back as UTF-8 text
+    name = data["name"]
+    if not isinstance(name, str) or not is_encodable(name):
+        return None, {"error": "Name must be text"}
+
+    # Validate interests
+    interests = data["interests"]
+    if custom_interests:
+        interests, error = validate_custom_interests(interests)
+        if error:
+            return None, error
+    elif (
+        not interests
+        or not isinstance(interests, list)
+        or not all(isinstance(interest, str) and interest in DEV_PATHS for interest in interests)
+    ):
+        return None, {"error": "Invalid interests provided", "available_paths": list(DEV_PATHS.keys())}
+
+    # Validate timeframe
+    try:
+        timeframe = int(data["timeframe"])
+    except (TypeError, ValueError):
+        return None, {"error": "Timeframe must be a number"}
+    if timeframe < 1 or timeframe > 24:
+        return None, {"error": "Timeframe must be between 1 and 24 months"}
+
+    return {"name": name, "interests": interests, "timeframe": timeframe}, None
+
+
+# False for strings with lone surrogates, which JSON can carry but UTF-8 can't
+def is_encodable(text):
+    try:
+        text.encode()
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+# Lowercases and collapses whitespace so "Machine  Learning" and "machine learning" are one topic
+def normalize_interest(interest):
+    return " ".join(interest.split()).lower()
+
+
+def validate_custom_interests(interests):
+    if not interests or not isinstance(interests, list) or not all(isinstance(i, str) for i in interests):
+        return None, {"error": "Interests must be a non-empty list of topics"}
+    interests = list(dict.fromkeys(normalize_interest(interest) for interest in interests))
+    if len(interests) > MAX_CUSTOM_INTERESTS:
+        return None, {"error": f"At most {MAX_CUSTOM_INTERESTS} interests can be combined"}
+    if not all(0 < len(interest) <= MAX_INTEREST_LENGTH for interest in interests):
+        return None, {"error": f"Each interest must be 1 to {MAX_INTEREST_LENGTH} characters"}
+    return interests, None
+
+
+# Returns ({milestone index: completed}, None) for a valid PATCH /roadmap/<id>/milestones body, such as
+# {"milestones": {"0": true, "3": false}}, and (None, error) otherwise
+def validate_milestone_changes(data):
+    milestones = data.get("milestones") if isinstance(data, dict) else None
+    if not isinstance(milestones, dict) or not milestones:
+        return None, {"error": "Body must map milestone indices to completed flags under 'milestones'"}
+
+    changes = {}
+    for key, completed in milestones.items():
+        # str.isdigit() also accepts digits like "²" that int() refuses, and int() refuses overly long numbers
+        try:
+            index = int(key) if key.isascii() and key.isdigit() else -1
+        except ValueError:
+            index = -1
+        if not 0 <= index < MAX_MILESTONES or str(index) != key:
+            return None, {"error": f"Invalid milestone index: {key}"}
+        if not isinstance(completed, bool):
+            return None, {"error": f"Completed flag for milestone {key} must be true or false"}
+        changes[index] = completed
+    return changes, None
+
+
+# Returns (filters, None) for valid GET /roadmaps listing arguments and (None, error) otherwise
+def validate_listing_args(args, max_limit):
+    filters = {"interest": args.get("interest"), "status": args.get("status")}
+    if filters["interest"] is not None and filters["interest"] not in DEV_PATHS:
+        return None, {"error": "Invalid interest", "available_paths": list(DEV_PATHS.keys())}
+    if filters["status"] is not None and filters["status"] not in STATUSES:
+        return None, {"error": "Invalid status", "statuses": list(STATUSES)}
+
+    for field in ("created_from", "created_to"):
+        value = args.get(field)
+        try:
+            filters[field] = None if value is None else datetime.date.fromisoformat(value).isoformat()
+        except ValueError:
+            return None, {"error": f"{field} must be a date in YYYY-MM-DD format"}
+
+    try:
+        filters["limit"] = int(args.get("limit", min(20, max_limit)))
+    except ValueError:
+        return None, {"error": "limit must be a number"}
+    if not 1 <= filters["limit"] <= max_limit:
+        return None, {"error": f"limit must be between 1 and {max_limit}"}
+
+    try:
+        filters["after"] = decode_cursor(args["cursor"]) if "cursor" in args else None
+    except ValueError:
+        return None, {"error": "Invalid cursor"}
+
+    return filters, None
+
+
+# paths maps each interest to its milestones, resources and tips, generated content uses the same shape as DEV_PATHS
+def generate_roadmap(spec, paths=DEV_PATHS):
+    interests = spec["interests"]
+    timeframe = spec["timeframe"]
+
+    # Calculate milestone dates
+    start_date = datetime.datetime.now()
+    end_date = start_date + datetime.timedelta(days=timeframe * 30)
+
+    return {
+        "id": str(uuid.uuid4()),
+        "name": spec["name"],
+        "interests": interests,
+        "timeframe": timeframe,
+        "created_at": start_date.strftime("%Y-%m-%d"),
+        "end_date": end_date.strftime("%Y-%m-%d"),
+        "roadmap": build_milestones(interests, timeframe, start_date, paths),
+        "completed_count": 0,
+        "version": 1,
+        "resources": {
+            interest: random.sample(paths[interest]["resources"], min(3, len(paths[interest]["resources"])))
+            for interest in interests
+        },
+        "tips": {
+            interest: random.sample(paths[interest]["tips"], min(2, len(paths[interest]["tips"])))
+            for interest in interests
+        },
+        "quote": secrets.choice(QUOTES),
+    }
+
+
+def roadmap_summary(roadmap):
+    return {
+        "name": roadmap["name"],
+        "timeframe": f"{roadmap['timeframe']} months",
+        "paths": roadmap["interests"],
+        "milestones_count": len(roadmap["roadmap"]),
+    }
+
+
+def roadmap_progress(roadmap):
+    return roadmap["completed_count"] / len(roadmap["roadmap"]) * 100
+
+
+# The shape returned by the read endpoints, progress is derived from the stored completed count
+def with_progress(roadmap):
+    return {**roadmap, "progress": roadmap_progress(roadmap)}
+
+
+# Strong validator for a roadmap representation, changes whenever the stored version is bumped
+def roadmap_etag(roadmap_id, version):
+    return f"{roadmap_id}-{version}"
@@ -0,0 +1,45 @@
+import datetime
+from functools import lru_cache
+
+from api.utils import DEV_PATHS
+
+
+# The merged, date-ordered (day_offset, interest, milestone) table for paths shaped like DEV_PATHS
+def plan_schedule(paths, interests, timeframe):
+    schedule = []
+
+    # Distribute milestones across the timeframe
+    for interest in interests:
+        milestones = paths[interest]["milestones"]
+        milestone_count = min(timeframe, len(milestones))
+        spacing = timeframe * 30 // (milestone_count + 1)
+
+        for i, milestone in enumerate(milestones[:milestone_count]):
+            schedule.append(((i + 1) * spacing, interest, milestone))
+
+    # Stable sort keeps interest order for milestones that fall on the same day
+    schedule.sort(key=lambda entry: entry[0])
+    return tuple(schedule)
+
+
+# Day offsets only depend on the interests and the timeframe, so the DEV_PATHS table is built once per combination
+@lru_cache(maxsize=1024)
+def milestone_schedule(interests, timeframe):
+    return plan_schedule(DEV_PATHS, interests, timeframe)
+
+
+def build_milestones(interests, timeframe, start_date, paths=None):
+    start_day = datetime.date(start_date.year, start_date.month, start_date.day)
+    if paths is None or paths is DEV_PATHS:
+        schedule = milestone_schedule(tuple(interests), timeframe)
+    else:
+        schedule = plan_schedule(paths, interests, timeframe)
+    return [
+        {
+            "path": interest,
+            "milestone": milestone,
+            "target_date": (start_day + datetime.timedelta(days=offset)).isoformat(),
+            "completed": False,
+        }
+        for offset, interest, milestone in schedule
+    ]
@@ -0,0 +1,192 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SecureCookieSession, SessionInterface, session_json_serializer
+
+from api.store import connect, transaction
+
+
+# Session data kept in memory, each entry lives for ttl seconds after it was last written. Past max_entries the
+# least recently written session is dropped, 0 is unlimited.
+class MemorySessionStore:
+    def __init__(self, ttl, max_entries=0, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        # sid -> (data, expires), oldest write first so expired entries are always at the front
+        self._sessions = OrderedDict()
+
+    def load(self, sid):
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is not None and entry[1] <= self.clock():
+                del self._sessions[sid]
+                return None
+            return entry
+
+    def save(self, sid, data):
+        now = self.clock()
+        with self._lock:
+            self._sessions.pop(sid, None)
+            self._sessions[sid] = (data, now + self.ttl)
+            while self._sessions and next(iter(self._sessions.values()))[1] <= now:
+                self._sessions.popitem(last=False)
+            if self.max_entries and len(self._sessions) > self.max_entries:
+                self._sessions.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore:
+    # Expired rows are swept on every PURGE_INTERVAL-th write, reads skip them in the meantime
+    PURGE_INTERVAL = 100
+
+    def __init__(self, path, ttl, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = connect(self.path)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)")
+            self._local.connection = connection
+        return connection
+
+    def load(self, sid):
+        return (
+            self._connection()
+            .execute("SELECT data, expires FROM sessions WHERE id = ? AND expires > ?", (sid, self.clock()))
+            .fetchone()
+        )
+
+    def save(self, sid, data):
+        now = self.clock()
+        self._writes += 1
+        with transaction(self._connection()) as connection:
+            connection.execute(
+                "INSERT INTO sessions (id, data, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET data = excluded.data, expires = excluded.expires",
+                (sid, data, now + self.ttl),
+            )
+            if self._writes % self.PURGE_INTERVAL == 0:
+                connection.execute("DELETE FROM sessions WHERE expires <= ?", (now,))
+
+    def delete(self, sid):
+        self._connection().execute("DELETE FROM sessions WHERE id = ?", (sid,))
+
+    def __len__(self):
+        return (
+            self._connection()
+            .execute("SELECT COUNT(*) FROM sessions WHERE expires > ?", (self.clock(),))
+            .fetchone()[0]
+        )
+
+
+class ServerSession(SecureCookieSession):
+    def __init__(self, initial=None, sid=None, refresh=False):
+        super().__init__(initial)
+        self.sid = sid
+        # Set when the stored entry is past half its lifetime and should be written back to extend it
+        self.refresh = refresh
+
+
+# Keeps session data in a store and only an opaque random id in the cookie, so the cookie stays the
+# same size however many roadmaps a user owns and there is nothing to sign or verify per request
+class ServerSideSessionInterface(SessionInterface):
+    serializer = session_json_serializer
+    session_class = ServerSession
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            entry = self.store.load(sid)
+            if entry is not None:
+                data, expires = entry
+                refresh = expires - self.store.clock() < self.store.ttl / 2
+                return self.session_class(self.serializer.loads(data), sid, refresh)
+        return self.session_class()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        partitioned = self.get_cookie_partitioned(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            if session.modified and session.sid:
+                self.store.delete(session.sid)
+                response.delete_cookie(
+                    name,
+                    domain=domain,
+                    path=path,
+                    secure=secure,
+                    partitioned=partitioned,
+                    samesite=samesite,
+                    httponly=httponly,
+                )
+                response.vary.add("Cookie")
+            return
+
+        new = session.sid is None
+        if new:
+            session.sid = secrets.token_urlsafe(32)
+        if new or session.modified or session.refresh:
+            self.store.save(session.sid, self.serializer.dumps(dict(session)))
+
+        # The id never changes, so the cookie only needs sending again to extend a permanent session
+        if not new and not (session.permanent and app.config["SESSION_REFRESH_EACH_REQUEST"]):
+            return
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=httponly,
+            domain=domain,
+            path=path,
+            secure=secure,
+            partitioned=partitioned,
+            samesite=samesite,
+        )
+        response.vary.add("Cookie")
+
+
+def create_session_store(backend, ttl, path=None, max_entries=0):
+    if backend == "memory":
+        return MemorySessionStore(ttl, max_entries)
+    if backend == "sqlite":
+        return SQLiteSessionStore(path, ttl)
+    raise ValueError(f"Unknown session backend: {backend}")
+
+
+def init_app(app):
+    backend = app.config["SESSION_BACKEND"]
+    if backend != "cookie":
+        store = create_session_store(
+            backend, app.config["SESSION_TTL"], app.config["SESSION_DB_PATH"], app.config["SESSION_MAX_ENTRIES"]
+        )
+        app.session_interface = ServerSideSessionInterface(store)
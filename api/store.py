@@ -0,0 +1,918 @@
+import copy
+import datetime
+import gc
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from api.compact import PATH_NAMES, CompactRoadmap, compact_roadmap
+from api.index import RoadmapIndex, roadmap_status
+from api.journal import PUT, UPDATE, RoadmapLog, encode_snapshot, read_snapshot, write_snapshot
+from api.roadmaps import MAX_MILESTONES
+
+
+def serialize_json(roadmap):
+    return json.dumps(roadmap).encode()
+
+
+class RoadmapStore:
+    # Backends implement get/put/update_milestones/list_ids/__len__; the rest falls back to those
+
+    def __init__(self, serialize=None):
+        self.serialize = serialize or serialize_json
+
+    def get(self, roadmap_id):
+        raise NotImplementedError
+
+    def get_many(self, roadmap_ids):
+        roadmaps = {}
+        for roadmap_id in roadmap_ids:
+            roadmap = self.get(roadmap_id)
+            if roadmap is not None:
+                roadmaps[roadmap_id] = roadmap
+        return roadmaps
+
+    # (version, response body) for a roadmap, backends may cache the body between writes
+    def get_serialized(self, roadmap_id):
+        roadmap = self.get(roadmap_id)
+        if roadmap is None:
+            return None
+        return roadmap["version"], self.serialize(roadmap)
+
+    def get_many_serialized(self, roadmap_ids):
+        return {
+            roadmap_id: (roadmap["version"], self.serialize(roadmap))
+            for roadmap_id, roadmap in self.get_many(roadmap_ids).items()
+        }
+
+    def put(self, roadmap):
+        raise NotImplementedError
+
+    def put_many(self, roadmaps):
+        for roadmap in roadmaps:
+            self.put(roadmap)
+
+    def update_milestone(self, roadmap_id, milestone_index, completed):
+        return self.update_milestones(roadmap_id, {milestone_index: completed})
+
+    # Applies {milestone index: completed} changes all together or not at all. Raises KeyError for an
+    # unknown roadmap and IndexError for an invalid milestone index, returns the updated roadmap.
+    def update_milestones(self, roadmap_id, changes):
+        raise NotImplementedError
+
+    # Returns up to limit roadmap ids in (created_at, id) order, optionally filtered by interest, status
+    # (see api.index.STATUSES) and an inclusive created_at range, starting after the (created_at, id)
+    # key after. The second value is the key to continue from, or None on the last page.
+    def list_ids(self, interest=None, status=None, created_from=None, created_to=None, after=None, limit=20):
+        raise NotImplementedError
+
+    # Cache counters for backends that keep one, see MemoryStore.stats
+    def stats(self):
+        return {}
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def __contains__(self, roadmap_id):
+        return self.get(roadmap_id) is not None
+
+    def __getitem__(self, roadmap_id):
+        roadmap = self.get(roadmap_id)
+        if roadmap is None:
+            raise KeyError(roadmap_id)
+        return roadmap
+
+
+# Rough heap footprint of a stored record, used to enforce the store's byte cap
+def record_size(record):
+    if isinstance(record, CompactRoadmap):
+        return record.approximate_size()
+
+    size = sys.getsizeof(record)
+    if isinstance(record, dict):
+        size += sum(record_size(key) + record_size(value) for key, value in record.items())
+    elif isinstance(record, (list, tuple)):
+        size += sum(record_size(item) for item in record)
+    return size
+
+
+# Bookkeeping a roadmap costs beside its record: its slots in the shard's dicts and the index's entry, key and
+# interests tuples, about 320 B on 64-bit CPython once table growth is spread over the entries
+ENTRY_OVERHEAD = 320
+# The (version, body) tuple and slot holding a cached body
+BODY_OVERHEAD = 120
+
+
+# Heap footprint of a stored roadmap outside its record: the bookkeeping above, its id and created_at strings
+# and a pointer in each index list it is on
+def entry_size(roadmap_id, created_at, interests):
+    lists = 2 * (len(set(interests)) + 1)
+    return ENTRY_OVERHEAD + sys.getsizeof(roadmap_id) + sys.getsizeof(created_at) + 8 * lists
+
+
+def body_size(body):
+    return BODY_OVERHEAD + sys.getsizeof(body)
+
+
+# Unix time at which a date has fully passed
+def date_deadline(date):
+    end = date + datetime.timedelta(days=1)
+    return datetime.datetime.combine(end, datetime.time(), tzinfo=datetime.timezone.utc).timestamp()
+
+
+# Unix time at which a roadmap's end_date has fully passed, or None when it has none
+def end_date_deadline(roadmap):
+    try:
+        return date_deadline(datetime.date.fromisoformat(roadmap["end_date"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class MemoryShard:
+    __slots__ = (
+        "lock",
+        "index",
+        "roadmaps",
+        "sizes",
+        "bytes",
+        "accessed",
+        "deadlines",
+        "bodies",
+        "body_cache_size",
+        "max_entries",
+        "max_bytes",
+        "idle_ttl",
+        "hits",
+        "misses",
+        "evictions",
+        "expirations",
+    )
+
+    def __init__(self, index, body_cache_size, max_entries=0, max_bytes=0, idle_ttl=0):
+        self.lock = threading.Lock()
+        self.index = index
+        # CompactRoadmap records, or plain dicts for roadmaps that can't be compacted, least recently used first
+        self.roadmaps = OrderedDict()
+        self.sizes = {}
+        self.bytes = 0
+        # Last access times, only kept when idle_ttl is set, and end_date deadlines for roadmaps that expire
+        self.accessed = {}
+        self.deadlines = {}
+        # Most recently used (version, body) pairs, built when a roadmap is written and dropped when it changes
+        self.bodies = OrderedDict()
+        self.body_cache_size = body_cache_size
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    # Callers hold the lock for every method below
+
+    # Cached bodies count towards max_bytes and are dropped, least recently used first, before any roadmap is
+    # evicted to stay under it
+    def cache_body(self, roadmap_id, version, body):
+        if self.body_cache_size > 0:
+            self.drop_body(roadmap_id)
+            self.bodies[roadmap_id] = (version, body)
+            self.bytes += body_size(body)
+            while self.bodies and (len(self.bodies) > self.body_cache_size or self.over_max_bytes()):
+                self.drop_body(next(iter(self.bodies)))
+
+    def drop_body(self, roadmap_id):
+        cached = self.bodies.pop(roadmap_id, None)
+        if cached is not None:
+            self.bytes -= body_size(cached[1])
+
+    def over_max_bytes(self):
+        return self.max_bytes and self.bytes > self.max_bytes
+
+    def expired(self, roadmap_id, now):
+        if self.idle_ttl and self.accessed[roadmap_id] + self.idle_ttl <= now:
+            return True
+        deadline = self.deadlines.get(roadmap_id)
+        return deadline is not None and deadline <= now
+
+    # Returns the live record and marks it most recently used, or None after counting a miss
+    def lookup(self, roadmap_id, now):
+        record = self.roadmaps.get(roadmap_id)
+        if record is not None and self.expired(roadmap_id, now):
+            self.remove(roadmap_id)
+            self.expirations += 1
+            record = None
+        if record is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.roadmaps.move_to_end(roadmap_id)
+        if self.idle_ttl:
+            self.accessed[roadmap_id] = now
+        return record
+
+    # indexed is None when the caller adds the roadmap to the index itself
+    def insert(self, roadmap_id, record, size, deadline, now, indexed):
+        if roadmap_id in self.roadmaps:
+            self.remove(roadmap_id)
+        self.roadmaps[roadmap_id] = record
+        if indexed is not None:
+            self.index.add(roadmap_id, *indexed)
+        self.sizes[roadmap_id] = size
+        self.bytes += size
+        if self.idle_ttl:
+            self.accessed[roadmap_id] = now
+        if deadline is not None:
+            self.deadlines[roadmap_id] = deadline
+
+        while self.bodies and self.over_max_bytes():
+            self.drop_body(next(iter(self.bodies)))
+
+        # The least recently used roadmap is always first, so each eviction is a single popitem. With an
+        # idle TTL, access order is also expiry order, so expired roadmaps are dropped before live ones.
+        while len(self.roadmaps) > 1:
+            oldest = next(iter(self.roadmaps))
+            if self.idle_ttl and self.expired(oldest, now):
+                self.expirations += 1
+            elif (self.max_entries and len(self.roadmaps) > self.max_entries) or self.over_max_bytes():
+                self.evictions += 1
+            else:
+                break
+            self.remove(oldest)
+
+    def remove(self, roadmap_id):
+        del self.roadmaps[roadmap_id]
+        self.index.remove(roadmap_id)
+        self.bytes -= self.sizes.pop(roadmap_id)
+        self.accessed.pop(roadmap_id, None)
+        self.deadlines.pop(roadmap_id, None)
+        self.drop_body(roadmap_id)
+
+    def version(self, roadmap_id):
+        record = self.roadmaps.get(roadmap_id)
+        if isinstance(record, CompactRoadmap):
+            return record.version
+        return record and record["version"]
+
+    def snapshot(self, roadmap_id, record):
+        if isinstance(record, CompactRoadmap):
+            return record.expand(roadmap_id)
+        return copy.deepcopy(record)
+
+
+# Roadmaps are spread over lock-striped shards so threads working on different roadmaps rarely
+# contend, while every read-modify-write of one roadmap happens under its shard's lock.
+#
+# Capacity limits (max_entries, max_bytes) and the idle TTL are split evenly between shards and
+# enforced by evicting the least recently used roadmaps of the shard being written. With
+# expire_after_end_date a roadmap is dropped once its end_date has passed.
+class MemoryStore(RoadmapStore):
+    def __init__(
+        self,
+        serialize=None,
+        compact=True,
+        body_cache_size=10000,
+        shards=16,
+        max_entries=0,
+        max_bytes=0,
+        idle_ttl=0,
+        expire_after_end_date=False,
+        clock=time.time,
+    ):
+        super().__init__(serialize)
+        self.compact = compact
+        self.expire_after_end_date = expire_after_end_date
+        self.clock = clock
+        self.index = RoadmapIndex()
+        # Called as journal(operation, args) under the shard lock after every write that changed a roadmap,
+        # so writes to one roadmap are journaled in the order they were applied, see DurableStore
+        self.journal = None
+        self._shards = tuple(
+            MemoryShard(
+                self.index,
+                -(-body_cache_size // shards),
+                max_entries=-(-max_entries // shards),
+                max_bytes=-(-max_bytes // shards),
+                idle_ttl=idle_ttl,
+            )
+            for _ in range(shards)
+        )
+
+    def _shard(self, roadmap_id):
+        return self._shards[hash(roadmap_id) % len(self._shards)]
+
+    def get(self, roadmap_id):
+        shard = self._shard(roadmap_id)
+        with shard.lock:
+            record = shard.lookup(roadmap_id, self.clock())
+            return None if record is None else shard.snapshot(roadmap_id, record)
+
+    def get_serialized(self, roadmap_id):
+        shard = self._shard(roadmap_id)
+        with shard.lock:
+            record = shard.lookup(roadmap_id, self.clock())
+            if record is None:
+                return None
+
+            version = shard.version(roadmap_id)
+            cached = shard.bodies.get(roadmap_id)
+            if cached is not None and cached[0] == version:
+                shard.bodies.move_to_end(roadmap_id)
+                return cached
+            roadmap = shard.snapshot(roadmap_id, record)
+
+        # Serialize outside the lock and only cache the body if nobody changed the roadmap meanwhile
+        body = self.serialize(roadmap)
+        with shard.lock:
+            if shard.version(roadmap_id) == version:
+                shard.cache_body(roadmap_id, version, body)
+        return version, body
+
+    def get_many_serialized(self, roadmap_ids):
+        entries = {}
+        for roadmap_id in roadmap_ids:
+            entry = self.get_serialized(roadmap_id)
+            if entry is not None:
+                entries[roadmap_id] = entry
+        return entries
+
+    # With keep_newer a version older than the one already stored is ignored, for caches filled from reads that
+    # may race with a write of the same roadmap
+    def put(self, roadmap, keep_newer=False):
+        record = compact_roadmap(roadmap) if self.compact else None
+        if record is None:
+            record = roadmap = copy.deepcopy(roadmap)
+        body = self.serialize(roadmap)
+        deadline = end_date_deadline(roadmap) if self.expire_after_end_date else None
+        indexed = (
+            roadmap.get("created_at", ""),
+            roadmap.get("interests", ()),
+            roadmap_status(roadmap["completed_count"], len(roadmap["roadmap"])),
+        )
+        size = record_size(record) + entry_size(roadmap["id"], *indexed[:2])
+
+        shard = self._shard(roadmap["id"])
+        with shard.lock:
+            if keep_newer and (shard.version(roadmap["id"]) or 0) > roadmap["version"]:
+                return
+            shard.insert(roadmap["id"], record, size, deadline, self.clock(), indexed)
+            if roadmap["id"] in shard.roadmaps:
+                shard.cache_body(roadmap["id"], roadmap["version"], body)
+            if self.journal is not None:
+                self.journal(PUT, roadmap)
+
+    # Inserts (roadmap id, record) pairs read back from a snapshot as they are, without the checks and
+    # serialization put() does, and indexes them all at once
+    def restore(self, records):
+        now = self.clock()
+        created_at, interests, indexed = {}, {}, []
+        for roadmap_id, record in records:
+            if not isinstance(record, CompactRoadmap):
+                self.put(record)
+                continue
+
+            deadline = None
+            if self.expire_after_end_date:
+                end = datetime.date.fromordinal(record.created) + datetime.timedelta(days=record.timeframe * 30)
+                deadline = date_deadline(end)
+            schedule = record.schedule
+            if record.created not in created_at:
+                created_at[record.created] = datetime.date.fromordinal(record.created).isoformat()
+            if schedule.interests not in interests:
+                interests[schedule.interests] = [PATH_NAMES[path_id] for path_id in schedule.interests]
+            status = roadmap_status(record.completed_count, len(schedule))
+            indexed.append((roadmap_id, created_at[record.created], interests[schedule.interests], status))
+
+            size = record_size(record) + entry_size(roadmap_id, *indexed[-1][1:3])
+            shard = self._shard(roadmap_id)
+            with shard.lock:
+                shard.insert(roadmap_id, record, size, deadline, now, None)
+
+        # Roadmaps evicted again by the capacity limits while restoring are left out
+        self.index.add_many(entry for entry in indexed if entry[0] in self._shard(entry[0]).roadmaps)
+
+    # (roadmap id, record) copies of every record for a snapshot, least recently used first within each shard,
+    # and the result of marker(). All shards are locked while the completion state is read and marker() runs,
+    # so the copies and the marker agree on which writes have happened. The rest is copied after unlocking.
+    def copy_records(self, marker=lambda: None):
+        # The completion state goes into flat lists, unlike a tuple per record they give the garbage collector
+        # nothing to do while every shard is locked
+        ids, records, completed, counts, versions = [], [], [], [], []
+        for shard in self._shards:
+            shard.lock.acquire()
+        try:
+            mark = marker()
+            for shard in self._shards:
+                for roadmap_id, record in shard.roadmaps.items():
+                    ids.append(roadmap_id)
+                    if isinstance(record, CompactRoadmap):
+                        records.append(record)
+                        completed.append(record.completed)
+                        counts.append(record.completed_count)
+                        versions.append(record.version)
+                    else:
+                        records.append(copy.deepcopy(record))
+                        completed.append(None)
+                        counts.append(None)
+                        versions.append(None)
+        finally:
+            for shard in self._shards:
+                shard.lock.release()
+
+        return mark, [
+            (ids[i], record if completed[i] is None else record.with_completion(completed[i], counts[i], versions[i]))
+            for i, record in enumerate(records)
+        ]
+
+    def update_milestones(self, roadmap_id, changes):
+        shard = self._shard(roadmap_id)
+        with shard.lock:
+            record = shard.lookup(roadmap_id, self.clock())
+            if record is None:
+                raise KeyError(roadmap_id)
+
+            compact = isinstance(record, CompactRoadmap)
+            milestones_count = len(record) if compact else len(record["roadmap"])
+            for milestone_index in changes:
+                if not 0 <= milestone_index < milestones_count:
+                    raise IndexError(milestone_index)
+
+            changed = False
+            for milestone_index, completed in changes.items():
+                if compact:
+                    changed = record.set_completed(milestone_index, completed) or changed
+                    continue
+                milestone = record["roadmap"][milestone_index]
+                if milestone["completed"] != completed:
+                    milestone["completed"] = completed
+                    record["completed_count"] += 1 if completed else -1
+                    record["version"] += 1
+                    changed = True
+
+            roadmap = record.expand(roadmap_id) if compact else copy.deepcopy(record)
+            if changed:
+                shard.drop_body(roadmap_id)
+                self.index.set_status(roadmap_id, roadmap_status(roadmap["completed_count"], milestones_count))
+                if self.journal is not None:
+                    self.journal(UPDATE, [roadmap_id, list(changes.items())])
+            return roadmap
+
+    def list_ids(self, interest=None, status=None, created_from=None, created_to=None, after=None, limit=20):
+        return self.index.page(interest, status, created_from, created_to, after, limit)
+
+    def discard(self, roadmap_id):
+        shard = self._shard(roadmap_id)
+        with shard.lock:
+            if roadmap_id in shard.roadmaps:
+                shard.remove(roadmap_id)
+
+    def stats(self):
+        totals = dict.fromkeys(("entries", "bytes", "hits", "misses", "evictions", "expirations"), 0)
+        for shard in self._shards:
+            with shard.lock:
+                totals["entries"] += len(shard.roadmaps)
+                totals["bytes"] += shard.bytes
+                totals["hits"] += shard.hits
+                totals["misses"] += shard.misses
+                totals["evictions"] += shard.evictions
+                totals["expirations"] += shard.expirations
+        return totals
+
+    def __len__(self):
+        return sum(len(shard.roadmaps) for shard in self._shards)
+
+    def __contains__(self, roadmap_id):
+        shard = self._shard(roadmap_id)
+        with shard.lock:
+            return roadmap_id in shard.roadmaps and not shard.expired(roadmap_id, self.clock())
+
+
+# Keeps a bounded MemoryStore in front of a persistent backend. Writes go to the backend first and
+# then refresh the cache, reads fall through to the backend on a miss, so eviction never loses data.
+# Filling the cache after a read or an update keeps the newest version it has seen, so a read that raced
+# with an update can't put back the version from before it.
+class CachedStore(RoadmapStore):
+    def __init__(self, backend, cache):
+        super().__init__(backend.serialize)
+        self.backend = backend
+        self.cache = cache
+
+    def get(self, roadmap_id):
+        roadmap = self.cache.get(roadmap_id)
+        if roadmap is None:
+            roadmap = self.backend.get(roadmap_id)
+            if roadmap is not None:
+                self.cache.put(roadmap, keep_newer=True)
+        return roadmap
+
+    def get_serialized(self, roadmap_id):
+        entry = self.cache.get_serialized(roadmap_id)
+        if entry is None:
+            roadmap = self.backend.get(roadmap_id)
+            if roadmap is None:
+                return None
+            self.cache.put(roadmap, keep_newer=True)
+            entry = self.cache.get_serialized(roadmap_id) or (roadmap["version"], self.serialize(roadmap))
+        return entry
+
+    def get_many_serialized(self, roadmap_ids):
+        roadmap_ids = list(roadmap_ids)
+        entries = self.cache.get_many_serialized(roadmap_ids)
+        missing = [roadmap_id for roadmap_id in roadmap_ids if roadmap_id not in entries]
+        if missing:
+            for roadmap_id, roadmap in self.backend.get_many(missing).items():
+                self.cache.put(roadmap, keep_newer=True)
+                entries[roadmap_id] = self.cache.get_serialized(roadmap_id) or (
+                    roadmap["version"],
+                    self.serialize(roadmap),
+                )
+        return entries
+
+    def put(self, roadmap):
+        self.backend.put(roadmap)
+        self.cache.put(roadmap)
+
+    def put_many(self, roadmaps):
+        roadmaps = list(roadmaps)
+        self.backend.put_many(roadmaps)
+        self.cache.put_many(roadmaps)
+
+    def update_milestones(self, roadmap_id, changes):
+        try:
+            roadmap = self.backend.update_milestones(roadmap_id, changes)
+        except KeyError:
+            self.cache.discard(roadmap_id)
+            raise
+        self.cache.put(roadmap, keep_newer=True)
+        return roadmap
+
+    def list_ids(self, *args, **kwargs):
+        return self.backend.list_ids(*args, **kwargs)
+
+    def stats(self):
+        return self.cache.stats()
+
+    def __len__(self):
+        return len(self.backend)
+
+    def __contains__(self, roadmap_id):
+        return roadmap_id in self.cache or roadmap_id in self.backend
+
+
+# Keeps a MemoryStore across process restarts. Every write is appended to a log at <path>.log before it returns.
+# Once the log passes snapshot_log_bytes, or snapshot_interval seconds after the last snapshot, a background
+# thread writes the store to a binary snapshot at path and cuts the log down to the writes the snapshot doesn't
+# include. Opening the store restores the snapshot and replays the log on top of it.
+class DurableStore(RoadmapStore):
+    def __init__(
+        self,
+        memory,
+        path,
+        fsync="interval",
+        fsync_interval=1.0,
+        snapshot_log_bytes=16 * 1024 * 1024,
+        snapshot_interval=0,
+        clock=time.monotonic,
+    ):
+        super().__init__(memory.serialize)
+        self.memory = memory
+        self.path = path
+        self.snapshot_log_bytes = snapshot_log_bytes
+        self.snapshot_interval = snapshot_interval
+        self.clock = clock
+        self.log = RoadmapLog(f"{path}.log", fsync, fsync_interval, clock)
+        # Guards the log and the sequence number. Writes are applied under their shard's lock as usual and only
+        # take this one to append, so writes to different shards don't wait for each other.
+        self._lock = threading.Lock()
+        self._snapshotting = False
+        self.snapshot_thread = None
+        self.restore()
+        memory.journal = self._journal
+
+    def restore(self):
+        # Everything restored stays alive, so collecting garbage while it is being created is wasted work
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            self.sequence, records = read_snapshot(self.path)
+            self.memory.restore(records)
+            # A crash between writing a snapshot and compacting the log leaves entries the snapshot already has
+            for sequence, operation, args in self.log.open():
+                if sequence > self.sequence:
+                    self._apply(operation, args)
+                    self.sequence = sequence
+        finally:
+            if collecting:
+                gc.enable()
+        self.snapshot_at = self.clock()
+
+    def _apply(self, operation, args):
+        if operation == PUT:
+            self.memory.put(args)
+        elif operation == UPDATE:
+            roadmap_id, changes = args
+            # The roadmap may have been evicted or expired since, as it would have been without the restart
+            try:
+                self.memory.update_milestones(roadmap_id, dict(changes))
+            except (KeyError, IndexError):
+                pass
+
+    # Called by the memory store under the written roadmap's shard lock
+    def _journal(self, operation, args):
+        with self._lock:
+            self.sequence += 1
+            self.log.append([(self.sequence, operation, args)])
+
+    # Syncs the log as the fsync policy asks once a write is applied, and starts a snapshot when one is due
+    def _commit(self):
+        with self._lock:
+            self.log.commit()
+        if self.log.size > self.snapshot_log_bytes or (
+            self.snapshot_interval and self.log.size and self.clock() - self.snapshot_at >= self.snapshot_interval
+        ):
+            self.snapshot_in_background()
+
+    def snapshot_in_background(self):
+        with self._lock:
+            if self._snapshotting:
+                return
+            self._snapshotting = True
+        self.snapshot_thread = threading.Thread(target=self._snapshot, name="roadmap-snapshot", daemon=True)
+        self.snapshot_thread.start()
+
+    # Writes a snapshot and compacts the log, returns False when another thread is already doing so
+    def snapshot(self):
+        with self._lock:
+            if self._snapshotting:
+                return False
+            self._snapshotting = True
+        self._snapshot()
+        return True
+
+    def _snapshot(self):
+        try:
+            (sequence, offset), records = self.memory.copy_records(self._log_position)
+            write_snapshot(self.path, encode_snapshot(sequence, records))
+            with self._lock:
+                self.log.compact(offset)
+                self.snapshot_at = self.clock()
+        finally:
+            self._snapshotting = False
+
+    def _log_position(self):
+        with self._lock:
+            return self.sequence, self.log.size
+
+    def get(self, roadmap_id):
+        return self.memory.get(roadmap_id)
+
+    def get_serialized(self, roadmap_id):
+        return self.memory.get_serialized(roadmap_id)
+
+    def get_many_serialized(self, roadmap_ids):
+        return self.memory.get_many_serialized(roadmap_ids)
+
+    def put(self, roadmap):
+        self.memory.put(roadmap)
+        self._commit()
+
+    def put_many(self, roadmaps):
+        self.memory.put_many(roadmaps)
+        self._commit()
+
+    def update_milestones(self, roadmap_id, changes):
+        roadmap = self.memory.update_milestones(roadmap_id, changes)
+        self._commit()
+        return roadmap
+
+    def list_ids(self, *args, **kwargs):
+        return self.memory.list_ids(*args, **kwargs)
+
+    def stats(self):
+        return self.memory.stats()
+
+    def __len__(self):
+        return len(self.memory)
+
+    def __contains__(self, roadmap_id):
+        return roadmap_id in self.memory
+
+    def close(self):
+        if self.snapshot_thread is not None:
+            self.snapshot_thread.join()
+        with self._lock:
+            self.log.close()
+
+
+ROADMAP_STATUS_SQL = (
+    "CASE WHEN json_extract(data, '$.completed_count') = 0 THEN 'not_started' "
+    "WHEN json_extract(data, '$.completed_count') = json_array_length(data, '$.roadmap') THEN 'completed' "
+    "ELSE 'in_progress' END"
+)
+
+# One row per roadmap under the empty interest, for unfiltered listings, and one per distinct interest
+INDEX_ROWS_SQL = (
+    "INSERT OR IGNORE INTO roadmap_index (interest, status, created_at, id) "
+    f"SELECT '', {ROADMAP_STATUS_SQL}, COALESCE(json_extract(data, '$.created_at'), ''), id "
+    "FROM roadmaps WHERE {where} "
+    f"UNION SELECT interests.value, {ROADMAP_STATUS_SQL}, COALESCE(json_extract(data, '$.created_at'), ''), roadmaps.id "
+    "FROM roadmaps, json_each(roadmaps.data, '$.interests') AS interests WHERE {where}"
+)
+
+
+@contextmanager
+def transaction(connection, mode=""):
+    connection.execute(f"BEGIN {mode}")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+# Autocommit connection in WAL mode, shared by everything that keeps state in SQLite
+def connect(path):
+    connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA busy_timeout=5000")
+    return connection
+
+
+class SQLiteStore(RoadmapStore):
+    def __init__(self, path, serialize=None):
+        super().__init__(serialize)
+        self.path = path
+        self._local = threading.local()
+
+    # One connection per thread, opened on first use and reused for every later call
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = connect(self.path)
+            with transaction(connection, "IMMEDIATE"):
+                self._create_schema(connection)
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _create_schema(connection):
+        connection.execute("CREATE TABLE IF NOT EXISTS roadmaps (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        exists = connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'roadmap_index'")
+        if exists.fetchone():
+            return
+
+        # Secondary index for listings, back-filled from roadmaps written before it existed
+        connection.execute(
+            "CREATE TABLE roadmap_index (interest TEXT NOT NULL, status TEXT NOT NULL, created_at TEXT NOT NULL, "
+            "id TEXT NOT NULL, PRIMARY KEY (interest, created_at, id)) WITHOUT ROWID"
+        )
+        connection.execute("CREATE INDEX roadmap_index_status ON roadmap_index (interest, status, created_at, id)")
+        connection.execute("CREATE INDEX roadmap_index_id ON roadmap_index (id)")
+        connection.execute(INDEX_ROWS_SQL.format(where="1"))
+
+    def get(self, roadmap_id):
+        row = self._connection().execute("SELECT data FROM roadmaps WHERE id = ?", (roadmap_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, roadmap_ids):
+        roadmap_ids = list(roadmap_ids)
+        placeholders = ",".join("?" * len(roadmap_ids))
+        rows = self._connection().execute(
+            f"SELECT id, data FROM roadmaps WHERE id IN ({placeholders})", roadmap_ids  # nosec B608
+        )
+        return {roadmap_id: json.loads(data) for roadmap_id, data in rows}
+
+    def put(self, roadmap):
+        self.put_many([roadmap])
+
+    def put_many(self, roadmaps):
+        rows = [(roadmap["id"], json.dumps(roadmap)) for roadmap in roadmaps]
+        ids = [(roadmap_id,) for roadmap_id, _ in rows]
+        with transaction(self._connection()) as connection:
+            connection.executemany("INSERT OR REPLACE INTO roadmaps (id, data) VALUES (?, ?)", rows)
+            connection.executemany("DELETE FROM roadmap_index WHERE id = ?", ids)
+            connection.executemany(INDEX_ROWS_SQL.format(where="roadmaps.id = ?1"), ids)
+
+    def update_milestones(self, roadmap_id, changes):
+        if not changes:
+            roadmap = self.get(roadmap_id)
+            if roadmap is None:
+                raise KeyError(roadmap_id)
+            return roadmap
+        for milestone_index in changes:
+            if not 0 <= milestone_index < MAX_MILESTONES:
+                raise IndexError(milestone_index)
+
+        # The upper bounds check, the flags, the completed count and the version are all updated in one
+        # statement, the listing status follows in the same transaction. Every json_extract in json_set
+        # reads the row as it was before the update.
+        params = {"id": roadmap_id, "max_index": max(changes)}
+        flags, completed_delta, version_delta = [], [], []
+        for n, (milestone_index, completed) in enumerate(changes.items()):
+            params.update({f"path{n}": f"$.roadmap[{milestone_index:d}].completed", f"completed{n}": int(completed)})
+            flags.append(f":path{n}, json(CASE :completed{n} WHEN 1 THEN 'true' ELSE 'false' END)")
+            completed_delta.append(f" + :completed{n} - json_extract(data, :path{n})")
+            version_delta.append(f" + (:completed{n} != json_extract(data, :path{n}))")
+
+        with transaction(self._connection(), "IMMEDIATE") as connection:
+            rows = connection.execute(
+                f"UPDATE roadmaps SET data = json_set(data, {', '.join(flags)}, "  # nosec B608
+                f"'$.completed_count', json_extract(data, '$.completed_count'){''.join(completed_delta)}, "
+                f"'$.version', json_extract(data, '$.version'){''.join(version_delta)}) "
+                "WHERE id = :id AND :max_index < json_array_length(data, '$.roadmap') RETURNING data",
+                params,
+            ).fetchall()
+            if rows:
+                roadmap = json.loads(rows[0][0])
+                status = roadmap_status(roadmap["completed_count"], len(roadmap["roadmap"]))
+                connection.execute("UPDATE roadmap_index SET status = ? WHERE id = ?", (status, roadmap_id))
+
+        if not rows:
+            if roadmap_id not in self:
+                raise KeyError(roadmap_id)
+            raise IndexError(max(changes))
+        return roadmap
+
+    def list_ids(self, interest=None, status=None, created_from=None, created_to=None, after=None, limit=20):
+        conditions = ["interest = :interest"]
+        if status is not None:
+            conditions.append("status = :status")
+        if created_from is not None:
+            conditions.append("created_at >= :created_from")
+        if created_to is not None:
+            conditions.append("created_at <= :created_to")
+        if after is not None:
+            conditions.append("(created_at, id) > (:after_created_at, :after_id)")
+
+        rows = (
+            self._connection()
+            .execute(
+                f"SELECT created_at, id FROM roadmap_index WHERE {' AND '.join(conditions)} "  # nosec B608
+                "ORDER BY created_at, id LIMIT :limit",
+                {
+                    "interest": interest or "",
+                    "status": status,
+                    "created_from": created_from,
+                    "created_to": created_to,
+                    "after_created_at": after and after[0],
+                    "after_id": after and after[1],
+                    "limit": limit + 1,
+                },
+            )
+            .fetchall()
+        )
+        next_key = tuple(rows[limit - 1]) if len(rows) > limit else None
+        return [roadmap_id for _, roadmap_id in rows[:limit]], next_key
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM roadmaps").fetchone()[0]
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+# memory_options (body_cache_size, shards, max_entries, max_bytes, idle_ttl, expire_after_end_date) configure
+# the memory store, or the cache kept in front of SQLite when cache is set. durability ({"path": ..., "fsync": ...},
+# see DurableStore) keeps the memory store in a snapshot and log.
+def create_store(backend, path=None, serialize=None, cache=False, durability=None, **memory_options):
+    if backend == "memory":
+        store = MemoryStore(serialize, **memory_options)
+        if durability:
+            return DurableStore(store, **durability)
+        return store
+    if backend == "sqlite":
+        store = SQLiteStore(path, serialize)
+        if cache:
+            return CachedStore(store, MemoryStore(serialize, **memory_options))
+        return store
+    raise ValueError(f"Unknown roadmap store backend: {backend}")
+
+
+def store_from_config(config, serialize=None):
+    return create_store(
+        config["ROADMAP_STORE"],
+        config["ROADMAP_DB_PATH"],
+        serialize,
+        cache=config["ROADMAP_CACHE"],
+        body_cache_size=config["ROADMAP_BODY_CACHE_SIZE"],
+        shards=config["ROADMAP_STORE_SHARDS"],
+        max_entries=config["ROADMAP_MAX_ENTRIES"],
+        max_bytes=config["ROADMAP_MAX_BYTES"],
+        idle_ttl=config["ROADMAP_IDLE_TTL"],
+        expire_after_end_date=config["ROADMAP_EXPIRE_AFTER_END_DATE"],
+        durability=config["ROADMAP_SNAPSHOT_PATH"]
+        and {
+            "path": config["ROADMAP_SNAPSHOT_PATH"],
+            "fsync": config["ROADMAP_FSYNC"],
+            "fsync_interval": config["ROADMAP_FSYNC_INTERVAL"],
+            "snapshot_log_bytes": config["ROADMAP_SNAPSHOT_LOG_BYTES"],
+            "snapshot_interval": config["ROADMAP_SNAPSHOT_INTERVAL"],
+        },
+    )
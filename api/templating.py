@@ -0,0 +1,98 @@
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from jinja2 import FileSystemBytecodeCache
+
+# Bytecode compiled at build time by `python -m api.templating`, shipped read-only next to the templates
+PRECOMPILED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jinja-bytecode")
+
+
+# Stores compiled templates in a writable directory such as /tmp and falls back to the precompiled
+# directory. Jinja checks each entry against the template source and Python version, so stale or
+# foreign bytecode is recompiled rather than used.
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    def __init__(self, directory, precompiled_directory=None):
+        super().__init__(directory, "%s.cache")
+        self.precompiled_directory = precompiled_directory
+
+    # Keyed by template name only, so bytecode built elsewhere matches despite different absolute paths
+    def get_cache_key(self, name, filename=None):
+        return hashlib.sha1(name.encode(), usedforsecurity=False).hexdigest()
+
+    def load_bytecode(self, bucket):
+        try:
+            super().load_bytecode(bucket)
+        except OSError:
+            pass
+        if bucket.code is None and self.precompiled_directory:
+            try:
+                with open(os.path.join(self.precompiled_directory, self.pattern % bucket.key), "rb") as f:
+                    bucket.load_bytecode(f)
+            except OSError:
+                pass
+
+    # A missing or read-only cache directory only costs the next cold start a recompile
+    def dump_bytecode(self, bucket):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def init_bytecode_cache(app):
+    directory = app.config["JINJA_BYTECODE_CACHE_DIR"]
+    if directory:
+        # jinja_options only take effect before the environment is first used
+        app.jinja_options = {**app.jinja_options, "bytecode_cache": TemplateBytecodeCache(directory, PRECOMPILED_DIR)}
+
+
+# Rendered HTML keyed by whatever identifies its inputs, such as a roadmap's id and version
+class FragmentCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._fragments = OrderedDict()
+
+    def get_or_render(self, key, render):
+        if self.max_entries <= 0:
+            return render()
+
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self._fragments.move_to_end(key)
+                return fragment
+
+        fragment = render()
+        with self._lock:
+            self._fragments[key] = fragment
+            if len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def __len__(self):
+        return len(self._fragments)
+
+
+# Compiles every template into the precompiled directory, run at build time:
+#   python -m api.templating [directory]
+def precompile(app, directory=PRECOMPILED_DIR):
+    env = app.jinja_env
+    env.bytecode_cache = TemplateBytecodeCache(directory)
+    env.cache.clear()
+    names = [name for name in env.list_templates() if name.endswith(".html")]
+    for name in names:
+        env.get_template(name)
+    return names
+
+
+if __name__ == "__main__":
+    from api.app import app
+
+    target = sys.argv[1] if len(sys.argv) > 1 else PRECOMPILED_DIR
+    for template in precompile(app, target):
+        print(f"compiled {template}")
@@ -1,7 +1,10 @@
-import os
-from functools import wraps
+from flask import request
+from flask.json.provider import DefaultJSONProvider
 
-from flask import jsonify, request
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 # Development paths with associated resources, milestones and tips
 DEV_PATHS = {
@@ -152,12 +155,21 @@ QUOTES = [
 ]
 
 
-def require_api_key(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        api_key = request.headers.get("X-API-Key")
-        if not api_key or api_key != os.environ["API_KEY"]:
-            return jsonify({"error": "Invalid or missing API key"}), 401
-        return f(*args, **kwargs)
+class OrjsonProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_SORT_KEYS if kwargs.get("sort_keys", self.sort_keys) else 0
+        return orjson.dumps(obj, default=self.default, option=option).decode()
 
-    return decorated_function
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+# orjson is optional, the stdlib based provider is used when it is not installed
+JSONProvider = OrjsonProvider if orjson is not None else DefaultJSONProvider
+
+
+def cache_publicly(response, max_age):
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.add_etag()
+    return response.make_conditional(request)
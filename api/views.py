@@ -1,31 +1,146 @@
+import json
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from flask import (
+    Blueprint,
+    copy_current_request_context,
+    current_app,
+    flash,
+    redirect,
+    render_template,
+    request,
+    session,
+    url_for,
+)
+from markupsafe import Markup
+
+from api.metrics import phase
+from api.ratelimit import UI_CLIENT
 
-import requests
-from flask import Blueprint, flash, redirect, render_template, request, session, url_for
-
-API_KEY = os.environ["API_KEY"]
 bp = Blueprint("views", __name__, template_folder="templates")
 
 
-def api_request(method, endpoint, data=None):
-    headers = {"X-API-Key": API_KEY, "Content-Type": "application/json"}
+class InternalResponse:
+    # Mirrors the parts of requests.Response the views rely on
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = response.get_data()
+        response.close()
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def dispatch_internal(method, endpoint, headers, data=None):
+    app = current_app._get_current_object()
+    environ = {"REMOTE_ADDR": request.remote_addr, UI_CLIENT: request.remote_addr or ""}
+
+    # A fresh app context keeps the inner request's g separate from the page's
+    with (
+        app.app_context(),
+        app.test_request_context(f"/{endpoint}", method=method, headers=headers, json=data, environ_base=environ),
+    ):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            response = app.handle_exception(e)
+        return InternalResponse(response)
+
+
+def api_request(method, endpoint, data=None, headers=None):
+    headers = {"X-API-Key": os.environ.get("API_KEY", ""), "Content-Type": "application/json", **(headers or {})}
+    method = method.lower()
+
+    if method not in ("get", "post", "put", "patch"):
+        raise ValueError(f"Unsupported method: {method}")
+
+    with phase("api"):
+        return send_api_request(method, endpoint, headers, data)
+
+
+def send_api_request(method, endpoint, headers, data):
+    if current_app.config["API_DISPATCH"] == "internal":
+        return dispatch_internal(method.upper(), endpoint, headers, data)
+
+    # requests is only needed for loopback dispatch, so it is kept off the cold start path
+    import requests
+
     url = f"{request.url_root}{endpoint}"
 
-    if method.lower() == "get":
+    if method == "get":
         response = requests.get(url, headers=headers, timeout=5)
-    elif method.lower() == "post":
+    elif method == "post":
         response = requests.post(url, headers=headers, json=data, timeout=5)
-    elif method.lower() == "put":
+    elif method == "put":
         response = requests.put(url, headers=headers, json=data, timeout=5)
     else:
-        raise ValueError(f"Unsupported method: {method}")
+        response = requests.patch(url, headers=headers, json=data, timeout=5)
 
     return response
 
 
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def api_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=current_app.config["API_FANOUT_WORKERS"], thread_name_prefix="api-fanout"
+                )
+    return _executor
+
+
+# Issues independent API calls and returns their responses in order, with None for calls that raised
+# or did not finish before the page deadline. Loopback HTTP calls overlap on a bounded thread pool.
+# In-process dispatch is CPU bound, so it runs inline where threads would only contend for the GIL.
+def api_requests(calls):
+    deadline = time.monotonic() + current_app.config["PAGE_DEADLINE"]
+    responses = [None] * len(calls)
+
+    if current_app.config["API_DISPATCH"] == "internal" or current_app.config["API_FANOUT_WORKERS"] < 1:
+        for i, (method, endpoint, data) in enumerate(calls):
+            if time.monotonic() >= deadline:
+                break
+            try:
+                responses[i] = api_request(method, endpoint, data)
+            except Exception:
+                # Log the error in a production app
+                continue
+        return responses
+
+    executor = api_executor()
+    # Each call gets its own copy of the request context, a copy can't be pushed by two threads at once
+    futures = [
+        executor.submit(copy_current_request_context(api_request), method, endpoint, data)
+        for method, endpoint, data in calls
+    ]
+    with phase("api"):
+        wait(futures, timeout=max(deadline - time.monotonic(), 0))
+
+    for i, future in enumerate(futures):
+        if future.done() and future.exception() is None:
+            responses[i] = future.result()
+        else:
+            future.cancel()
+    return responses
+
+
 @bp.route("/home", methods=["GET"])
 def home():
-    quote_response = requests.get(f"{request.url_root}quote", timeout=5)
+    quote_response = api_request("get", "quote")
     quote = quote_response.json() if quote_response.ok else {"text": "Loading failed", "author": "System"}
 
     return render_template("home.html", quote=quote)
@@ -33,25 +148,41 @@ def home():
 
 @bp.route("/dashboard", methods=["GET"])
 def dashboard():
-    quote_response = requests.get(f"{request.url_root}quote", timeout=5)
-    quote = quote_response.json() if quote_response.ok else {"text": "Loading failed", "author": "System"}
+    user_roadmaps = session.get("user_roadmaps", [])
+    limit = current_app.config["ROADMAP_BATCH_LIMIT"]
+    chunks = [user_roadmaps[start : start + limit] for start in range(0, len(user_roadmaps), limit)]
 
-    paths_response = requests.get(f"{request.url_root}paths", timeout=5)
-    paths = paths_response.json()["available_paths"] if paths_response.ok else []
+    quote_response, paths_response, *roadmap_responses = api_requests(
+        [("get", "quote", None), ("get", "paths", None)]
+        + [("get", f"roadmaps?ids={','.join(chunk)}", None) for chunk in chunks]
+    )
+
+    if quote_response is not None and quote_response.ok:
+        quote = quote_response.json()
+    else:
+        quote = {"text": "Loading failed", "author": "System"}
+    paths = paths_response.json()["available_paths"] if paths_response is not None and paths_response.ok else []
 
-    user_roadmaps = session.get("user_roadmaps", [])
     roadmaps_data = []
+    missing = set()
+    incomplete = False
+    for response in roadmap_responses:
+        if response is None or not response.ok:
+            incomplete = True
+            continue
+        for result in response.json()["results"]:
+            if "roadmap" in result:
+                roadmaps_data.append(result["roadmap"])
+            else:
+                missing.add(result["id"])
 
-    for roadmap_id in user_roadmaps:
-        try:
-            response = api_request("get", f"roadmap/{roadmap_id}")
-            if response.ok:
-                roadmaps_data.append(response.json())
-        except Exception:
-            # Log the error in a production app
-            roadmaps_data = []
+    # Roadmaps the API no longer knows about would be re-requested on every visit
+    if missing:
+        session["user_roadmaps"] = [roadmap_id for roadmap_id in user_roadmaps if roadmap_id not in missing]
 
-    return render_template("dashboard.html", quote=quote, paths=paths, roadmaps=roadmaps_data)
+    return render_template(
+        "dashboard.html", quote=quote, paths=paths, roadmaps=roadmaps_data, roadmaps_incomplete=incomplete
+    )
 
 
 @bp.route("/create-roadmap", methods=["GET", "POST"])
@@ -74,15 +205,19 @@ def create_roadmap():
         data = {"name": name, "interests": interests, "timeframe": timeframe}
 
         try:
-            response = api_request("post", "create", data)
+            # A double-submitted form sends the same key, so the API creates one roadmap and replays it
+            response = api_request(
+                "post", "create", data, {"Idempotency-Key": request.form.get("idempotency_key") or uuid.uuid4().hex}
+            )
 
             if response.ok:
                 response_data = response.json()
                 roadmap_id = response_data.get("roadmap_id")
 
                 user_roadmaps = session.get("user_roadmaps", [])
-                user_roadmaps.append(roadmap_id)
-                session["user_roadmaps"] = user_roadmaps
+                if roadmap_id not in user_roadmaps:
+                    user_roadmaps.append(roadmap_id)
+                    session["user_roadmaps"] = user_roadmaps
 
                 flash("Roadmap created successfully!", "success")
                 return redirect(url_for("views.view_roadmap", roadmap_id=roadmap_id))
@@ -94,10 +229,10 @@ def create_roadmap():
 
         return redirect(url_for("views.create_roadmap"))
 
-    paths_response = requests.get(f"{request.url_root}paths", timeout=5)
+    paths_response = api_request("get", "paths")
     paths = paths_response.json()["available_paths"] if paths_response.ok else []
 
-    return render_template("create_roadmap.html", paths=paths)
+    return render_template("create_roadmap.html", paths=paths, idempotency_key=uuid.uuid4().hex)
 
 
 @bp.route("/roadmaps/<roadmap_id>", methods=["GET"])
@@ -107,7 +242,12 @@ def view_roadmap(roadmap_id):
 
         if response.ok:
             roadmap_data = response.json()
-            return render_template("view_roadmap.html", roadmap=roadmap_data)
+            # Repeat views of an unchanged roadmap reuse the rendered body
+            key = (request.script_root, roadmap_data["id"], roadmap_data["version"])
+            body = current_app.extensions["roadmap_fragments"].get_or_render(
+                key, lambda: Markup(render_template("roadmap_body.html", roadmap=roadmap_data))
+            )
+            return render_template("view_roadmap.html", roadmap=roadmap_data, body=body)
         else:
             flash("Roadmap not found", "error")
             return redirect(url_for("views.dashboard"))
@@ -134,6 +274,26 @@ def update_milestone(roadmap_id, milestone_index):
     return redirect(url_for("views.view_roadmap", roadmap_id=roadmap_id))
 
 
+# Saves every toggle on the roadmap page with a single PATCH
+@bp.route("/roadmaps/<roadmap_id>/update-milestones", methods=["POST"])
+def update_milestones(roadmap_id):
+    completed = set(request.form.getlist("completed"))
+    milestones = {index: index in completed for index in request.form.getlist("milestone")}
+
+    try:
+        response = api_request("patch", f"roadmap/{roadmap_id}/milestones", {"milestones": milestones})
+
+        if response.ok:
+            flash("Milestones updated successfully", "success")
+        else:
+            error_data = response.json()
+            flash(f"Error: {error_data.get('error', 'Unknown error')}", "error")
+    except Exception as e:
+        flash(f"An error occurred: {str(e)}", "error")
+
+    return redirect(url_for("views.view_roadmap", roadmap_id=roadmap_id))
+
+
 # Redirect root to home page
 @bp.route("/ui", methods=["GET"])
 def ui_redirect():
@@ -0,0 +1,77 @@
+# Microbenchmark of POST /create with the precomputed milestone schedules against the
+# previous per-request computation.
+#
+#   python -m tests.bench.bench_create [iterations]
+import datetime
+import json
+import os
+import sys
+import time
+from unittest.mock import patch
+
+os.environ.setdefault("API_KEY", "bench")
+# Benchmarks hammer one key far past any sensible rate limit
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "0")
+
+from api.app import app  # noqa: E402
+from api.schedule import build_milestones  # noqa: E402
+from api.utils import DEV_PATHS  # noqa: E402
+
+
+def legacy_build_milestones(interests, timeframe, start_date):
+    roadmap = []
+    for interest in interests:
+        path_data = DEV_PATHS[interest]
+        milestone_count = min(timeframe, len(path_data["milestones"]))
+        for i, milestone in enumerate(path_data["milestones"][:milestone_count]):
+            milestone_date = start_date + datetime.timedelta(days=(i + 1) * (timeframe * 30 // (milestone_count + 1)))
+            roadmap.append(
+                {
+                    "path": interest,
+                    "milestone": milestone,
+                    "target_date": milestone_date.strftime("%Y-%m-%d"),
+                    "completed": False,
+                }
+            )
+    roadmap.sort(key=lambda x: x["target_date"])
+    return roadmap
+
+
+def time_builder(builder, iterations):
+    interests = ["frontend", "backend", "ai"]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        builder(interests, 12, datetime.datetime.now())
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def time_create(client, body, iterations):
+    headers = {"X-API-Key": os.environ["API_KEY"], "Content-Type": "application/json"}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        client.post("/create", headers=headers, data=body)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    body = json.dumps({"name": "Bench", "interests": ["frontend", "backend", "ai"], "timeframe": 12})
+    client = app.test_client()
+
+    with patch("api.roadmaps.build_milestones", legacy_build_milestones):
+        time_create(client, body, 100)
+        before = time_create(client, body, iterations)
+    time_create(client, body, 100)
+    after = time_create(client, body, iterations)
+
+    builder_before = time_builder(legacy_build_milestones, iterations)
+    builder_after = time_builder(build_milestones, iterations)
+
+    print(f"milestone building before: {builder_before:.1f} us/request")
+    print(f"milestone building after:  {builder_after:.1f} us/request")
+    print(f"POST /create before: {before:.1f} us/request")
+    print(f"POST /create after:  {after:.1f} us/request ({(before - after) / before:.1%} faster)")
+
+
+if __name__ == "__main__":
+    main()
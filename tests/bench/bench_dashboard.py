@@ -0,0 +1,72 @@
+# p95 dashboard latency with 1, 10 and 50 roadmaps in the session, for in-process dispatch and for HTTP
+# loopback dispatch with the API calls issued one by one or fanned out over the thread pool.
+#
+#   API_KEY=bench python -m tests.bench.bench_dashboard [iterations]
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+os.environ.setdefault("API_KEY", "bench")
+# Benchmarks hammer one key far past any sensible rate limit
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "0")
+
+from api.app import app  # noqa: E402
+
+MODES = {
+    "internal": {"API_DISPATCH": "internal"},
+    "http sequential": {"API_DISPATCH": "http", "API_FANOUT_WORKERS": 0},
+    "http fan-out": {"API_DISPATCH": "http", "API_FANOUT_WORKERS": 8},
+}
+ROADMAPS = (1, 10, 50)
+
+
+def percentile(timings, n):
+    return statistics.quantiles(timings, n=100, method="inclusive")[n - 1] * 1000
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    saved = {key: app.config[key] for key in ("API_DISPATCH", "API_FANOUT_WORKERS")}
+    print(f"{'mode':<18}{'roadmaps':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    try:
+        for count in ROADMAPS:
+            # A fresh session per size so the cookie holds exactly count roadmap ids
+            session = requests.Session()
+            for _ in range(count):
+                response = session.post(
+                    f"{base_url}/create-roadmap",
+                    data={"name": "Bench", "interests": ["frontend", "backend"], "timeframe": "12"},
+                    allow_redirects=False,
+                    timeout=10,
+                )
+                assert response.status_code == 302, response.status_code  # nosec B101
+
+            for mode, config in MODES.items():
+                app.config.update(config)
+                timings = []
+                for i in range(iterations + 20):
+                    start = time.perf_counter()
+                    response = session.get(f"{base_url}/dashboard", timeout=10)
+                    if i >= 20:
+                        timings.append(time.perf_counter() - start)
+                    assert response.status_code == 200, response.status_code  # nosec B101
+                print(f"{mode:<18}{count:>9}{percentile(timings, 50):>9.2f}{percentile(timings, 95):>9.2f}")
+    finally:
+        app.config.update(saved)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
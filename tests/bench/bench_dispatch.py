@@ -0,0 +1,67 @@
+# Compares page-view latency with in-process and HTTP loopback API dispatch.
+#
+#   API_KEY=bench python -m tests.bench.bench_dispatch [iterations]
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from werkzeug.serving import make_server
+
+os.environ.setdefault("API_KEY", "bench")
+# Benchmarks hammer one key far past any sensible rate limit
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "0")
+
+from api.app import app  # noqa: E402
+
+
+def time_pages(session, base_url, pages, iterations):
+    timings = {page: [] for page in pages}
+    for _ in range(iterations):
+        for page in pages:
+            start = time.perf_counter()
+            response = session.get(f"{base_url}{page}", allow_redirects=False, timeout=10)
+            timings[page].append(time.perf_counter() - start)
+            assert response.status_code == 200, (page, response.status_code)
+    return timings
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    session = requests.Session()
+    response = session.post(
+        f"{base_url}/create-roadmap",
+        data={"name": "Bench", "interests": ["frontend", "backend"], "timeframe": "12"},
+        allow_redirects=False,
+    )
+    roadmap_path = urlsplit(response.headers["Location"]).path
+    pages = ["/home", "/dashboard", "/create-roadmap", roadmap_path]
+
+    results = {}
+    for mode in ("http", "internal"):
+        app.config["API_DISPATCH"] = mode
+        time_pages(session, base_url, pages, 10)
+        results[mode] = time_pages(session, base_url, pages, iterations)
+
+    server.shutdown()
+
+    print(f"{'page':<24}{'http ms':>10}{'internal ms':>14}{'saved ms':>10}")
+    for page in pages:
+        http_ms = statistics.median(results["http"][page]) * 1000
+        internal_ms = statistics.median(results["internal"][page]) * 1000
+        label = "/roadmaps/<id>" if page == roadmap_path else page
+        print(f"{label:<24}{http_ms:>10.2f}{internal_ms:>14.2f}{http_ms - internal_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Restore time of the durable memory store from its binary snapshot, with and without a log tail, against
+# replaying every write from the log alone, plus milestone update throughput under each fsync policy.
+#
+#   python -m tests.bench.bench_durability [roadmaps...]     # e.g. 10000 100000
+import os
+import random
+import sys
+import tempfile
+import time
+
+from api.roadmaps import generate_roadmap
+from api.store import DurableStore, MemoryStore
+from tests.bench.bench_sharing import COMBINATIONS, TIMEFRAMES
+
+TAIL = 1000
+UPDATES = 2000
+# Large enough that the benchmark decides when snapshots are written
+NO_SNAPSHOTS = 2**62
+
+
+def open_store(path, **options):
+    return DurableStore(MemoryStore(max_bytes=0, body_cache_size=0), path, snapshot_log_bytes=NO_SNAPSHOTS, **options)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def fill(store, size, rng):
+    for start in range(0, size, 500):
+        store.put_many(
+            generate_roadmap(
+                {"name": f"User {i}", "interests": rng.choice(COMBINATIONS), "timeframe": rng.choice(TIMEFRAMES)}
+            )
+            for i in range(start, min(size, start + 500))
+        )
+
+
+def update(store, ids, rng, count):
+    for _ in range(count):
+        store.update_milestone(rng.choice(ids), rng.randrange(3), rng.random() < 0.5)
+
+
+def bench_restore(directory, size):
+    rng = random.Random(size)
+    path = os.path.join(directory, f"restore-{size}.snapshot")
+    store = open_store(path)
+    fill(store, size, rng)
+    ids, _ = store.list_ids(limit=size)
+    store.close()
+
+    log_bytes = os.path.getsize(f"{path}.log")
+    log_seconds, restored = timed(open_store, path)
+    snapshot_seconds, _ = timed(restored.snapshot)
+    snapshot_bytes = os.path.getsize(path)
+    restored.close()
+
+    cold_seconds, restored = timed(open_store, path)
+    assert len(restored) == size
+    update(restored, ids, rng, TAIL)
+    restored.close()
+    tail_seconds, _ = timed(open_store, path)
+
+    return {
+        "roadmaps": size,
+        "log MB": log_bytes / 2**20,
+        "log only s": log_seconds,
+        "snapshot s": snapshot_seconds,
+        "snapshot MB": snapshot_bytes / 2**20,
+        "B/roadmap": snapshot_bytes / size,
+        "restore s": cold_seconds,
+        f"+{TAIL} tail s": tail_seconds,
+    }
+
+
+def bench_fsync(directory):
+    rates = {}
+    for policy in ("always", "interval", "never"):
+        rng = random.Random(0)
+        store = open_store(os.path.join(directory, f"fsync-{policy}.snapshot"), fsync=policy)
+        fill(store, 100, rng)
+        ids, _ = store.list_ids(limit=100)
+        seconds, _ = timed(update, store, ids, rng, UPDATES)
+        rates[policy] = UPDATES / seconds
+        store.close()
+    return rates
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows = [bench_restore(directory, size) for size in sizes]
+        rates = bench_fsync(directory)
+
+    print("".join(f"{column:>14}" for column in rows[0]))
+    for row in rows:
+        print("".join(f"{value:>14.2f}" if isinstance(value, float) else f"{value:>14}" for value in row.values()))
+    print()
+    print(f"{'fsync':<10}{'updates/s':>12}")
+    for policy, rate in rates.items():
+        print(f"{policy:<10}{rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
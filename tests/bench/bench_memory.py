@@ -0,0 +1,50 @@
+# Bytes per roadmap held by the memory store, with plain dict records and with compact records.
+#
+#   python -m tests.bench.bench_memory [sizes...]     # e.g. 10000 100000 1000000
+import gc
+import sys
+import tracemalloc
+
+from api.app import serialize_roadmap
+from api.roadmaps import generate_roadmap
+from api.store import MemoryStore
+from api.utils import DEV_PATHS
+
+PATHS = list(DEV_PATHS)
+
+
+def spec(i):
+    # A realistic mix: 1-3 interests and the timeframes offered by the UI
+    interests = [PATHS[(i + n) % len(PATHS)] for n in range(i % 3 + 1)]
+    return {"name": f"User {i}", "interests": interests, "timeframe": (3, 6, 9, 12, 18, 24)[i % 6]}
+
+
+def bytes_per_roadmap(size, **store_options):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    store = MemoryStore(serialize_roadmap, **store_options)
+    for i in range(size):
+        store.put(generate_roadmap(spec(i)))
+
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del store
+    return used / size
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+
+    print(f"{'roadmaps':>10}{'dict B/roadmap':>16}{'compact B/roadmap':>19}{'saved':>8}{'cached body B':>15}")
+    for size in sizes:
+        plain = bytes_per_roadmap(size, compact=False, body_cache_size=0)
+        compact = bytes_per_roadmap(size, compact=True, body_cache_size=0)
+        with_bodies = bytes_per_roadmap(size, compact=True, body_cache_size=size)
+        print(f"{size:>10}{plain:>16.0f}{compact:>19.0f}{1 - compact / plain:>8.0%}{with_bodies - compact:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
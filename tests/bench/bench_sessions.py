@@ -0,0 +1,56 @@
+# Cookie request header bytes and session open (decode) time per request for a user owning N roadmaps,
+# with Flask's signed cookie session and with the server-side session backends.
+#
+#   python -m tests.bench.bench_sessions [roadmaps...]     # e.g. 10 50 100
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+from flask.sessions import SecureCookieSessionInterface
+
+from api.app import app
+from api.sessions import MemorySessionStore, ServerSideSessionInterface, SQLiteSessionStore
+
+ITERATIONS = 2000
+
+
+def measure(interface, data):
+    # Save once through the interface to get exactly the cookie a browser would send back
+    with app.test_request_context():
+        session = interface.session_class(data)
+        session.modified = True
+        response = app.response_class()
+        interface.save_session(app, session, response)
+    name, _, rest = response.headers["Set-Cookie"].partition("=")
+    header = f"Cookie: {name}={rest.split(';', 1)[0]}"
+
+    with app.test_request_context(headers={"Cookie": header[len("Cookie: ") :]}) as context:
+        request = context.request
+        assert interface.open_session(app, request)["user_roadmaps"] == data["user_roadmaps"]
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            interface.open_session(app, request)
+        elapsed = time.perf_counter() - start
+    return len(header), elapsed / ITERATIONS * 1e6
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1, 10, 50, 100]
+    with tempfile.TemporaryDirectory() as directory:
+        interfaces = {
+            "cookie": SecureCookieSessionInterface(),
+            "memory": ServerSideSessionInterface(MemorySessionStore(ttl=3600)),
+            "sqlite": ServerSideSessionInterface(SQLiteSessionStore(os.path.join(directory, "s.sqlite3"), ttl=3600)),
+        }
+        print(f"{'roadmaps':>9}{'backend':>9}{'header B':>10}{'open us':>9}")
+        for size in sizes:
+            data = {"user_roadmaps": [str(uuid.uuid4()) for _ in range(size)]}
+            for name, interface in interfaces.items():
+                header_bytes, open_us = measure(interface, data)
+                print(f"{size:>9}{name:>9}{header_bytes:>10}{open_us:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Dedup ratio and memory saved by sharing milestone schedules between compact roadmaps, for request mixes
+# shaped like the create form: 1-3 interests in form order and the timeframes it offers.
+#
+#   python -m tests.bench.bench_sharing [sizes...]     # e.g. 10000 100000
+import gc
+import itertools
+import random
+import sys
+import tracemalloc
+from unittest.mock import patch
+
+from api import compact
+from api.app import serialize_roadmap
+from api.roadmaps import generate_roadmap
+from api.store import MemoryStore
+from api.utils import DEV_PATHS
+
+TIMEFRAMES = (3, 6, 9, 12, 18, 24)
+COMBINATIONS = [list(c) for size in (1, 2, 3) for c in itertools.combinations(DEV_PATHS, size)]
+
+
+def uniform(rng):
+    return rng.choice(COMBINATIONS), rng.choice(TIMEFRAMES)
+
+
+# A few popular choices account for most requests, as on a real sign-up page: Zipf weights by rank
+CHOICES = list(itertools.product(range(len(COMBINATIONS)), TIMEFRAMES))
+POPULARITY = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(CHOICES))))
+
+
+def popular(rng):
+    combination, timeframe = rng.choices(CHOICES, cum_weights=POPULARITY)[0]
+    return COMBINATIONS[combination], timeframe
+
+
+MIXES = {"uniform": uniform, "popular": popular}
+
+
+def unshared(interests, milestones, offsets):
+    return compact.Schedule(interests, milestones, offsets)
+
+
+def load(size, mix, shared):
+    rng = random.Random(size)
+    specs = [mix(rng) for _ in range(size)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    store = MemoryStore(serialize_roadmap, body_cache_size=0)
+    with patch.object(compact, "intern_schedule", compact.intern_schedule if shared else unshared):
+        with patch.object(compact, "intern_sample", compact.intern_sample if shared else bytes):
+            for i, (interests, timeframe) in enumerate(specs):
+                store.put(generate_roadmap({"name": f"User {i}", "interests": interests, "timeframe": timeframe}))
+
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    schedules = compact.schedule_stats()[0]
+    del store
+    return used, schedules
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+
+    header = ("mix", 8), ("roadmaps", 10), ("schedules", 11), ("dedup", 8), ("unshared B", 12), ("shared B", 10)
+    print("".join(f"{title:>{width}}" for title, width in header + (("saved", 8), ("saved MB", 10))))
+    for mix, size in itertools.product(MIXES, sizes):
+        unshared_bytes, _ = load(size, MIXES[mix], shared=False)
+        shared_bytes, schedules = load(size, MIXES[mix], shared=True)
+        print(
+            f"{mix:>8}{size:>10}{schedules:>11}{size / schedules:>7.0f}x{unshared_bytes / size:>12.0f}"
+            f"{shared_bytes / size:>10.0f}{1 - shared_bytes / unshared_bytes:>8.0%}"
+            f"{(unshared_bytes - shared_bytes) / 2**20:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Throughput of the roadmap store backends for writes, reads and milestone updates.
+#
+#   python -m tests.bench.bench_store [operations]
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+from api.store import MemoryStore, SQLiteStore
+
+
+def make_roadmap():
+    return {
+        "id": str(uuid.uuid4()),
+        "name": "Bench",
+        "interests": ["frontend", "backend"],
+        "timeframe": 12,
+        "roadmap": [{"path": "backend", "milestone": f"Milestone {i}", "completed": False} for i in range(10)],
+        "resources": {"backend": ["Official Python documentation"] * 3},
+        "tips": {"backend": ["Always validate user input"] * 2},
+        "quote": {"text": "The expert in anything was once a beginner.", "author": "Helen Hayes"},
+    }
+
+
+def ops_per_sec(func, items):
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def bench(store, operations):
+    roadmaps = [make_roadmap() for _ in range(operations)]
+    ids = [roadmap["id"] for roadmap in roadmaps]
+    lookups = random.choices(ids, k=operations)
+
+    return {
+        "put": ops_per_sec(store.put, roadmaps),
+        "get": ops_per_sec(store.get, lookups),
+        "update_milestone": ops_per_sec(lambda i: store.update_milestone(i, 3, True), lookups),
+    }
+
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_store = SQLiteStore(os.path.join(directory, "roadmaps.sqlite3"))
+        results = {"memory": bench(MemoryStore(), operations), "sqlite": bench(sqlite_store, operations)}
+        sqlite_store.close()
+
+    print(f"{'backend':<10}{'put/s':>12}{'get/s':>12}{'update/s':>12}")
+    for backend, result in results.items():
+        print(f"{backend:<10}{result['put']:>12.0f}{result['get']:>12.0f}{result['update_milestone']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
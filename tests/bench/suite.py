@@ -0,0 +1,364 @@
+# Per-endpoint benchmark suite. Drives every API and UI route through the Flask test client,
+# reports ops/sec and p50/p95/p99 latency per case and compares them with a baseline.
+#
+#   python -m tests.bench.suite                          # run and print
+#   python -m tests.bench.suite --output results.json    # also write results
+#   python -m tests.bench.suite --check                  # fail on regression against baseline.json
+#   python -m tests.bench.suite --update-baseline        # record a new baseline
+#
+# Baselines are machine specific, record them on the machine that runs --check.
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("API_KEY", "bench")
+
+import api.app  # noqa: E402
+from api.roadmaps import generate_roadmap  # noqa: E402
+from api.store import store_from_config  # noqa: E402
+from api.utils import DEV_PATHS  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+HEADERS = {"X-API-Key": os.environ["API_KEY"], "Content-Type": "application/json"}
+PATHS = list(DEV_PATHS)
+
+
+def reset_store(size=0, interests=2, timeframe=12):
+    api.app.ROADMAPS_DB = store_from_config(api.app.app.config, api.app.serialize_roadmap)
+    spec = {"name": "Bench", "interests": PATHS[:interests], "timeframe": timeframe}
+    api.app.ROADMAPS_DB.put_many(generate_roadmap(spec) for _ in range(size))
+    return api.app.ROADMAPS_DB
+
+
+def add_roadmap(interests=2, timeframe=12):
+    roadmap = generate_roadmap({"name": "Bench", "interests": PATHS[:interests], "timeframe": timeframe})
+    api.app.ROADMAPS_DB.put(roadmap)
+    return roadmap["id"]
+
+
+def create_body(interests=2, timeframe=12):
+    return json.dumps({"name": "Bench", "interests": PATHS[:interests], "timeframe": timeframe})
+
+
+def expect(response, status=200):
+    assert response.status_code == status, (response.status_code, response.data[:200])  # nosec B101
+
+
+# Each case returns a zero-argument callable that performs one request
+def case_get(path, status=200):
+    def setup(client):
+        reset_store()
+        return lambda: expect(client.get(path), status)
+
+    return setup
+
+
+def case_create(interests, timeframe):
+    def setup(client):
+        reset_store()
+        body = create_body(interests, timeframe)
+        return lambda: expect(client.post("/create", headers=HEADERS, data=body))
+
+    return setup
+
+
+def case_create_batch(size):
+    def setup(client):
+        reset_store()
+        body = json.dumps({"roadmaps": [json.loads(create_body(3, 12))] * size})
+        return lambda: expect(client.post("/create/batch", headers=HEADERS, data=body))
+
+    return setup
+
+
+def case_get_roadmap(store_size, interests, timeframe):
+    def setup(client):
+        reset_store(store_size)
+        roadmap_id = add_roadmap(interests, timeframe)
+        return lambda: expect(client.get(f"/roadmap/{roadmap_id}"))
+
+    return setup
+
+
+def case_get_roadmap_not_modified(store_size):
+    def setup(client):
+        reset_store(store_size)
+        roadmap_id = add_roadmap()
+        etag = client.get(f"/roadmap/{roadmap_id}").headers["ETag"]
+        return lambda: expect(client.get(f"/roadmap/{roadmap_id}", headers={"If-None-Match": etag}), 304)
+
+    return setup
+
+
+def case_get_roadmaps(store_size, count):
+    def setup(client):
+        reset_store(store_size)
+        ids = ",".join(add_roadmap() for _ in range(count))
+        return lambda: expect(client.get(f"/roadmaps?ids={ids}"))
+
+    return setup
+
+
+def case_list_roadmaps(store_size, query, pages=0):
+    def setup(client):
+        reset_store(store_size)
+        path = f"/roadmaps?{query}"
+        # Start a few pages in, where the cursor rather than the first bisect decides the page
+        for _ in range(pages):
+            path = f"/roadmaps?{query}&cursor={client.get(path).json['next_cursor']}"
+        return lambda: expect(client.get(path))
+
+    return setup
+
+
+def case_metrics(store_size):
+    def setup(client):
+        reset_store(store_size)
+        return lambda: expect(client.get("/metrics", headers=HEADERS))
+
+    return setup
+
+
+def case_update_milestone(store_size, interests):
+    def setup(client):
+        reset_store(store_size)
+        roadmap_id = add_roadmap(interests, 24)
+        state = {"completed": False}
+
+        def run():
+            state["completed"] = not state["completed"]
+            body = json.dumps({"completed": state["completed"]})
+            expect(client.put(f"/roadmap/{roadmap_id}/milestone/0", headers=HEADERS, data=body))
+
+        return run
+
+    return setup
+
+
+def case_update_milestones(changes):
+    def setup(client):
+        reset_store()
+        roadmap_id = add_roadmap(5, 24)
+        state = {"completed": False}
+
+        def run():
+            state["completed"] = not state["completed"]
+            body = json.dumps({"milestones": {str(i): state["completed"] for i in range(changes)}})
+            expect(client.patch(f"/roadmap/{roadmap_id}/milestones", headers=HEADERS, data=body))
+
+        return run
+
+    return setup
+
+
+def case_page(path, status=200):
+    def setup(client):
+        reset_store()
+        return lambda: expect(client.get(path), status)
+
+    return setup
+
+
+def case_dashboard(roadmaps):
+    def setup(client):
+        reset_store()
+        ids = [add_roadmap() for _ in range(roadmaps)]
+        with client.session_transaction() as session:
+            session["user_roadmaps"] = ids
+        return lambda: expect(client.get("/dashboard"))
+
+    return setup
+
+
+def case_view_roadmap(interests):
+    def setup(client):
+        reset_store()
+        roadmap_id = add_roadmap(interests, 24)
+        return lambda: expect(client.get(f"/roadmaps/{roadmap_id}"))
+
+    return setup
+
+
+def case_create_roadmap_form():
+    def setup(client):
+        reset_store()
+        form = {"name": "Bench", "interests": PATHS[:2], "timeframe": "12"}
+
+        def run():
+            expect(client.post("/create-roadmap", data=form), 302)
+            # Keep the session cookie from growing with every iteration
+            client.delete_cookie("session")
+
+        return run
+
+    return setup
+
+
+def case_update_milestones_form():
+    def setup(client):
+        reset_store()
+        roadmap_id = add_roadmap()
+        form = {
+            "milestone": [str(i) for i in range(len(api.app.ROADMAPS_DB[roadmap_id]["roadmap"]))],
+            "completed": "0",
+        }
+        return lambda: expect(client.post(f"/roadmaps/{roadmap_id}/update-milestones", data=form), 302)
+
+    return setup
+
+
+def case_update_milestone_form():
+    def setup(client):
+        reset_store()
+        roadmap_id = add_roadmap()
+        return lambda: expect(
+            client.post(f"/roadmaps/{roadmap_id}/update-milestone/0", data={"completed": "true"}), 302
+        )
+
+    return setup
+
+
+CASES = {
+    # API routes
+    "GET /": case_get("/"),
+    "GET /quote": case_get("/quote"),
+    "GET /paths": case_get("/paths"),
+    "GET /favicon.ico": case_get("/favicon.ico"),
+    "POST /create [interests=1 timeframe=3]": case_create(1, 3),
+    "POST /create [interests=3 timeframe=12]": case_create(3, 12),
+    "POST /create [interests=5 timeframe=24]": case_create(5, 24),
+    "POST /create/batch [size=50]": case_create_batch(50),
+    "GET /roadmap/<id> [store=100 interests=1]": case_get_roadmap(100, 1, 3),
+    "GET /roadmap/<id> [store=100 interests=5]": case_get_roadmap(100, 5, 24),
+    "GET /roadmap/<id> [store=10000 interests=5]": case_get_roadmap(10000, 5, 24),
+    "GET /roadmap/<id> 304 [store=10000]": case_get_roadmap_not_modified(10000),
+    "GET /roadmaps?ids [store=10000 ids=10]": case_get_roadmaps(10000, 10),
+    "GET /roadmaps?ids [store=10000 ids=50]": case_get_roadmaps(10000, 50),
+    "GET /roadmaps [store=10000 limit=20]": case_list_roadmaps(10000, "limit=20"),
+    "GET /roadmaps [store=10000 limit=50 page=10]": case_list_roadmaps(10000, "limit=50", pages=9),
+    "GET /roadmaps [store=10000 interest status]": case_list_roadmaps(
+        10000, f"interest={PATHS[0]}&status=not_started"
+    ),
+    "GET /metrics [store=10000]": case_metrics(10000),
+    "PUT /roadmap/<id>/milestone [store=100 interests=1]": case_update_milestone(100, 1),
+    "PUT /roadmap/<id>/milestone [store=10000 interests=5]": case_update_milestone(10000, 5),
+    "PATCH /roadmap/<id>/milestones [changes=5]": case_update_milestones(5),
+    # UI routes
+    "GET /ui": case_page("/ui", 302),
+    "GET /home": case_page("/home"),
+    "GET /create-roadmap": case_page("/create-roadmap"),
+    "POST /create-roadmap": case_create_roadmap_form(),
+    "GET /dashboard [roadmaps=0]": case_dashboard(0),
+    "GET /dashboard [roadmaps=10]": case_dashboard(10),
+    "GET /dashboard [roadmaps=50]": case_dashboard(50),
+    "GET /roadmaps/<id> [interests=1]": case_view_roadmap(1),
+    "GET /roadmaps/<id> [interests=5]": case_view_roadmap(5),
+    "POST /roadmaps/<id>/update-milestone": case_update_milestone_form(),
+    "POST /roadmaps/<id>/update-milestones": case_update_milestones_form(),
+}
+
+
+def measure(run, iterations, warmup):
+    for _ in range(warmup):
+        run()
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+    return {
+        "iterations": iterations,
+        "ops_per_sec": iterations / sum(timings),
+        "p50_ms": percentiles[49] * 1000,
+        "p95_ms": percentiles[94] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+    }
+
+
+def run_suite(iterations, warmup, selected=None):
+    client = api.app.app.test_client()
+    config = api.app.app.config
+    store, per_minute = api.app.ROADMAPS_DB, config["RATE_LIMIT_PER_MINUTE"]
+    # Benchmarks hammer one key far past any sensible rate limit
+    config["RATE_LIMIT_PER_MINUTE"] = 0
+    results = {}
+    try:
+        for name, setup in CASES.items():
+            if selected and not any(pattern in name for pattern in selected):
+                continue
+            results[name] = measure(setup(client), iterations, warmup)
+    finally:
+        api.app.ROADMAPS_DB = store
+        config["RATE_LIMIT_PER_MINUTE"] = per_minute
+    return results
+
+
+# Returns the cases whose median latency grew more than threshold above the baseline. The median
+# is compared rather than ops/sec because it is far less sensitive to the odd GC pause or scheduler hiccup.
+def find_regressions(results, baseline, threshold):
+    regressions = {}
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected and result["p50_ms"] > expected["p50_ms"] * (1 + threshold):
+            regressions[name] = (expected["p50_ms"], result["p50_ms"])
+    return regressions
+
+
+def print_results(results, baseline):
+    print(f"{'case':<56}{'ops/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'p50 vs base':>13}")
+    for name, result in results.items():
+        change = ""
+        if name in baseline:
+            change = f"{result['p50_ms'] / baseline[name]['p50_ms'] - 1:+.0%}"
+        print(
+            f"{name:<56}{result['ops_per_sec']:>10.0f}{result['p50_ms']:>9.3f}"
+            f"{result['p95_ms']:>9.3f}{result['p99_ms']:>9.3f}{change:>13}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed p50 increase, 0.5 = 50%%")
+    parser.add_argument("--check", action="store_true", help="exit non-zero when a case regresses")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("cases", nargs="*", help="only run cases whose name contains one of these")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.iterations, args.warmup, args.cases)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    print_results(results, baseline)
+
+    report = {"python": sys.version.split()[0], "iterations": args.iterations, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.check:
+        regressions = find_regressions(results, baseline, args.threshold)
+        for name, (expected, actual) in regressions.items():
+            print(f"REGRESSION {name}: p50 {actual:.3f} ms vs baseline {expected:.3f} ms")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,8 @@ def client():
     flask_app.config.update(
         {
             "TESTING": True,
+            # Tests create far more roadmaps per second than any client should, see test_ratelimit.py
+            "RATE_LIMIT_PER_MINUTE": 0,
         }
     )
     with flask_app.test_client() as testing_client:
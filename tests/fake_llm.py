@@ -0,0 +1,76 @@
+# A local OpenAI-compatible /chat/completions server for exercising GENERATION_MODE=llm offline.
+# Replies stream as server-sent events with content built from the requested interests.
+#
+#   python -m tests.fake_llm [port]     # then LLM_BASE_URL=http://127.0.0.1:<port>/v1
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_content(interests):
+    return {
+        interest: {
+            "milestones": [f"{interest} milestone {i}" for i in range(1, 6)],
+            "resources": [f"{interest} resource {i}" for i in range(1, 6)],
+            "tips": [f"{interest} tip {i}" for i in range(1, 6)],
+        }
+        for interest in interests
+    }
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server.requests.append(body)
+        if server.status != 200:
+            self.send_response(server.status)
+            self.end_headers()
+            return
+
+        interests = json.loads(body["messages"][-1]["content"])["interests"]
+        reply = server.reply if server.reply is not None else json.dumps(fake_content(interests))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        step = max(1, len(reply) // server.chunks)
+        for start in range(0, len(reply), step):
+            time.sleep(server.delay)
+            event = {"choices": [{"delta": {"content": reply[start : start + step]}}]}
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+# Yields the running server. Its url is an LLM_BASE_URL, requests collects every request body, and status,
+# reply, delay (seconds per chunk) and chunks can be changed between calls to simulate a misbehaving upstream.
+@contextmanager
+def fake_llm_server(port=0, delay=0.0, chunks=4):
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeLLMHandler)
+    server.daemon_threads = True
+    server.block_on_close = False
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.requests = []
+    server.status = 200
+    server.reply = None
+    server.delay = delay
+    server.chunks = chunks
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    with fake_llm_server(int(sys.argv[1]) if len(sys.argv) > 1 else 8765) as running:
+        print(f"LLM_BASE_URL={running.url}")
+        threading.Event().wait()
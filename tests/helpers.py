@@ -0,0 +1,7 @@
+# A clock for the stores and caches that take one, moved forward by hand
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
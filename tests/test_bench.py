@@ -0,0 +1,25 @@
+from api.app import ROADMAPS_DB
+from tests.bench.suite import CASES, find_regressions, run_suite
+
+
+class TestBenchSuite:
+    def test_every_case_runs(self):
+        results = run_suite(iterations=2, warmup=0)
+
+        assert set(results) == set(CASES)
+        for result in results.values():
+            assert result["ops_per_sec"] > 0
+            assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+    def test_suite_restores_store(self):
+        run_suite(iterations=2, warmup=0, selected=["GET /roadmap/<id> [store=100"])
+
+        import api.app
+
+        assert api.app.ROADMAPS_DB is ROADMAPS_DB
+
+    def test_find_regressions(self):
+        baseline = {"fast": {"p50_ms": 1.0}, "slow": {"p50_ms": 1.0}}
+        results = {"fast": {"p50_ms": 1.1}, "slow": {"p50_ms": 2.0}, "new": {"p50_ms": 9.0}}
+
+        assert find_regressions(results, baseline, 0.3) == {"slow": (1.0, 2.0)}
@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess  # nosec B404
+import sys
+
+# Generous defaults so slower CI runners pass, override to tighten the budget
+IMPORT_BUDGET_MS = float(os.environ.get("COLD_START_IMPORT_BUDGET_MS", 1500))
+FIRST_REQUEST_BUDGET_MS = float(os.environ.get("COLD_START_FIRST_REQUEST_BUDGET_MS", 1000))
+
+PROBE = """
+import json, sys, time
+
+start = time.perf_counter()
+import api.app
+imported = time.perf_counter()
+response = api.app.app.test_client().get("/home")
+finished = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (finished - imported) * 1000,
+    "status": response.status_code,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+
+def run_probe(env):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(  # nosec B603
+        [sys.executable, "-c", PROBE], cwd=root, env=env, capture_output=True, text=True, timeout=60, check=True
+    )
+    return json.loads(result.stdout)
+
+
+class TestColdStart:
+    def test_import_and_first_request_within_budget(self):
+        probe = run_probe(dict(os.environ, API_KEY="cold-start-key"))
+
+        assert probe["status"] == 200
+        assert probe["import_ms"] < IMPORT_BUDGET_MS
+        assert probe["first_request_ms"] < FIRST_REQUEST_BUDGET_MS
+
+    def test_heavy_modules_are_not_imported_on_cold_start(self):
+        probe = run_probe(dict(os.environ, API_KEY="cold-start-key"))
+
+        for module in ("requests", "openai", "httpx", "pydantic"):
+            assert module not in probe["modules"]
+
+    def test_import_without_api_key(self):
+        env = {key: value for key, value in os.environ.items() if key != "API_KEY"}
+
+        assert run_probe(env)["status"] == 200
@@ -0,0 +1,140 @@
+import datetime
+import gc
+import itertools
+import weakref
+
+from api.compact import CompactRoadmap, compact_roadmap, schedule_stats
+from api.roadmaps import generate_roadmap
+from api.store import MemoryStore
+from api.utils import DEV_PATHS
+
+
+class TestCompactRoadmap:
+    def test_round_trips_generated_roadmaps(self):
+        for interests in itertools.chain(itertools.permutations(DEV_PATHS, 2), [["ai", "ai"], list(DEV_PATHS)]):
+            for timeframe in (1, 6, 24):
+                roadmap = generate_roadmap({"name": "Compact", "interests": list(interests), "timeframe": timeframe})
+
+                record = compact_roadmap(roadmap)
+
+                assert isinstance(record, CompactRoadmap)
+                assert record.expand(roadmap["id"]) == roadmap
+
+    def test_set_completed_updates_bitset_count_and_version(self):
+        roadmap = generate_roadmap({"name": "Compact", "interests": ["frontend", "ai"], "timeframe": 12})
+        record = compact_roadmap(roadmap)
+
+        assert record.set_completed(3, True) is True
+        assert record.set_completed(3, True) is False
+        assert record.set_completed(0, True) is True
+        assert record.set_completed(3, False) is True
+
+        expanded = record.expand(roadmap["id"])
+        assert [m["completed"] for m in expanded["roadmap"]][:4] == [True, False, False, False]
+        assert expanded["completed_count"] == 1
+        assert expanded["version"] == 4
+
+    def test_foreign_content_is_not_compacted(self):
+        roadmap = generate_roadmap({"name": "Compact", "interests": ["backend"], "timeframe": 6})
+
+        custom = dict(roadmap, roadmap=[dict(roadmap["roadmap"][0], milestone="Write a compiler")])
+        extra = dict(roadmap, owner="someone")
+        odd_name = dict(roadmap, name=None)
+
+        assert compact_roadmap(custom) is None
+        assert compact_roadmap(extra) is None
+        assert compact_roadmap(odd_name).expand(roadmap["id"]) == odd_name
+
+
+class TestCompactMemoryStore:
+    def test_store_keeps_compact_records(self):
+        store = MemoryStore()
+        roadmap = generate_roadmap({"name": "Compact", "interests": ["devops", "mobile"], "timeframe": 9})
+        store.put(roadmap)
+
+        assert isinstance(store._shard(roadmap["id"]).roadmaps[roadmap["id"]], CompactRoadmap)
+        assert store[roadmap["id"]] == roadmap
+
+        updated = store.update_milestone(roadmap["id"], 2, True)
+
+        assert updated["roadmap"][2]["completed"] is True
+        assert updated["completed_count"] == 1
+        assert store.get_serialized(roadmap["id"])[0] == 2
+
+    def test_expanded_roadmaps_are_copies(self):
+        store = MemoryStore()
+        roadmap = generate_roadmap({"name": "Compact", "interests": ["frontend"], "timeframe": 3})
+        store.put(roadmap)
+
+        store[roadmap["id"]]["quote"]["text"] = "changed"
+        store[roadmap["id"]]["roadmap"][0]["completed"] = True
+
+        assert store[roadmap["id"]] == roadmap
+
+
+# The same roadmap created days later, with every date moved along
+def shifted(roadmap, days):
+    def move(value):
+        return (datetime.date.fromisoformat(value) + datetime.timedelta(days=days)).isoformat()
+
+    return dict(
+        roadmap,
+        id=f"{roadmap['id']}-later",
+        created_at=move(roadmap["created_at"]),
+        end_date=move(roadmap["end_date"]),
+        roadmap=[dict(milestone, target_date=move(milestone["target_date"])) for milestone in roadmap["roadmap"]],
+    )
+
+
+class TestSharedSchedules:
+    def test_same_interests_and_timeframe_share_one_schedule(self):
+        spec = {"name": "Sharer", "interests": ["backend", "ai"], "timeframe": 9}
+        first, second = generate_roadmap(spec), generate_roadmap(dict(spec, name="Other"))
+        later = shifted(second, 40)
+
+        records = [compact_roadmap(roadmap) for roadmap in (first, second, later)]
+
+        assert records[0].schedule is records[1].schedule is records[2].schedule
+        assert records[2].expand(later["id"]) == later
+
+    def test_completion_stays_per_roadmap(self):
+        store = MemoryStore()
+        spec = {"name": "Sharer", "interests": ["mobile"], "timeframe": 6}
+        first, second = generate_roadmap(spec), generate_roadmap(spec)
+        store.put_many([first, second])
+
+        store.update_milestone(first["id"], 0, True)
+
+        assert store[first["id"]]["roadmap"][0]["completed"] is True
+        assert store[second["id"]]["roadmap"][0]["completed"] is False
+        shards = [store._shard(roadmap["id"]).roadmaps for roadmap in (first, second)]
+        assert shards[0][first["id"]].schedule is shards[1][second["id"]].schedule
+
+    def test_changed_milestones_get_their_own_schedule(self):
+        store = MemoryStore()
+        spec = {"name": "Sharer", "interests": ["devops", "frontend"], "timeframe": 12}
+        first, second = generate_roadmap(spec), generate_roadmap(spec)
+        store.put_many([first, second])
+        shared = store._shard(second["id"]).roadmaps[second["id"]].schedule
+
+        rescheduled = dict(first, roadmap=first["roadmap"][:-1])
+        store.put(rescheduled)
+
+        assert store._shard(first["id"]).roadmaps[first["id"]].schedule is not shared
+        assert store[first["id"]] == rescheduled
+        assert store[second["id"]] == second
+
+    def test_schedules_are_released_with_their_last_roadmap(self):
+        roadmap = generate_roadmap(
+            {"name": "Rare", "interests": ["ai", "mobile", "devops", "backend"], "timeframe": 23}
+        )
+        record = compact_roadmap(roadmap)
+        schedule = weakref.ref(record.schedule)
+        count, size = schedule_stats()
+
+        del record
+        gc.collect()
+
+        assert schedule() is None
+        assert schedule_stats()[0] == count - 1
+        assert size > 0
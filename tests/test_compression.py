@@ -0,0 +1,114 @@
+import gzip
+import json
+import os
+import zlib
+from unittest.mock import patch
+
+import pytest
+
+from api import compression
+from api.app import ROADMAPS_DB
+from api.roadmaps import generate_roadmap
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+@pytest.fixture
+def roadmap_id():
+    roadmap = generate_roadmap({"name": "Compressed", "interests": ["frontend", "backend", "ai"], "timeframe": 12})
+    ROADMAPS_DB.put(roadmap)
+    return roadmap["id"]
+
+
+class TestCompression:
+    def test_gzips_roadmap_json(self, client, roadmap_id):
+        plain = client.get(f"/roadmap/{roadmap_id}")
+        response = client.get(f"/roadmap/{roadmap_id}", headers=GZIP)
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert gzip.decompress(response.data) == plain.data
+        assert len(response.data) < len(plain.data)
+        assert "compress;dur=" in response.headers["Server-Timing"]
+
+    def test_conditional_requests_still_match(self, client, roadmap_id):
+        response = client.get(f"/roadmap/{roadmap_id}", headers=GZIP)
+
+        assert response.headers["ETag"].startswith('W/"')
+        etag = response.headers["ETag"]
+        assert client.get(f"/roadmap/{roadmap_id}", headers={**GZIP, "If-None-Match": etag}).status_code == 304
+        assert client.get(f"/roadmap/{roadmap_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_honors_accept_encoding(self, client, roadmap_id):
+        for header in ("", "identity", "gzip;q=0", "deflate"):
+            response = client.get(f"/roadmap/{roadmap_id}", headers={"Accept-Encoding": header})
+
+            assert "Content-Encoding" not in response.headers
+            assert json.loads(response.data)["id"] == roadmap_id
+
+    def test_skips_small_and_binary_bodies(self, client):
+        assert "Content-Encoding" not in client.get("/quote", headers=GZIP).headers
+        assert "Content-Encoding" not in client.get("/favicon.ico", headers=GZIP).headers
+
+    def test_compresses_html_pages(self, client):
+        response = client.get("/home", headers=GZIP)
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert b"Map Your Development Journey" in gzip.decompress(response.data)
+
+    def test_compresses_static_payloads_once(self, client):
+        calls = []
+        original = compression.compress
+        with patch.object(compression, "compress", lambda *args: calls.append(1) or original(*args)):
+            client.application.config["COMPRESS_MIN_SIZE"] = 0
+            try:
+                first = client.get("/paths", headers=GZIP)
+                second = client.get("/paths", headers=GZIP)
+            finally:
+                client.application.config["COMPRESS_MIN_SIZE"] = 1024
+
+        assert first.data == second.data
+        assert calls == [1]
+
+    def test_streams_ndjson_batches(self, client):
+        with patch.dict(os.environ, {"API_KEY": "custom-test-key"}):
+            roadmaps = [{"name": "Streamed", "interests": ["devops"], "timeframe": 6}] * 3
+            response = client.post(
+                "/create/batch",
+                headers={**GZIP, "X-API-Key": "custom-test-key", "Content-Type": "application/json"},
+                data=json.dumps({"roadmaps": roadmaps}),
+                buffered=False,
+            )
+
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert "Content-Length" not in response.headers
+            decompressor = zlib.decompressobj(31)
+            chunks = [decompressor.decompress(chunk) for chunk in response.response]
+
+        # Every item is decodable as soon as its chunk arrives
+        lines = [json.loads(line) for chunk in chunks for line in chunk.splitlines() if line]
+        assert [line["index"] for line in lines] == [0, 1, 2]
+
+    def test_can_be_disabled(self, client, roadmap_id):
+        client.application.config["COMPRESS_ENABLED"] = False
+        try:
+            response = client.get(f"/roadmap/{roadmap_id}", headers=GZIP)
+        finally:
+            client.application.config["COMPRESS_ENABLED"] = True
+
+        assert "Content-Encoding" not in response.headers
+
+
+@pytest.mark.skipif(compression.brotli is None, reason="brotli is not installed")
+class TestBrotli:
+    def test_prefers_brotli(self, client, roadmap_id):
+        plain = client.get(f"/roadmap/{roadmap_id}")
+        response = client.get(f"/roadmap/{roadmap_id}", headers={"Accept-Encoding": "gzip, deflate, br"})
+
+        assert response.headers["Content-Encoding"] == "br"
+        assert compression.brotli.decompress(response.data) == plain.data
+
+    def test_client_preference_wins(self, client, roadmap_id):
+        response = client.get(f"/roadmap/{roadmap_id}", headers={"Accept-Encoding": "br;q=0.5, gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
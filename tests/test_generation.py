@@ -0,0 +1,196 @@
+import json
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from api.app import ROADMAPS_DB
+from api.generation import ContentGenerator, parse_content
+from api.ratelimit import MemoryTokenBuckets, RateLimiter
+from api.utils import DEV_PATHS
+from tests.fake_llm import fake_content, fake_llm_server
+
+HEADERS = {"X-API-Key": "generation-key", "Content-Type": "application/json"}
+
+
+@pytest.fixture
+def llm():
+    with fake_llm_server() as server:
+        yield server
+
+
+def make_generator(server, timeout=2.0):
+    return ContentGenerator(server.url, "secret", "fake-model", timeout, cache_size=10)
+
+
+@pytest.fixture
+def generating_client(client, llm):
+    app = client.application
+    app.extensions["content_generator"] = make_generator(llm, timeout=0.5)
+    try:
+        with patch.dict(os.environ, {"API_KEY": "generation-key"}):
+            yield client
+    finally:
+        del app.extensions["content_generator"]
+
+
+@pytest.fixture
+def one_slot(client):
+    app = client.application
+    limiter = app.extensions["rate_limiter"]
+    app.extensions["rate_limiter"] = RateLimiter(MemoryTokenBuckets(), max_concurrent=1)
+    try:
+        with patch.dict(os.environ, {"API_KEY": "generation-key"}):
+            yield client
+    finally:
+        app.extensions["rate_limiter"] = limiter
+
+
+def create(client, interests, query="", headers=None):
+    body = {"name": "Generated", "interests": interests, "timeframe": 6}
+    return client.post(f"/create{query}", headers={**HEADERS, **(headers or {})}, data=json.dumps(body))
+
+
+class TestParseContent:
+    def test_accepts_complete_replies(self):
+        assert parse_content(json.dumps(fake_content(["rust"])), ("rust",)) == fake_content(["rust"])
+
+    def test_rejects_incomplete_replies(self):
+        content = fake_content(["rust"])
+        assert parse_content(json.dumps(content), ("rust", "go")) is None
+        assert parse_content("not json", ("rust",)) is None
+        content["rust"]["tips"] = "be curious"
+        assert parse_content(json.dumps(content), ("rust",)) is None
+
+    def test_trims_oversized_replies(self):
+        content = {"rust": {"milestones": ["m" * 500] * 9, "resources": [" r ", 3, ""], "tips": ["t"]}}
+
+        parsed = parse_content(json.dumps(content), ("rust",))["rust"]
+
+        assert len(parsed["milestones"]) == 5 and len(parsed["milestones"][0]) == 200
+        assert parsed["resources"] == ["r"]
+
+
+class TestContentGenerator:
+    def test_caches_by_normalized_request(self, llm):
+        generator = make_generator(llm)
+
+        first = generator.content(["rust", "go"], 6)
+        second = generator.content(["go", "rust", "go"], 6)
+
+        assert first == second == fake_content(["go", "rust"])
+        assert len(llm.requests) == 1
+        assert llm.requests[0]["model"] == "fake-model"
+        assert generator.content(["go", "rust"], 12) is not None
+        assert len(llm.requests) == 2
+
+    def test_concurrent_identical_requests_share_one_call(self, llm):
+        llm.delay = 0.05
+        generator = make_generator(llm)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(generator.content(["rust"], 6))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(llm.requests) == 1
+        assert results == [fake_content(["rust"])] * 5
+
+    def test_streams_deltas_to_the_caller_that_makes_the_call(self, llm):
+        events = list(make_generator(llm).events(["rust"], 6))
+
+        assert [event for event, _ in events[:-1]] == ["delta"] * (len(events) - 1)
+        assert "".join(value for _, value in events[:-1]) == json.dumps(fake_content(["rust"]))
+        assert events[-1] == ("content", fake_content(["rust"]))
+
+    def test_times_out_without_caching(self, llm):
+        llm.delay = 0.5
+        generator = make_generator(llm, timeout=0.2)
+
+        start = time.monotonic()
+        assert generator.content(["rust"], 6) is None
+        assert time.monotonic() - start < 0.45
+        assert generator.fallbacks == 1
+
+        llm.delay = 0
+        assert generator.content(["rust"], 6) is not None
+
+    def test_upstream_errors_and_bad_replies_yield_nothing(self, llm):
+        generator = make_generator(llm)
+        llm.status = 500
+        assert generator.content(["rust"], 6) is None
+        llm.status = 200
+        llm.reply = '{"rust": {}}'
+        assert generator.content(["rust"], 6) is None
+
+
+class TestGeneratedRoadmaps:
+    def test_creates_roadmaps_for_any_interest(self, generating_client, llm):
+        response = create(generating_client, ["Rust ", "rust", "Machine  Learning"])
+
+        assert response.status_code == 200
+        roadmap = ROADMAPS_DB.get(response.json["roadmap_id"])
+        assert roadmap["interests"] == ["rust", "machine learning"]
+        assert {milestone["milestone"] for milestone in roadmap["roadmap"]} >= {"rust milestone 1"}
+        assert roadmap["tips"]["machine learning"][0].startswith("machine learning tip")
+
+    def test_falls_back_to_static_paths(self, generating_client, llm):
+        llm.status = 503
+        response = create(generating_client, ["frontend"])
+
+        assert response.status_code == 200
+        roadmap = ROADMAPS_DB.get(response.json["roadmap_id"])
+        assert roadmap["roadmap"][0]["milestone"] in DEV_PATHS["frontend"]["milestones"]
+
+    def test_custom_interests_without_a_model_are_unavailable(self, generating_client, llm):
+        llm.status = 503
+
+        response = create(generating_client, ["rust"])
+
+        assert response.status_code == 503
+        assert "available_paths" in response.json
+
+    def test_rejects_too_many_or_too_long_interests(self, generating_client):
+        assert create(generating_client, [f"topic {i}" for i in range(6)]).status_code == 400
+        assert create(generating_client, ["x" * 41]).status_code == 400
+
+    def test_streams_model_output_then_the_roadmap(self, generating_client, llm):
+        response = create(generating_client, ["elixir"], "?stream=1")
+
+        assert response.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        assert "".join(line["delta"] for line in lines[:-1]) == json.dumps(fake_content(["elixir"]))
+        assert ROADMAPS_DB.get(lines[-1]["roadmap_id"])["interests"] == ["elixir"]
+
+    def test_static_mode_streams_just_the_roadmap(self, client):
+        with patch.dict(os.environ, {"API_KEY": "generation-key"}):
+            response = create(client, ["backend"], "?stream=1")
+            rejected = create(client, ["rust"])
+
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        assert len(lines) == 1 and "roadmap_id" in lines[0]
+        assert rejected.status_code == 400
+
+    def test_streams_hold_their_concurrency_slot_until_they_end(self, one_slot):
+        streaming = create(one_slot, ["backend"], "?stream=1")
+        assert create(one_slot, ["backend"]).status_code == 429
+
+        assert "roadmap_id" in json.loads(streaming.data)
+        assert create(one_slot, ["backend"]).status_code == 200
+
+        # A stream the client walks away from gives the slot back once the server closes it
+        abandoned = create(one_slot, ["backend"], "?stream=1")
+        abandoned.close()
+        assert create(one_slot, ["backend"]).status_code == 200
+
+    def test_streams_refuse_idempotency_keys(self, client):
+        with patch.dict(os.environ, {"API_KEY": "generation-key"}):
+            count = len(ROADMAPS_DB)
+            response = create(client, ["backend"], "?stream=1", {"Idempotency-Key": "stream-1"})
+
+        assert response.status_code == 400
+        assert "Idempotency-Key" in response.json["error"]
+        assert len(ROADMAPS_DB) == count
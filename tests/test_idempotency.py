@@ -0,0 +1,192 @@
+import json
+import os
+import re
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from api import app as app_module
+from api.idempotency import IdempotencyCache
+from api.ratelimit import MemoryTokenBuckets, RateLimiter
+from tests.helpers import FakeClock
+
+KEYS = {"API_KEY": "ui-key", "API_KEYS": "mobile:mobile-key"}
+SPEC = {"name": "Retried", "interests": ["ai"], "timeframe": 3}
+
+
+@pytest.fixture
+def api_keys():
+    with patch.dict(os.environ, KEYS):
+        yield
+
+
+@pytest.fixture
+def generations():
+    calls = []
+    original = app_module.generate_roadmap
+
+    def generate(spec, *args):
+        calls.append(spec)
+        time.sleep(0.05)
+        return original(spec, *args)
+
+    with patch.object(app_module, "generate_roadmap", generate):
+        yield calls
+
+
+def create(client, idempotency_key, spec=SPEC, api_key="mobile-key"):
+    headers = {"X-API-Key": api_key, "Content-Type": "application/json", "Idempotency-Key": idempotency_key}
+    return client.post("/create", headers=headers, data=json.dumps(spec))
+
+
+class TestIdempotencyCache:
+    def test_first_caller_starts_the_execution(self):
+        cache = IdempotencyCache(ttl=60, max_entries=10)
+        execution, started = cache.begin("a", b"body")
+        duplicate, duplicate_started = cache.begin("a", b"body")
+
+        assert started and not duplicate_started
+        assert duplicate is execution
+        cache.finish(execution, "response")
+        assert duplicate.done.is_set() and duplicate.response == "response"
+
+    def test_abandoned_execution_can_be_started_again(self):
+        cache = IdempotencyCache(ttl=60, max_entries=10)
+        execution, _ = cache.begin("a", b"body")
+        cache.abandon("a", execution)
+
+        assert execution.done.is_set()
+        assert cache.begin("a", b"body")[1]
+
+    def test_entries_expire_and_stay_bounded(self):
+        clock = FakeClock()
+        cache = IdempotencyCache(ttl=60, max_entries=2, clock=clock)
+        for key in "abc":
+            cache.finish(cache.begin(key, b"")[0], key)
+
+        assert len(cache) == 2
+        assert cache.begin("a", b"")[1]
+        clock.now += 61
+        cache.begin("d", b"")
+        assert len(cache) == 1
+
+
+class TestIdempotentCreate:
+    def test_retry_replays_the_first_response(self, client, api_keys, generations):
+        first = create(client, "retry-1")
+        second = create(client, "retry-1")
+
+        assert len(generations) == 1
+        assert second.json == first.json
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+
+    def test_different_body_is_rejected(self, client, api_keys, generations):
+        create(client, "reused-1")
+        response = create(client, "reused-1", {**SPEC, "timeframe": 6})
+
+        assert response.status_code == 422
+        assert len(generations) == 1
+
+    def test_keys_are_scoped_to_the_api_key(self, client, api_keys, generations):
+        mobile = create(client, "shared-1")
+        ui = create(client, "shared-1", api_key="ui-key")
+
+        assert len(generations) == 2
+        assert mobile.json["roadmap_id"] != ui.json["roadmap_id"]
+
+    def test_concurrent_duplicates_run_once(self, client, api_keys, generations):
+        results = []
+
+        def post():
+            with client.application.test_client() as thread_client:
+                results.append(create(thread_client, "concurrent-1"))
+
+        threads = [threading.Thread(target=post) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(generations) == 1
+        assert {response.json["roadmap_id"] for response in results} == {results[0].json["roadmap_id"]}
+        assert sum("Idempotent-Replayed" in response.headers for response in results) == 4
+
+    def test_waiting_duplicates_give_up_their_concurrency_slot(self, client, api_keys):
+        app = client.application
+        limiter = app.extensions["rate_limiter"]
+        app.extensions["rate_limiter"] = RateLimiter(MemoryTokenBuckets(), max_concurrent=2)
+        original = app_module.generate_roadmap
+        cache = app.extensions["idempotency"]
+        begin = cache.begin
+        release, waiting = threading.Event(), threading.Event()
+
+        def generate(spec, *args):
+            if spec["name"] == SPEC["name"]:
+                release.wait(5)
+            return original(spec, *args)
+
+        def begin_duplicate(key, fingerprint):
+            execution, started = begin(key, fingerprint)
+            if not started:
+                waiting.set()
+            return execution, started
+
+        results = []
+
+        def post():
+            with app.test_client() as thread_client:
+                results.append(create(thread_client, "slot-1"))
+
+        threads = [threading.Thread(target=post) for _ in range(2)]
+        try:
+            with patch.object(app_module, "generate_roadmap", generate), patch.object(cache, "begin", begin_duplicate):
+                for thread in threads:
+                    thread.start()
+                assert waiting.wait(5)
+                for _ in range(100):
+                    response = create(client, "slot-2", {**SPEC, "name": "Other"})
+                    if response.status_code != 429:
+                        break
+                    time.sleep(0.01)
+                release.set()
+                for thread in threads:
+                    thread.join()
+        finally:
+            release.set()
+            app.extensions["rate_limiter"] = limiter
+
+        assert response.status_code == 200
+        assert sorted("Idempotent-Replayed" in response.headers for response in results) == [False, True]
+
+    def test_failed_attempt_can_be_retried(self, client, api_keys):
+        original = app_module.generate_roadmap
+        with patch.object(app_module, "generate_roadmap", side_effect=[RuntimeError("boom"), original(SPEC)]):
+            with pytest.raises(RuntimeError):
+                create(client, "failing-1")
+            response = create(client, "failing-1")
+
+        assert response.status_code == 200
+        assert "Idempotent-Replayed" not in response.headers
+
+    def test_rejects_oversized_keys(self, client, api_keys):
+        assert create(client, "k" * 256).status_code == 400
+
+
+class TestIdempotentForm:
+    def test_double_submit_creates_one_roadmap(self, client, generations):
+        with client.session_transaction() as session:
+            session["user_roadmaps"] = []
+        form = client.get("/create-roadmap").data.decode()
+        idempotency_key = re.search(r'name="idempotency_key" value="([^"]+)"', form).group(1)
+        data = {"name": "Double Clicker", "interests": ["ai"], "timeframe": "3", "idempotency_key": idempotency_key}
+
+        first = client.post("/create-roadmap", data=data)
+        second = client.post("/create-roadmap", data=data)
+
+        assert first.headers["Location"] == second.headers["Location"]
+        assert len(generations) == 1
+        with client.session_transaction() as session:
+            assert len(session["user_roadmaps"]) == 1
@@ -0,0 +1,71 @@
+import random
+import time
+from unittest.mock import patch
+
+from api.index import RoadmapIndex, SortedKeys
+
+
+def fill(size):
+    index = RoadmapIndex()
+    index.add_many((f"id-{i:07d}", f"2026-01-01T{i:07d}", ("ai", "frontend"), "not_started") for i in range(size))
+    return index
+
+
+# Seconds per eviction of the oldest roadmap followed by a new one, the best of a few rounds
+def eviction_time(index, rounds=3, evictions=300):
+    times, n = [], 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(evictions):
+            index.remove(f"id-{n:07d}")
+            index.add(f"new-{n:07d}", f"2027-01-01T{n:07d}", ("ai", "frontend"), "not_started")
+            n += 1
+        times.append((time.perf_counter() - start) / evictions)
+    return min(times)
+
+
+class TestSortedKeys:
+    def test_matches_a_sorted_list(self):
+        rng = random.Random(0)
+        with patch.object(SortedKeys, "BLOCK_SIZE", 4):
+            expected = sorted(rng.sample(range(1000), 50))
+            keys = SortedKeys(expected)
+            for _ in range(2000):
+                if expected and rng.random() < 0.45:
+                    key = expected.pop(rng.randrange(len(expected)))
+                    keys.remove(key)
+                else:
+                    key = rng.randrange(1000) + rng.random()
+                    keys.add(key)
+                    expected.append(key)
+                    expected.sort()
+
+            assert list(keys) == expected
+            assert len(keys) == len(expected)
+            assert all(len(block) <= 2 * SortedKeys.BLOCK_SIZE for block in keys._blocks)
+            start = expected[len(expected) // 2]
+            assert list(keys.iter_from(start)) == [key for key in expected if key >= start]
+            assert list(keys.iter_from(start, inclusive=False)) == [key for key in expected if key > start]
+            assert list(keys.iter_from(10**6)) == []
+
+
+class TestRoadmapIndex:
+    def test_pages_follow_updates_and_bulk_loads(self):
+        index = fill(1500)
+        index.set_status("id-0000001", "completed")
+        index.remove("id-0000002")
+        index.add_many([("id-0000002", "2025-12-31", ("ai",), "not_started")])
+
+        ids, after = index.page(limit=3)
+        assert ids == ["id-0000002", "id-0000000", "id-0000001"]
+        assert index.page(limit=2, after=after)[0] == ["id-0000003", "id-0000004"]
+        assert index.page("frontend", limit=2)[0] == ["id-0000000", "id-0000001"]
+        assert index.page("ai", "completed")[0] == ["id-0000001"]
+        assert index.page(created_from="2026-01-01T0001499")[0] == ["id-0001499"]
+        assert index.page("backend") == ([], None)
+
+    def test_eviction_cost_does_not_grow_with_the_index(self):
+        small, large = eviction_time(fill(2000)), eviction_time(fill(200_000))
+
+        # A plain sorted list makes each eviction shift every key, about 30 times slower at 200,000 roadmaps
+        assert large < small * 4
@@ -0,0 +1,73 @@
+import os
+from unittest.mock import patch
+
+from api.metrics import BUCKETS, Histogram, Metrics, render_store_stats
+
+
+class TestServerTiming:
+    def test_api_response_has_server_timing(self, client):
+        response = client.get("/roadmap/nonexistent-id")
+
+        assert "store;dur=" in response.headers["Server-Timing"]
+        assert "total;dur=" in response.headers["Server-Timing"]
+
+    def test_page_response_times_api_calls_and_render(self, client):
+        response = client.get("/home")
+
+        assert "api;dur=" in response.headers["Server-Timing"]
+        assert "render;dur=" in response.headers["Server-Timing"]
+
+
+class TestMetricsEndpoint:
+    def test_metrics_requires_api_key(self, client):
+        assert client.get("/metrics").status_code == 401
+
+    def test_metrics_exposes_route_histograms(self, client):
+        custom_key = "custom-test-key"
+        with patch.dict(os.environ, {"API_KEY": custom_key}):
+            client.get("/paths")
+            client.get("/home")
+
+            response = client.get("/metrics", headers={"X-API-Key": custom_key})
+            text = response.data.decode()
+
+            assert response.status_code == 200
+            assert response.mimetype == "text/plain"
+            assert "# TYPE http_request_duration_seconds histogram" in text
+            assert 'http_request_duration_seconds_count{route="/paths",method="GET",status="200"}' in text
+            assert 'http_request_phase_duration_seconds_count{route="/home",phase="render"}' in text
+            assert "# TYPE roadmap_store_evictions_total counter" in text
+            assert "roadmap_store_entries " in text
+
+
+class TestHistogram:
+    def test_observe_uses_upper_bound_buckets(self):
+        histogram = Histogram()
+        histogram.observe(BUCKETS[0])
+        histogram.observe(BUCKETS[1] / 2 + BUCKETS[0] / 2)
+        histogram.observe(100)
+
+        assert histogram.counts[0] == 1
+        assert histogram.counts[1] == 1
+        assert histogram.counts[-1] == 1
+
+    def test_render_is_cumulative(self):
+        metrics = Metrics()
+        metrics.observe("/x", "GET", 200, 0.0001, {"store": 0.00005})
+        metrics.observe("/x", "GET", 200, 10, {})
+
+        text = metrics.render()
+
+        assert 'http_request_duration_seconds_bucket{route="/x",method="GET",status="200",le="0.0005"} 1' in text
+        assert 'http_request_duration_seconds_bucket{route="/x",method="GET",status="200",le="+Inf"} 2' in text
+        assert 'http_request_duration_seconds_count{route="/x",method="GET",status="200"} 2' in text
+        assert 'http_request_phase_duration_seconds_count{route="/x",phase="store"} 1' in text
+
+
+class TestStoreStats:
+    def test_render_store_stats(self):
+        text = render_store_stats({"entries": 3, "hits": 5})
+
+        assert "# TYPE roadmap_store_entries gauge\nroadmap_store_entries 3\n" in text
+        assert "# TYPE roadmap_store_hits_total counter\nroadmap_store_hits_total 5\n" in text
+        assert render_store_stats({}) == ""
@@ -0,0 +1,186 @@
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from api import ratelimit
+from api.ratelimit import KeyIndex, MemoryTokenBuckets, RateLimiter, SQLiteTokenBuckets, api_keys
+from tests.helpers import FakeClock
+
+KEYS = {"API_KEY": "ui-key", "API_KEYS": "mobile:mobile-key, partner:partner-key:120"}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def buckets(request, tmp_path):
+    if request.param == "memory":
+        return MemoryTokenBuckets(clock=FakeClock())
+    return SQLiteTokenBuckets(str(tmp_path / "rate-limits.sqlite3"), clock=FakeClock())
+
+
+@pytest.fixture
+def limited_client(client):
+    app = client.application
+    limiter = app.extensions["rate_limiter"]
+    app.extensions["rate_limiter"] = RateLimiter(MemoryTokenBuckets(), max_concurrent=1)
+    app.config.update(RATE_LIMIT_PER_MINUTE=60, RATE_LIMIT_BURST=2)
+    try:
+        with patch.dict(os.environ, KEYS):
+            yield client
+    finally:
+        app.extensions["rate_limiter"] = limiter
+        app.config["RATE_LIMIT_PER_MINUTE"] = 0
+
+
+def create_from_ui(client, address):
+    response = client.post(
+        "/create-roadmap",
+        data={"name": "Visitor", "interests": ["ai"], "timeframe": "3"},
+        environ_base={"REMOTE_ADDR": address},
+    )
+    return "/roadmaps/" in response.headers["Location"]
+
+
+def create_batch(client, key, count):
+    return client.post(
+        "/create/batch",
+        headers={"X-API-Key": key},
+        json={"roadmaps": [{"name": "Batched", "interests": ["ai"], "timeframe": 3}] * count},
+        # Reads and closes the streamed body, which gives the request's concurrency slot back
+        buffered=True,
+    )
+
+
+def create(client, key):
+    return client.post(
+        "/create",
+        headers={"X-API-Key": key, "Content-Type": "application/json"},
+        data=json.dumps({"name": "Limited", "interests": ["ai"], "timeframe": 3}),
+    )
+
+
+class TestKeyIndex:
+    def test_looks_up_every_configured_key(self):
+        index = KeyIndex.from_env(KEYS["API_KEY"], KEYS["API_KEYS"])
+
+        assert len(index) == 3
+        assert index.lookup("ui-key").name == "default"
+        assert index.lookup("mobile-key").name == "mobile"
+        assert index.lookup("partner-key").per_minute == 120
+        for key in ("", None, "mobile", "mobile-key ", "unknown"):
+            assert index.lookup(key) is None
+
+    def test_index_is_rebuilt_only_when_the_environment_changes(self):
+        with patch.dict(os.environ, KEYS):
+            index = api_keys()
+            assert api_keys() is index
+        with patch.dict(os.environ, {**KEYS, "API_KEYS": "other:other-key"}):
+            assert api_keys() is not index
+            assert api_keys().lookup("mobile-key") is None
+
+
+class TestTokenBuckets:
+    def test_allows_a_burst_then_refills_at_the_rate(self, buckets):
+        results = [buckets.take("a", rate=1, burst=3) for _ in range(4)]
+
+        assert [quota.allowed for quota in results] == [True, True, True, False]
+        assert [quota.remaining for quota in results] == [2, 1, 0, 0]
+        assert results[-1].retry_after == 1
+        assert buckets.take("b", rate=1, burst=3).allowed
+
+        buckets.clock.now += 1
+        assert buckets.take("a", rate=1, burst=3).allowed
+        assert not buckets.take("a", rate=1, burst=3).allowed
+
+    def test_costly_requests_need_their_cost_up_to_the_burst(self, buckets):
+        buckets.take("a", rate=1, burst=3)
+        assert not buckets.take("a", rate=1, burst=3, cost=3).allowed
+
+        buckets.clock.now += 1
+        quota = buckets.take("a", rate=1, burst=3, cost=10)
+        assert quota.allowed
+        assert quota.remaining == 0
+        assert buckets.take("a", rate=1, burst=3).retry_after == 8
+
+    def test_never_refills_past_the_burst(self, buckets):
+        buckets.take("a", rate=10, burst=2)
+        buckets.clock.now += 3600
+
+        assert buckets.take("a", rate=10, burst=2).remaining == 1
+
+    def test_memory_buckets_are_bounded(self):
+        buckets = MemoryTokenBuckets(clock=FakeClock())
+        with patch.object(MemoryTokenBuckets, "MAX_BUCKETS", 2):
+            for name in "abc":
+                buckets.take(name, rate=1, burst=3)
+
+        assert list(buckets._buckets) == ["b", "c"]
+
+    def test_sqlite_buckets_idle_past_the_purge_age_are_deleted(self, tmp_path):
+        buckets = SQLiteTokenBuckets(str(tmp_path / "rate-limits.sqlite3"), clock=FakeClock())
+        with patch.object(SQLiteTokenBuckets, "PURGE_INTERVAL", 2):
+            buckets.take("idle", rate=1, burst=3)
+            buckets.clock.now += SQLiteTokenBuckets.PURGE_AGE + 1
+            buckets.take("active", rate=1, burst=3)
+
+        names = buckets._connection().execute("SELECT name FROM rate_limits").fetchall()
+        assert names == [("active",)]
+
+
+class TestRateLimitedRoutes:
+    def test_reports_remaining_quota(self, limited_client):
+        response = create(limited_client, "mobile-key")
+
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Limit"] == "2"
+        assert response.headers["RateLimit-Remaining"] == "1"
+        assert response.headers["RateLimit-Reset"] == "1"
+
+    def test_each_key_has_its_own_bucket(self, limited_client):
+        assert [create(limited_client, "mobile-key").status_code for _ in range(3)] == [200, 200, 429]
+        assert create(limited_client, "ui-key").status_code == 200
+
+        response = create(limited_client, "mobile-key")
+        assert response.headers["Retry-After"] == "1"
+        assert response.headers["RateLimit-Remaining"] == "0"
+        assert response.json["error"] == "Rate limit exceeded"
+
+    def test_ui_visitors_have_their_own_buckets(self, limited_client):
+        assert [create_from_ui(limited_client, "192.0.2.1") for _ in range(3)] == [True, True, False]
+        assert create_from_ui(limited_client, "192.0.2.2")
+        assert create(limited_client, "ui-key").status_code == 200
+
+    def test_batches_cost_a_token_per_roadmap(self, limited_client):
+        assert create_batch(limited_client, "mobile-key", 2).status_code == 200
+        assert create(limited_client, "mobile-key").status_code == 429
+
+        response = create_batch(limited_client, "partner-key", 5)
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Remaining"] == "0"
+        assert create(limited_client, "partner-key").headers["Retry-After"] == "2"
+
+    def test_rejected_requests_do_no_work(self, limited_client):
+        create(limited_client, "mobile-key")
+        create(limited_client, "mobile-key")
+        with patch("api.app.generate_roadmap") as generate:
+            assert create(limited_client, "mobile-key").status_code == 429
+        generate.assert_not_called()
+
+    def test_sheds_load_past_the_concurrency_limit(self, limited_client):
+        limiter = limited_client.application.extensions["rate_limiter"]
+        limiter._slots.acquire()
+        try:
+            with patch("api.app.generate_roadmap") as generate:
+                response = create(limited_client, "partner-key")
+        finally:
+            limiter._slots.release()
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
+        generate.assert_not_called()
+        assert create(limited_client, "partner-key").status_code == 200
+
+    def test_invalid_key_is_rejected_before_rate_limiting(self, limited_client):
+        with patch.object(ratelimit.MemoryTokenBuckets, "take") as take:
+            assert create(limited_client, "wrong-key").status_code == 401
+        take.assert_not_called()
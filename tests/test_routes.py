@@ -2,7 +2,12 @@ import json
 import os
 from unittest.mock import patch
 
-from api.app import DEV_PATHS, ROADMAPS_DB
+import pytest
+
+import api.app
+from api.app import DEV_PATHS, ROADMAPS_DB, serialize_roadmap
+from api.roadmaps import generate_roadmap
+from api.store import MemoryStore
 
 
 class TestPublicEndpoints:
@@ -37,6 +42,53 @@ class TestPublicEndpoints:
             assert path in data["available_paths"]
 
 
+class TestCacheHeaders:
+    def test_static_endpoints_are_cacheable(self, client):
+        for path in ("/", "/paths"):
+            response = client.get(path)
+
+            assert response.cache_control.public is True
+            assert response.cache_control.max_age == client.application.config["STATIC_CACHE_MAX_AGE"]
+            assert response.headers["ETag"]
+
+            response = client.get(path, headers={"If-None-Match": response.headers["ETag"]})
+            assert response.status_code == 304
+
+    def test_quote_is_not_cached(self, client):
+        response = client.get("/quote")
+
+        assert response.cache_control.no_store is True
+
+    def test_roadmap_etag_changes_with_version(self, client, sample_roadmap_data):
+        custom_key = "custom-test-key"
+        with patch.dict(os.environ, {"API_KEY": custom_key}):
+            create_response = client.post(
+                "/create",
+                headers={"X-API-Key": custom_key, "Content-Type": "application/json"},
+                data=json.dumps(sample_roadmap_data),
+            )
+            roadmap_id = json.loads(create_response.data)["roadmap_id"]
+
+            response = client.get(f"/roadmap/{roadmap_id}")
+            etag = response.headers["ETag"]
+            assert response.cache_control.no_cache
+
+            response = client.get(f"/roadmap/{roadmap_id}", headers={"If-None-Match": etag})
+            assert response.status_code == 304
+            assert response.data == b""
+
+            client.put(
+                f"/roadmap/{roadmap_id}/milestone/0",
+                headers={"X-API-Key": custom_key, "Content-Type": "application/json"},
+                data=json.dumps({"completed": True}),
+            )
+
+            response = client.get(f"/roadmap/{roadmap_id}", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etag
+            assert json.loads(response.data)["version"] == 2
+
+
 class TestTimeroadmapCreation:
 
     def test_create_time_roadmap_success(self, client, sample_roadmap_data):
@@ -130,6 +182,19 @@ class TestTimeroadmapCreation:
             assert response2.status_code == 400
             assert response3.status_code == 400
 
+    def test_create_roadmap_invalid_name(self, client, sample_roadmap_data):
+        custom_key = "custom-test-key"
+        with patch.dict(os.environ, {"API_KEY": custom_key}):
+            for name in (123, None, "\ud800"):
+                response = client.post(
+                    "/create",
+                    headers={"X-API-Key": custom_key, "Content-Type": "application/json"},
+                    data=json.dumps({**sample_roadmap_data, "name": name}),
+                )
+
+                # orjson already refuses lone surrogates while parsing the body
+                assert response.status_code == 400, name
+
 
 class TestTimeroadmapRetrieval:
     def test_get_time_roadmap(self, client, sample_roadmap_data):
@@ -152,6 +217,8 @@ class TestTimeroadmapRetrieval:
             assert data["name"] == sample_roadmap_data["name"]
             assert "roadmap" in data
             assert len(data["roadmap"]) > 0
+            assert data["completed_count"] == 0
+            assert data["progress"] == 0
 
     def test_get_nonexistent_time_roadmap(self, client):
         custom_key = "custom-test-key"
@@ -193,6 +260,31 @@ class TestMilestoneUpdates:
             # Verify the update in the database
             assert ROADMAPS_DB[roadmap_id]["roadmap"][0]["completed"] is True
 
+    def test_update_milestone_progress(self, client):
+        custom_key = "custom-test-key"
+        with patch.dict(os.environ, {"API_KEY": custom_key}):
+            create_response = client.post(
+                "/create",
+                headers={"X-API-Key": custom_key, "Content-Type": "application/json"},
+                data=json.dumps({"name": "Test User", "interests": ["ai"], "timeframe": 2}),
+            )
+            roadmap_id = json.loads(create_response.data)["roadmap_id"]
+
+            for index in (0, 0, 1):
+                response = client.put(
+                    f"/roadmap/{roadmap_id}/milestone/{index}",
+                    headers={"X-API-Key": custom_key, "Content-Type": "application/json"},
+                    data=json.dumps({"completed": True}),
+                )
+                data = json.loads(response.data)
+
+            assert data["progress"] == 100
+            assert data["all_completed"] is True
+
+            data = json.loads(client.get(f"/roadmap/{roadmap_id}").data)
+            assert data["completed_count"] == 2
+            assert data["progress"] == 100
+
     def test_update_invalid_milestone_index(self, client, sample_roadmap_data):
         custom_key = "custom-test-key"
         with patch.dict(os.environ, {"API_KEY": custom_key}):
@@ -241,3 +333,217 @@ class TestMilestoneUpdates:
 
             assert response.status_code == 400
             assert "error" in json.loads(response.data)
+
+
+class TestBulkMilestoneUpdates:
+    def patch(self, client, roadmap_id, body, key="custom-test-key"):
+        return client.patch(
+            f"/roadmap/{roadmap_id}/milestones",
+            headers={"X-API-Key": key, "Content-Type": "application/json"},
+            data=json.dumps(body),
+        )
+
+    def create(self, client, key="custom-test-key"):
+        response = client.post(
+            "/create",
+            headers={"X-API-Key": key, "Content-Type": "application/json"},
+            data=json.dumps({"name": "Bulk User", "interests": ["ai"], "timeframe": 2}),
+        )
+        return json.loads(response.data)["roadmap_id"]
+
+    def test_applies_all_changes_at_once(self, client):
+        with patch.dict(os.environ, {"API_KEY": "custom-test-key"}):
+            roadmap_id = self.create(client)
+
+            response = self.patch(client, roadmap_id, {"milestones": {"0": True, "1": True}})
+            data = json.loads(response.data)
+
+            assert response.status_code == 200
+            assert data["milestones"]["0"]["completed"] is True
+            assert data["completed_count"] == 2
+            assert data["all_completed"] is True
+            assert data["progress"] == 100
+
+            data = json.loads(self.patch(client, roadmap_id, {"milestones": {"1": False}}).data)
+            assert data["completed_count"] == 1
+
+    def test_invalid_index_changes_nothing(self, client):
+        with patch.dict(os.environ, {"API_KEY": "custom-test-key"}):
+            roadmap_id = self.create(client)
+
+            response = self.patch(client, roadmap_id, {"milestones": {"0": True, "99": True}})
+
+            assert response.status_code == 400
+            assert "99" in json.loads(response.data)["error"]
+            assert ROADMAPS_DB[roadmap_id]["completed_count"] == 0
+            assert ROADMAPS_DB[roadmap_id]["version"] == 1
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            {},
+            {"milestones": {}},
+            {"milestones": [True]},
+            {"milestones": {"a": True}},
+            {"milestones": {"0": "yes"}},
+            {"milestones": {"²": True}},
+            {"milestones": {"01": True}},
+            {"milestones": {str(2**64): True}},
+            {"milestones": {"9" * 5000: True}},
+        ],
+    )
+    def test_rejects_invalid_bodies(self, client, body):
+        with patch.dict(os.environ, {"API_KEY": "custom-test-key"}):
+            roadmap_id = self.create(client)
+
+            assert self.patch(client, roadmap_id, body).status_code == 400
+            assert self.patch(client, "nonexistent-id", body).status_code == 404
+
+    def test_requires_api_key(self, client):
+        with patch.dict(os.environ, {"API_KEY": "custom-test-key"}):
+            assert self.patch(client, "any", {"milestones": {"0": True}}, key="wrong").status_code == 401
+
+
+class TestBatchRetrieval:
+    def test_get_roadmaps_reports_missing_ids(self, client, sample_roadmap_data):
+        custom_key = "custom-test-key"
+        with patch.dict(os.environ, {"API_KEY": custom_key}):
+            create_response = client.post(
+                "/create",
+                headers={"X-API-Key": custom_key, "Content-Type": "application/json"},
+                data=json.dumps(sample_roadmap_data),
+            )
+            roadmap_id = json.loads(create_response.data)["roadmap_id"]
+
+            response = client.get(f"/roadmaps?ids={roadmap_id},nonexistent-id")
+            data = json.loads(response.data)
+
+            assert response.status_code == 200
+            assert [result["id"] for result in data["results"]] == [roadmap_id, "nonexistent-id"]
+            assert data["results"][0]["roadmap"]["name"] == sample_roadmap_data["name"]
+            assert "error" in data["results"][1]
+
+    def test_get_roadmaps_missing_ids(self, client):
+        response = client.get("/roadmaps?ids=")
+
+        assert response.status_code == 400
+        assert "error" in json.loads(response.data)
+
+    def test_get_roadmaps_over_limit(self, client):
+        limit = client.application.config["ROADMAP_BATCH_LIMIT"]
+        ids = ",".join(f"id-{i}" for i in range(limit + 1))
+
+        response = client.get(f"/roadmaps?ids={ids}")
+
+        assert response.status_code == 400
+
+
+class TestBatchCreation:
+    def test_create_batch_streams_one_line_per_item(self, client, sample_roadmap_data):
+        custom_key = "custom-test-key"
+        with patch.dict(os.environ, {"API_KEY": custom_key}):
+            invalid_data = sample_roadmap_data.copy()
+            invalid_data["timeframe"] = 30
+
+            response = client.post(
+                "/create/batch",
+                headers={"X-API-Key": custom_key, "Content-Type": "application/json"},
+                data=json.dumps({"roadmaps": [sample_roadmap_data, invalid_data, {"name": "No interests"}]}),
+            )
+            lines = [json.loads(line) for line in response.data.decode().splitlines()]
+
+            assert response.status_code == 200
+            assert response.mimetype == "application/x-ndjson"
+            assert [line["index"] for line in lines] == [0, 1, 2]
+            assert lines[0]["roadmap_id"] in ROADMAPS_DB
+            assert lines[0]["summary"]["name"] == sample_roadmap_data["name"]
+            assert lines[1]["error"] == "Timeframe must be between 1 and 24 months"
+            assert "required_fields" in lines[2]
+
+    def test_create_batch_over_limit(self, client, sample_roadmap_data):
+        custom_key = "custom-test-key"
+        with patch.dict(os.environ, {"API_KEY": custom_key}):
+            limit = client.application.config["CREATE_BATCH_LIMIT"]
+
+            response = client.post(
+                "/create/batch",
+                headers={"X-API-Key": custom_key, "Content-Type": "application/json"},
+                data=json.dumps({"roadmaps": [sample_roadmap_data] * (limit + 1)}),
+            )
+
+            assert response.status_code == 400
+
+    def test_create_batch_requires_list(self, client):
+        custom_key = "custom-test-key"
+        with patch.dict(os.environ, {"API_KEY": custom_key}):
+            response = client.post(
+                "/create/batch",
+                headers={"X-API-Key": custom_key, "Content-Type": "application/json"},
+                data=json.dumps({"roadmaps": {}}),
+            )
+
+            assert response.status_code == 400
+            assert "error" in json.loads(response.data)
+
+
+class TestListRoadmaps:
+    @pytest.fixture
+    def store(self, monkeypatch):
+        store = MemoryStore(serialize_roadmap)
+        monkeypatch.setattr(api.app, "ROADMAPS_DB", store)
+        return store
+
+    def add(self, store, interests, created_at, completed=0):
+        roadmap = generate_roadmap({"name": "Listed", "interests": interests, "timeframe": 3})
+        roadmap["created_at"] = created_at
+        store.put(roadmap)
+        for i in range(completed):
+            store.update_milestone(roadmap["id"], i, True)
+        return roadmap["id"]
+
+    def test_pages_through_all_roadmaps_in_creation_order(self, client, store):
+        ids = [self.add(store, ["frontend"], f"2026-01-{day:02d}") for day in range(1, 6)]
+
+        seen = []
+        url = "/roadmaps?limit=2"
+        while True:
+            data = json.loads(client.get(url).data)
+            seen.extend(result["id"] for result in data["results"])
+            if data["next_cursor"] is None:
+                break
+            url = f"/roadmaps?limit=2&cursor={data['next_cursor']}"
+
+        assert seen == ids
+        assert data["results"][0]["roadmap"]["progress"] == 0
+
+    def test_filters_by_interest_status_and_date(self, client, store):
+        devops = self.add(store, ["devops", "ai"], "2026-02-01")
+        self.add(store, ["frontend"], "2026-02-01")
+        devops_started = self.add(store, ["devops"], "2026-02-03", completed=1)
+        old_devops = self.add(store, ["devops"], "2025-12-31")
+
+        def listed(query):
+            return [result["id"] for result in json.loads(client.get(f"/roadmaps?{query}").data)["results"]]
+
+        assert sorted(listed("interest=devops&created_from=2026-01-01")) == sorted([devops, devops_started])
+        assert listed("interest=devops&status=in_progress") == [devops_started]
+        assert listed("status=not_started&created_to=2026-01-01") == [old_devops]
+        assert listed("interest=ai") == [devops]
+
+    def test_follows_milestone_updates(self, client, store):
+        roadmap_id = self.add(store, ["mobile"], "2026-03-01")
+        for i in range(len(store[roadmap_id]["roadmap"])):
+            store.update_milestone(roadmap_id, i, True)
+
+        assert [r["id"] for r in json.loads(client.get("/roadmaps?status=completed").data)["results"]] == [roadmap_id]
+        assert json.loads(client.get("/roadmaps?status=not_started").data)["results"] == []
+
+    @pytest.mark.parametrize(
+        "query",
+        ["interest=cooking", "status=done", "created_from=yesterday", "limit=0", "limit=1000", "cursor=%%%"],
+    )
+    def test_rejects_invalid_arguments(self, client, store, query):
+        response = client.get(f"/roadmaps?{query}")
+
+        assert response.status_code == 400
+        assert "error" in json.loads(response.data)
@@ -0,0 +1,48 @@
+import datetime
+import itertools
+
+from api.schedule import build_milestones, milestone_schedule
+from api.utils import DEV_PATHS
+
+
+def reference_milestones(interests, timeframe, start_date):
+    roadmap = []
+    for interest in interests:
+        path_data = DEV_PATHS[interest]
+        milestone_count = min(timeframe, len(path_data["milestones"]))
+        for i, milestone in enumerate(path_data["milestones"][:milestone_count]):
+            milestone_date = start_date + datetime.timedelta(days=(i + 1) * (timeframe * 30 // (milestone_count + 1)))
+            roadmap.append(
+                {
+                    "path": interest,
+                    "milestone": milestone,
+                    "target_date": milestone_date.strftime("%Y-%m-%d"),
+                    "completed": False,
+                }
+            )
+    roadmap.sort(key=lambda x: x["target_date"])
+    return roadmap
+
+
+class TestMilestoneSchedule:
+    def test_matches_reference_for_every_combination(self):
+        start_date = datetime.datetime(2025, 1, 31, 23, 59)
+        for size in (1, 2, 3):
+            for interests in itertools.permutations(DEV_PATHS, size):
+                for timeframe in range(1, 25):
+                    assert build_milestones(list(interests), timeframe, start_date) == reference_milestones(
+                        interests, timeframe, start_date
+                    )
+
+    def test_schedule_is_memoized(self):
+        milestone_schedule.cache_clear()
+        build_milestones(["frontend", "ai"], 12, datetime.datetime.now())
+        build_milestones(["frontend", "ai"], 12, datetime.datetime.now())
+
+        assert milestone_schedule.cache_info().hits == 1
+
+    def test_milestones_are_fresh_dicts(self):
+        first = build_milestones(["backend"], 6, datetime.datetime.now())
+        first[0]["completed"] = True
+
+        assert build_milestones(["backend"], 6, datetime.datetime.now())[0]["completed"] is False
@@ -0,0 +1,135 @@
+import pytest
+
+from api.app import app as flask_app
+from api.sessions import MemorySessionStore, ServerSideSessionInterface, SQLiteSessionStore
+from tests.helpers import FakeClock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def session_store(request, tmp_path):
+    clock = FakeClock()
+    if request.param == "memory":
+        return MemorySessionStore(ttl=60, clock=clock)
+    return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl=60, clock=clock)
+
+
+@pytest.fixture
+def server_client(session_store):
+    cookie_interface = flask_app.session_interface
+    flask_app.session_interface = ServerSideSessionInterface(session_store)
+    try:
+        with flask_app.test_client() as testing_client:
+            yield testing_client
+    finally:
+        flask_app.session_interface = cookie_interface
+
+
+def create_roadmap(client, name):
+    response = client.post("/create-roadmap", data={"name": name, "interests": ["ai"], "timeframe": "3"})
+    return response.headers["Location"].rsplit("/", 1)[-1]
+
+
+def session_cookie(client):
+    return client.get_cookie(flask_app.config["SESSION_COOKIE_NAME"])
+
+
+class TestSessionStores:
+    def test_round_trip_and_delete(self, session_store):
+        session_store.save("a", '{"x": 1}')
+
+        assert session_store.load("a") == ('{"x": 1}', session_store.clock() + 60)
+        session_store.delete("a")
+        assert session_store.load("a") is None
+        assert session_store.load("missing") is None
+
+    def test_entries_expire(self, session_store):
+        session_store.save("a", "{}")
+        session_store.clock.now += 30
+        session_store.save("b", "{}")
+        session_store.clock.now += 31
+
+        assert session_store.load("a") is None
+        assert session_store.load("b") is not None
+        assert len(session_store) == 1
+
+    def test_memory_store_drops_the_least_recently_saved_past_max_entries(self):
+        store = MemorySessionStore(ttl=60, max_entries=2, clock=FakeClock())
+        for sid in "abc":
+            store.save(sid, "{}")
+        store.save("b", "{}")
+        store.save("d", "{}")
+
+        assert len(store) == 2
+        assert store.load("a") is None and store.load("c") is None
+        assert store.load("b") is not None and store.load("d") is not None
+
+    def test_saving_extends_expiry(self, session_store):
+        session_store.save("a", "{}")
+        session_store.clock.now += 50
+        session_store.save("a", "{}")
+        session_store.clock.now += 50
+
+        assert session_store.load("a") is not None
+
+
+class TestServerSideSessions:
+    def test_cookie_holds_a_fixed_size_id(self, server_client, session_store):
+        roadmap_ids = [create_roadmap(server_client, f"Session User {i}") for i in range(5)]
+        cookie = session_cookie(server_client)
+
+        assert len(cookie.value) == 43
+        for roadmap_id in roadmap_ids:
+            assert roadmap_id not in cookie.value
+        dashboard = server_client.get("/dashboard").data
+        for i in range(5):
+            assert f"Session User {i}".encode() in dashboard
+        # Every roadmap was added under the same id
+        assert session_cookie(server_client).value == cookie.value
+        assert len(session_store) == 1
+
+    def test_unmodified_sessions_are_not_rewritten(self, server_client, session_store):
+        create_roadmap(server_client, "Quiet User")
+        server_client.get("/dashboard")
+        saves = []
+        original = session_store.save
+        session_store.save = lambda *args: saves.append(args) or original(*args)
+
+        response = server_client.get("/dashboard")
+
+        assert saves == []
+        assert "Set-Cookie" not in response.headers
+        assert "Cookie" in response.headers["Vary"]
+
+    def test_sessions_in_use_are_extended(self, server_client, session_store):
+        roadmap_id = create_roadmap(server_client, "Regular User")
+        server_client.get("/dashboard")
+        session_store.clock.now += 40
+        server_client.get("/dashboard")
+        session_store.clock.now += 40
+
+        assert b"Regular User" in server_client.get("/dashboard").data
+        with server_client.session_transaction() as session:
+            assert session["user_roadmaps"] == [roadmap_id]
+
+    def test_expired_session_starts_over(self, server_client, session_store):
+        create_roadmap(server_client, "Lapsed User")
+        old_id = session_cookie(server_client).value
+        session_store.clock.now += 61
+
+        assert b"Lapsed User" not in server_client.get("/dashboard").data
+        create_roadmap(server_client, "Returning User")
+        assert session_cookie(server_client).value != old_id
+
+    def test_unknown_or_legacy_cookie_is_ignored(self, server_client):
+        server_client.set_cookie(flask_app.config["SESSION_COOKIE_NAME"], "eyJ1c2VyX3JvYWRtYXBzIjpbXX0.signed")
+
+        assert server_client.get("/dashboard").status_code == 200
+
+    def test_emptied_session_is_deleted(self, server_client, session_store):
+        create_roadmap(server_client, "Leaving User")
+        server_client.get("/dashboard")
+        with server_client.session_transaction() as session:
+            session.clear()
+
+        assert len(session_store) == 0
+        assert session_cookie(server_client) is None
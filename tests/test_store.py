@@ -0,0 +1,639 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from api import journal
+from api.roadmaps import generate_roadmap
+from api.store import (
+    ENTRY_OVERHEAD,
+    CachedStore,
+    DurableStore,
+    MemoryStore,
+    SQLiteStore,
+    create_store,
+    end_date_deadline,
+    record_size,
+)
+from tests.helpers import FakeClock
+
+
+def make_roadmap(roadmap_id, milestones=3):
+    return {
+        "id": roadmap_id,
+        "name": "Store User",
+        "roadmap": [{"path": "backend", "milestone": f"M{i}", "completed": False} for i in range(milestones)],
+        "completed_count": 0,
+        "version": 1,
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite", "cached", "durable"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryStore()
+    elif request.param == "durable":
+        store = DurableStore(MemoryStore(), str(tmp_path / "roadmaps.snapshot"))
+        yield store
+        store.close()
+    else:
+        store = SQLiteStore(str(tmp_path / "roadmaps.sqlite3"))
+        yield store if request.param == "sqlite" else CachedStore(store, MemoryStore(max_entries=1, shards=1))
+        store.close()
+
+
+# Switch threads far more often than usual so races show up within a short test
+@pytest.fixture
+def fast_switching():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+class TestRoadmapStore:
+    def test_put_and_get(self, store):
+        store.put(make_roadmap("a"))
+
+        assert store.get("a")["name"] == "Store User"
+        assert store["a"]["id"] == "a"
+        assert "a" in store
+        assert "missing" not in store
+        assert store.get("missing") is None
+        assert len(store) == 1
+        with pytest.raises(KeyError):
+            store["missing"]
+
+    def test_get_many(self, store):
+        store.put(make_roadmap("a"))
+        store.put(make_roadmap("b"))
+
+        roadmaps = store.get_many(["a", "missing", "b"])
+
+        assert sorted(roadmaps) == ["a", "b"]
+
+    def test_put_many(self, store):
+        store.put_many([make_roadmap("a"), make_roadmap("b")])
+
+        assert len(store) == 2
+        assert store.get("b")["id"] == "b"
+
+    def test_update_milestone(self, store):
+        store.put(make_roadmap("a"))
+
+        roadmap = store.update_milestone("a", 1, True)
+
+        assert [m["completed"] for m in roadmap["roadmap"]] == [False, True, False]
+        assert store["a"]["roadmap"][1]["completed"] is True
+
+    def test_update_milestone_tracks_completed_count(self, store):
+        store.put(make_roadmap("a"))
+
+        assert store.update_milestone("a", 0, True)["completed_count"] == 1
+        assert store.update_milestone("a", 0, True)["completed_count"] == 1
+        assert store.update_milestone("a", 2, True)["completed_count"] == 2
+        assert store.update_milestone("a", 0, False)["completed_count"] == 1
+        assert store["a"]["completed_count"] == 1
+
+    def test_update_milestone_bumps_version_on_change(self, store):
+        store.put(make_roadmap("a"))
+
+        assert store.update_milestone("a", 0, True)["version"] == 2
+        assert store.update_milestone("a", 0, True)["version"] == 2
+        assert store.update_milestone("a", 0, False)["version"] == 3
+
+    def test_serialized_body_follows_updates(self, store):
+        store.put(make_roadmap("a"))
+        version, body = store.get_serialized("a")
+
+        store.update_milestone("a", 0, True)
+        new_version, new_body = store.get_serialized("a")
+
+        assert json.loads(body)["roadmap"][0]["completed"] is False
+        assert json.loads(new_body)["roadmap"][0]["completed"] is True
+        assert json.loads(new_body) == store["a"]
+        assert (version, new_version) == (1, 2)
+        assert store.get_serialized("missing") is None
+        assert store.get_many_serialized(["a", "missing"]) == {"a": (2, new_body)}
+
+    def test_update_milestone_errors(self, store):
+        store.put(make_roadmap("a"))
+
+        with pytest.raises(KeyError):
+            store.update_milestone("missing", 0, True)
+        with pytest.raises(IndexError):
+            store.update_milestone("a", 3, True)
+        with pytest.raises(IndexError):
+            store.update_milestone("a", -1, True)
+        with pytest.raises(IndexError):
+            store.update_milestone("a", 2**64, True)
+
+    def test_update_milestones_is_all_or_nothing(self, store):
+        store.put(make_roadmap("a"))
+
+        with pytest.raises(IndexError):
+            store.update_milestones("a", {0: True, 3: True})
+        assert store.get("a")["completed_count"] == 0
+
+        roadmap = store.update_milestones("a", {0: True, 2: True, 1: False})
+
+        assert [m["completed"] for m in roadmap["roadmap"]] == [True, False, True]
+        assert roadmap["completed_count"] == 2
+        assert roadmap["version"] == 3
+        assert store.get_serialized("a")[0] == 3
+        with pytest.raises(KeyError):
+            store.update_milestones("missing", {0: True})
+
+    def test_concurrent_updates_keep_invariants(self, store, fast_switching):
+        threads, rounds = 8, 50
+        store.put(make_roadmap("a", milestones=threads))
+        barrier = threading.Barrier(threads + 1)
+        errors = []
+
+        # Each writer owns one milestone and flips it every round, so every call is a change
+        def write(milestone_index):
+            barrier.wait()
+            for i in range(rounds):
+                roadmap = store.update_milestone("a", milestone_index, i % 2 == 0)
+                if roadmap["completed_count"] != sum(m["completed"] for m in roadmap["roadmap"]):
+                    errors.append(roadmap)
+
+        def read():
+            barrier.wait()
+            for _ in range(rounds):
+                roadmap = store.get("a")
+                if roadmap["completed_count"] != sum(m["completed"] for m in roadmap["roadmap"]):
+                    errors.append(roadmap)
+
+        workers = [threading.Thread(target=write, args=(i,)) for i in range(threads)]
+        workers.append(threading.Thread(target=read))
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        roadmap = store.get("a")
+        assert errors == []
+        assert roadmap["version"] == 1 + threads * rounds
+        assert roadmap["completed_count"] == sum(m["completed"] for m in roadmap["roadmap"]) == 0
+        assert store.get_serialized("a")[0] == roadmap["version"]
+
+    def test_list_ids_pages_by_creation_time(self, store):
+        store.put_many(
+            {**make_roadmap(f"id-{i}"), "created_at": f"2026-01-0{i % 3 + 1}", "interests": ["backend"]}
+            for i in range(7)
+        )
+
+        ids, next_key = store.list_ids(limit=4)
+        rest, last_key = store.list_ids(after=next_key, limit=4)
+
+        assert ids + rest == ["id-0", "id-3", "id-6", "id-1", "id-4", "id-2", "id-5"]
+        assert next_key == ("2026-01-02", "id-1")
+        assert last_key is None
+        assert store.list_ids(interest="backend", created_from="2026-01-03")[0] == ["id-2", "id-5"]
+        assert store.list_ids(interest="frontend") == ([], None)
+
+    def test_list_ids_follows_status_changes(self, store):
+        store.put({**make_roadmap("a", milestones=2), "created_at": "2026-01-01", "interests": ["ai", "ai"]})
+
+        assert store.list_ids(interest="ai", status="not_started")[0] == ["a"]
+        store.update_milestone("a", 0, True)
+        assert store.list_ids(interest="ai", status="not_started")[0] == []
+        assert store.list_ids(interest="ai", status="in_progress")[0] == ["a"]
+        store.update_milestone("a", 1, True)
+        assert store.list_ids(status="completed")[0] == ["a"]
+
+
+class TestSQLiteStore:
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "roadmaps.sqlite3")
+        SQLiteStore(path).put(make_roadmap("a"))
+
+        assert SQLiteStore(path).get("a")["id"] == "a"
+
+    def test_backfills_the_listing_index(self, tmp_path):
+        path = str(tmp_path / "roadmaps.sqlite3")
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE roadmaps (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        roadmap = {**make_roadmap("a"), "created_at": "2026-01-01", "interests": ["devops"]}
+        connection.execute("INSERT INTO roadmaps VALUES (?, ?)", ("a", json.dumps(roadmap)))
+        connection.commit()
+        connection.close()
+
+        assert SQLiteStore(path).list_ids(interest="devops", status="not_started")[0] == ["a"]
+
+    def test_uses_wal_and_reuses_connection(self, tmp_path):
+        store = SQLiteStore(str(tmp_path / "roadmaps.sqlite3"))
+
+        assert store._connection() is store._connection()
+        assert store._connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+        connections = []
+        thread = threading.Thread(target=lambda: connections.append(store._connection()))
+        thread.start()
+        thread.join()
+        assert connections[0] is not store._connection()
+
+    def test_create_store_unknown_backend(self):
+        with pytest.raises(ValueError):
+            create_store("unknown")
+
+
+class TestMemoryStore:
+    def test_serializes_once_per_write(self):
+        calls = []
+        store = MemoryStore(serialize=lambda roadmap: calls.append(roadmap["id"]) or b"{}")
+        store.put(make_roadmap("a"))
+
+        store.get_serialized("a")
+        store.get_serialized("a")
+        assert calls == ["a"]
+
+        store.update_milestone("a", 0, True)
+        store.get_serialized("a")
+        store.get_serialized("a")
+        assert calls == ["a", "a"]
+
+    def test_body_cache_is_bounded(self):
+        calls = []
+        store = MemoryStore(
+            serialize=lambda roadmap: calls.append(roadmap["id"]) or b"{}", body_cache_size=1, shards=1
+        )
+        store.put(make_roadmap("a"))
+        store.put(make_roadmap("b"))
+
+        store.get_serialized("a")
+        store.get_serialized("a")
+
+        assert calls == ["a", "b", "a"]
+
+    def test_contended_toggles_on_one_milestone(self, fast_switching):
+        store = MemoryStore(shards=4)
+        store.put(make_roadmap("a"))
+        barrier = threading.Barrier(16)
+
+        def toggle(completed):
+            barrier.wait()
+            for _ in range(1000):
+                store.update_milestone("a", 0, completed)
+                completed = not completed
+
+        workers = [threading.Thread(target=toggle, args=(i % 2 == 0,)) for i in range(16)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        # Every version bump is exactly one flip of the flag, which starts out False
+        roadmap = store.get("a")
+        assert roadmap["completed_count"] == int(roadmap["roadmap"][0]["completed"])
+        assert roadmap["roadmap"][0]["completed"] == ((roadmap["version"] - 1) % 2 == 1)
+
+    def test_plain_records_are_isolated_from_callers(self):
+        store = MemoryStore()
+        roadmap = make_roadmap("a")
+        store.put(roadmap)
+
+        roadmap["roadmap"][0]["completed"] = True
+        store.get("a")["roadmap"][1]["completed"] = True
+        updated = store.update_milestone("a", 2, True)
+        updated["completed_count"] = 99
+
+        assert [m["completed"] for m in store.get("a")["roadmap"]] == [False, False, True]
+        assert store.get("a")["completed_count"] == 1
+
+    def test_roadmaps_are_spread_over_shards(self):
+        store = MemoryStore(shards=8)
+        store.put_many(make_roadmap(f"id-{i}") for i in range(200))
+
+        assert len(store) == 200
+        assert all(shard.roadmaps for shard in store._shards)
+
+
+class TestBoundedMemoryStore:
+    def test_evicts_least_recently_used_past_max_entries(self):
+        store = MemoryStore(shards=1, max_entries=2)
+        store.put(make_roadmap("a"))
+        store.put(make_roadmap("b"))
+        store.get("a")
+        store.put(make_roadmap("c"))
+
+        assert "a" in store and "c" in store
+        assert "b" not in store
+        assert store.get_serialized("b") is None
+        assert store.stats()["evictions"] == 1
+
+    def test_evicts_past_max_bytes(self):
+        probe = MemoryStore(shards=1, body_cache_size=0)
+        probe.put(make_roadmap("a"))
+        one = probe.stats()["bytes"]
+        store = MemoryStore(shards=1, body_cache_size=0, max_bytes=one * 3)
+        for roadmap_id in "abcde":
+            store.put(make_roadmap(roadmap_id))
+
+        stats = store.stats()
+        assert stats["entries"] == 3
+        assert stats["bytes"] <= one * 3
+        assert stats["evictions"] == 2
+        assert "a" not in store and "e" in store
+
+    def test_drops_cached_bodies_before_evicting(self):
+        probe = MemoryStore(shards=1, body_cache_size=0)
+        probe.put(make_roadmap("a"))
+        one = probe.stats()["bytes"]
+        store = MemoryStore(shards=1, max_bytes=one * 3)
+        for roadmap_id in "abc":
+            store.put(make_roadmap(roadmap_id))
+
+        stats = store.stats()
+        assert stats["entries"] == 3
+        assert stats["evictions"] == 0
+        assert stats["bytes"] <= one * 3
+        assert len(store._shards[0].bodies) < 3
+
+    def test_counts_bookkeeping_beyond_the_record(self):
+        store = MemoryStore(shards=1, body_cache_size=0)
+        store.put(make_roadmap("a"))
+        record = store._shards[0].roadmaps["a"]
+
+        assert store.stats()["bytes"] > record_size(record) + ENTRY_OVERHEAD
+
+    def test_rewriting_a_roadmap_does_not_double_count(self):
+        store = MemoryStore(shards=1)
+        store.put(make_roadmap("a"))
+        size = store.stats()["bytes"]
+        store.put(make_roadmap("a"))
+
+        assert store.stats()["entries"] == 1
+        assert store.stats()["bytes"] == size
+
+    def test_idle_ttl_expires_unread_roadmaps(self):
+        clock = FakeClock()
+        store = MemoryStore(shards=1, idle_ttl=60, clock=clock)
+        store.put(make_roadmap("a"))
+        store.put(make_roadmap("b"))
+
+        clock.now += 45
+        assert store.get("a") is not None
+        clock.now += 30
+
+        assert store.get("b") is None
+        assert store.get("a") is not None
+        assert store.stats()["expirations"] == 1
+
+    def test_idle_ttl_drops_expired_roadmaps_on_write(self):
+        clock = FakeClock()
+        store = MemoryStore(shards=1, idle_ttl=60, clock=clock)
+        store.put_many(make_roadmap(roadmap_id) for roadmap_id in "abc")
+        clock.now += 61
+        store.put(make_roadmap("d"))
+
+        assert len(store) == 1
+        assert store.stats()["expirations"] == 3
+
+    def test_expires_after_end_date(self):
+        roadmap = {**make_roadmap("a"), "end_date": "2030-01-31"}
+        clock = FakeClock(end_date_deadline(roadmap) - 1)
+        store = MemoryStore(expire_after_end_date=True, clock=clock)
+        store.put(roadmap)
+
+        assert store.get("a") is not None
+        clock.now += 1
+        assert "a" not in store
+        with pytest.raises(KeyError):
+            store.update_milestone("a", 0, True)
+
+    def test_counts_hits_and_misses(self):
+        store = MemoryStore()
+        store.put(make_roadmap("a"))
+        store.get("a")
+        store.get_serialized("a")
+        store.get("missing")
+
+        assert store.stats() == {
+            "entries": 1,
+            "bytes": store.stats()["bytes"],
+            "hits": 2,
+            "misses": 1,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def test_evicted_roadmaps_leave_the_listing(self):
+        store = MemoryStore(shards=1, max_entries=2)
+        store.put_many({**make_roadmap(roadmap_id), "created_at": "2026-01-01"} for roadmap_id in "abc")
+
+        assert store.list_ids()[0] == ["b", "c"]
+
+
+class TestCachedStore:
+    def test_evicted_roadmaps_are_read_back_from_the_backend(self, tmp_path):
+        backend = SQLiteStore(str(tmp_path / "roadmaps.sqlite3"))
+        store = CachedStore(backend, MemoryStore(shards=1, max_entries=2))
+        store.put_many(make_roadmap(roadmap_id) for roadmap_id in "abc")
+
+        assert len(store.cache) == 2
+        assert len(store) == 3
+        assert store.get("a")["id"] == "a"
+        assert sorted(store.get_many_serialized(["a", "b", "c", "missing"])) == ["a", "b", "c"]
+        assert store.stats()["evictions"] >= 1
+        backend.close()
+
+    def test_writes_go_through_to_the_backend(self, tmp_path):
+        backend = SQLiteStore(str(tmp_path / "roadmaps.sqlite3"))
+        store = CachedStore(backend, MemoryStore())
+        store.put(make_roadmap("a"))
+        store.get_serialized("a")
+
+        store.update_milestone("a", 0, True)
+
+        assert backend.get("a")["completed_count"] == 1
+        assert store.get_serialized("a")[0] == 2
+        assert create_store("sqlite", str(tmp_path / "other.sqlite3"), cache=True).cache is not None
+        backend.close()
+
+    def test_a_stale_read_does_not_replace_a_newer_write(self, tmp_path):
+        backend = SQLiteStore(str(tmp_path / "roadmaps.sqlite3"))
+        store = CachedStore(backend, MemoryStore())
+        backend.put(make_roadmap("a"))
+        read = backend.get
+
+        # The roadmap is updated while the read that missed the cache is still on its way back
+        def racing_get(roadmap_id):
+            roadmap = read(roadmap_id)
+            backend.get = read
+            store.update_milestone(roadmap_id, 0, True)
+            return roadmap
+
+        backend.get = racing_get
+        assert store.get("a")["version"] == 1
+        assert store.cache.get("a")["version"] == 2
+        assert store.get_serialized("a")[0] == 2
+        backend.close()
+
+
+def generated(name, interests=("frontend", "ai")):
+    return generate_roadmap({"name": name, "interests": list(interests), "timeframe": 6})
+
+
+class TestDurableStore:
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "roadmaps.snapshot")
+
+    def reopen(self, store, **options):
+        store.close()
+        return DurableStore(MemoryStore(), store.path, **options)
+
+    def test_restores_logged_writes(self, path):
+        store = DurableStore(MemoryStore(), path)
+        roadmaps = [generated("Ada"), generated("Grace", ["backend"]), make_roadmap("plain")]
+        store.put_many(roadmaps)
+        store.update_milestones(roadmaps[0]["id"], {0: True, 2: True})
+
+        restored = self.reopen(store)
+
+        assert len(restored) == 3
+        for roadmap in roadmaps:
+            assert restored.get(roadmap["id"]) == store.get(roadmap["id"])
+        assert restored.list_ids(interest="ai", status="in_progress")[0] == [roadmaps[0]["id"]]
+
+    def test_snapshot_compacts_the_log(self, path):
+        store = DurableStore(MemoryStore(), path, snapshot_log_bytes=10_000)
+        roadmaps = [generated(f"User {i}") for i in range(10)]
+        for roadmap in roadmaps:
+            store.put(roadmap)
+        store.update_milestone(roadmaps[3]["id"], 1, True)
+        store.snapshot_thread.join()
+
+        assert os.path.getsize(path) > 0
+        assert store.log.size < 10_000
+        restored = self.reopen(store)
+        assert restored.sequence == 11
+        assert [restored.get(roadmap["id"]) for roadmap in roadmaps] == [store.get(r["id"]) for r in roadmaps]
+        assert restored.list_ids(limit=20)[0] == store.list_ids(limit=20)[0]
+
+    def test_snapshots_taken_during_writes_are_consistent(self, path, fast_switching):
+        store = DurableStore(MemoryStore(shards=4), path)
+        roadmaps = [generated(f"User {i}") for i in range(8)]
+        store.put_many(roadmaps)
+        done = threading.Event()
+
+        def write(roadmap):
+            for i in range(200):
+                store.update_milestone(roadmap["id"], i % 5, i % 3 == 0)
+            done.set()
+
+        writers = [threading.Thread(target=write, args=(roadmap,)) for roadmap in roadmaps]
+        for writer in writers:
+            writer.start()
+        while not done.is_set():
+            store.snapshot()
+        for writer in writers:
+            writer.join()
+
+        restored = self.reopen(store)
+        assert [restored.get(r["id"]) for r in roadmaps] == [store.get(r["id"]) for r in roadmaps]
+
+    def test_snapshot_round_trips_every_record(self, path):
+        store = DurableStore(MemoryStore(), path)
+        compact = generated("Compact")
+        oversized = {**generated("Oversized"), "version": 2**70}
+        # Names the API rejects, from roadmaps stored before it did
+        numbered, surrogate = generated(123), generated("\ud800")
+        store.put_many([compact, oversized, numbered, surrogate, {**make_roadmap("plain"), "name": "Zoë"}])
+        store.update_milestone(compact["id"], 4, True)
+        store.snapshot()
+
+        restored = self.reopen(store)
+
+        for roadmap_id in (compact["id"], oversized["id"], numbered["id"], surrogate["id"], "plain"):
+            assert restored.get(roadmap_id) == store.get(roadmap_id)
+        assert restored.get_serialized(compact["id"]) == store.get_serialized(compact["id"])
+
+    def test_drops_a_torn_log_tail(self, path):
+        store = DurableStore(MemoryStore(), path)
+        store.put(make_roadmap("a"))
+        store.update_milestone("a", 0, True)
+        store.close()
+        size = os.path.getsize(f"{path}.log")
+        with open(f"{path}.log", "ab") as log:
+            log.write(journal.encode_entry(3, journal.UPDATE, ["a", [[1, True]]])[:-3])
+
+        restored = DurableStore(MemoryStore(), path)
+        assert os.path.getsize(f"{path}.log") == size
+        assert restored.get("a")["completed_count"] == 1
+        restored.update_milestone("a", 2, True)
+
+        assert self.reopen(restored).get("a")["completed_count"] == 2
+
+    def test_skips_log_entries_the_snapshot_has(self, path):
+        store = DurableStore(MemoryStore(), path)
+        store.put(make_roadmap("a"))
+        store.update_milestone("a", 0, True)
+        with open(f"{path}.log", "rb") as log:
+            before_compaction = log.read()
+        store.snapshot()
+        store.update_milestone("a", 0, False)
+        store.close()
+
+        # As if the process died after writing the snapshot but before compacting the log
+        with open(f"{path}.log", "rb") as log:
+            tail = log.read()
+        with open(f"{path}.log", "wb") as log:
+            log.write(before_compaction + tail)
+
+        roadmap = DurableStore(MemoryStore(), path).get("a")
+        assert (roadmap["version"], roadmap["completed_count"]) == (3, 0)
+
+    def test_rejects_unknown_snapshots(self, path):
+        with open(path, "wb") as snapshot:
+            snapshot.write(b"not a snapshot" * 4)
+
+        with pytest.raises(ValueError):
+            DurableStore(MemoryStore(), path)
+        with pytest.raises(ValueError):
+            DurableStore(MemoryStore(), f"{path}.other", fsync="sometimes")
+
+    @pytest.mark.parametrize("policy, syncs", [("always", 3), ("interval", 1), ("never", 0)])
+    def test_fsync_policies(self, path, policy, syncs):
+        clock = FakeClock()
+        store = DurableStore(MemoryStore(), path, fsync=policy, fsync_interval=10, clock=clock)
+        with patch.object(journal.os, "fsync") as fsync:
+            store.put(make_roadmap("a"))
+            store.update_milestone("a", 0, True)
+            clock.now += 10
+            store.update_milestone("a", 1, True)
+
+        assert fsync.call_count == syncs
+
+    def test_snapshot_interval(self, path):
+        clock = FakeClock()
+        store = DurableStore(MemoryStore(), path, snapshot_interval=60, clock=clock)
+        store.put(make_roadmap("a"))
+        assert not os.path.exists(path)
+
+        clock.now += 60
+        store.update_milestone("a", 0, True)
+        store.snapshot_thread.join()
+
+        assert os.path.exists(path)
+        assert store.log.size == 0
+
+    def test_restore_indexes_like_put(self):
+        roadmaps = [generated(f"User {i}", interests) for i, interests in enumerate([["ai"], ["ai", "devops"]] * 5)]
+        source = MemoryStore()
+        source.put_many(roadmaps)
+        source.update_milestone(roadmaps[0]["id"], 0, True)
+        store = MemoryStore()
+        store.put(roadmaps[1])
+
+        store.restore(source.copy_records()[1])
+
+        assert len(store) == len(store.index) == 10
+        for interest, status in [(None, None), ("ai", "in_progress"), ("devops", "not_started")]:
+            assert store.list_ids(interest, status, limit=20) == source.list_ids(interest, status, limit=20)
@@ -0,0 +1,106 @@
+import os
+
+from flask import template_rendered
+from jinja2 import DictLoader, Environment
+
+from api.app import ROADMAPS_DB
+from api.templating import FragmentCache, TemplateBytecodeCache, precompile
+
+
+def compiled_environment(cache):
+    return Environment(loader=DictLoader({"page.html": "Hello {{ name }}"}), bytecode_cache=cache)
+
+
+class TestTemplateBytecodeCache:
+    def test_writes_and_reuses_bytecode(self, tmp_path):
+        cache = TemplateBytecodeCache(str(tmp_path / "cache"))
+        assert compiled_environment(cache).get_template("page.html").render(name="a") == "Hello a"
+
+        assert len(os.listdir(tmp_path / "cache")) == 1
+        assert compiled_environment(cache).get_template("page.html").render(name="b") == "Hello b"
+
+    def test_falls_back_to_precompiled_directory(self, tmp_path):
+        compiled_environment(TemplateBytecodeCache(str(tmp_path / "build"))).get_template("page.html")
+        cache = TemplateBytecodeCache(str(tmp_path / "runtime"), str(tmp_path / "build"))
+        loads = []
+        original = cache.load_bytecode
+        cache.load_bytecode = lambda bucket: loads.append(original(bucket) or bucket.code is not None)
+
+        compiled_environment(cache).get_template("page.html")
+
+        assert loads == [True]
+
+    def test_key_ignores_absolute_template_path(self):
+        cache = TemplateBytecodeCache("/unused")
+
+        assert cache.get_cache_key("page.html", "/build/api/templates/page.html") == cache.get_cache_key(
+            "page.html", "/var/task/api/templates/page.html"
+        )
+
+    def test_unwritable_directory_is_ignored(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        cache = TemplateBytecodeCache(str(blocker / "cache"))
+
+        assert compiled_environment(cache).get_template("page.html").render(name="c") == "Hello c"
+
+    def test_precompile_covers_every_template(self, tmp_path, client):
+        env = client.application.jinja_env
+        runtime_cache = env.bytecode_cache
+        try:
+            names = precompile(client.application, str(tmp_path))
+        finally:
+            env.bytecode_cache = runtime_cache
+
+        assert "view_roadmap.html" in names
+        assert len(os.listdir(tmp_path)) == len(names)
+
+
+class TestFragmentCache:
+    def test_renders_once_per_key_and_stays_bounded(self):
+        cache = FragmentCache(2)
+        renders = []
+
+        def render(value):
+            return lambda: renders.append(value) or value
+
+        cache.get_or_render("a", render("a"))
+        cache.get_or_render("a", render("a"))
+        cache.get_or_render("b", render("b"))
+        cache.get_or_render("c", render("c"))
+        cache.get_or_render("a", render("a"))
+
+        assert renders == ["a", "b", "c", "a"]
+        assert len(cache) == 2
+
+    def test_disabled_cache_always_renders(self):
+        cache = FragmentCache(0)
+        renders = []
+        for _ in range(2):
+            cache.get_or_render("a", lambda: renders.append(1))
+
+        assert len(renders) == 2
+
+    def test_roadmap_page_reuses_body_until_the_roadmap_changes(self, client):
+        response = client.post(
+            "/create-roadmap", data={"name": "Fragment User", "interests": ["ai"], "timeframe": "3"}
+        )
+        roadmap_id = response.headers["Location"].rsplit("/", 1)[-1]
+        # The first view renders the body and shows the creation flash message
+        client.get(f"/roadmaps/{roadmap_id}")
+        rendered = []
+
+        def record(sender, template, context, **extra):
+            rendered.append(template.name)
+
+        with template_rendered.connected_to(record, client.application):
+            first = client.get(f"/roadmaps/{roadmap_id}").data
+            second = client.get(f"/roadmaps/{roadmap_id}").data
+            ROADMAPS_DB.update_milestone(roadmap_id, 0, True)
+            third = client.get(f"/roadmaps/{roadmap_id}").data
+
+        assert rendered.count("roadmap_body.html") == 1
+        assert rendered.count("view_roadmap.html") == 3
+        assert first == second
+        assert b"Fragment User" in first
+        assert third != first
@@ -2,6 +2,11 @@ import json
 import os
 from unittest.mock import patch
 
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+from api.utils import OrjsonProvider, orjson
+
 
 class TestUtilsFunctions:
     def test_require_api_key_valid(self, client, sample_roadmap_data):
@@ -27,3 +32,19 @@ class TestUtilsFunctions:
             "/create", headers={"Content-Type": "application/json"}, data=json.dumps(sample_roadmap_data)
         )
         assert response.status_code == 401
+
+
+class TestJSONProvider:
+    def test_app_uses_available_provider(self, client):
+        expected = OrjsonProvider if orjson is not None else DefaultJSONProvider
+
+        assert type(client.application.json) is expected
+
+    @pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+    def test_orjson_provider_matches_default(self, client):
+        payload = {"b": [1, 2.5, None, True], "a": {"text": "caf\u00e9"}}
+        provider = OrjsonProvider(client.application)
+
+        assert json.loads(provider.dumps(payload)) == payload
+        assert provider.dumps(payload).index('"a"') < provider.dumps(payload).index('"b"')
+        assert provider.loads(provider.dumps(payload)) == payload
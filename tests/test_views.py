@@ -0,0 +1,168 @@
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from api.app import ROADMAPS_DB
+
+
+class TestInternalDispatch:
+    def test_home_page(self, client):
+        response = client.get("/home")
+
+        assert response.status_code == 200
+        assert b"Map Your Development Journey" in response.data
+
+    def test_create_and_view_roadmap(self, client):
+        response = client.post(
+            "/create-roadmap", data={"name": "Form User", "interests": ["frontend", "ai"], "timeframe": "6"}
+        )
+
+        assert response.status_code == 302
+        roadmap_id = response.headers["Location"].rsplit("/", 1)[-1]
+        assert roadmap_id in ROADMAPS_DB
+
+        response = client.get(f"/roadmaps/{roadmap_id}")
+        assert response.status_code == 200
+        assert b"Form User" in response.data
+
+        response = client.get("/dashboard")
+        assert response.status_code == 200
+        assert b"Form User" in response.data
+
+    def test_dashboard_skips_missing_roadmaps(self, client):
+        response = client.post(
+            "/create-roadmap", data={"name": "Kept User", "interests": ["mobile"], "timeframe": "3"}
+        )
+        roadmap_id = response.headers["Location"].rsplit("/", 1)[-1]
+        with client.session_transaction() as session:
+            session["user_roadmaps"] = ["nonexistent-id", roadmap_id]
+
+        response = client.get("/dashboard")
+
+        assert response.status_code == 200
+        assert b"Kept User" in response.data
+        with client.session_transaction() as session:
+            assert session["user_roadmaps"] == [roadmap_id]
+
+    def test_update_milestone_page(self, client):
+        response = client.post(
+            "/create-roadmap", data={"name": "Toggle User", "interests": ["devops"], "timeframe": "3"}
+        )
+        roadmap_id = response.headers["Location"].rsplit("/", 1)[-1]
+
+        response = client.post(f"/roadmaps/{roadmap_id}/update-milestone/0", data={"completed": "true"})
+
+        assert response.status_code == 302
+        assert ROADMAPS_DB[roadmap_id]["roadmap"][0]["completed"] is True
+
+    def test_update_milestones_page_saves_all_toggles(self, client):
+        response = client.post(
+            "/create-roadmap", data={"name": "Bulk User", "interests": ["devops"], "timeframe": "3"}
+        )
+        roadmap_id = response.headers["Location"].rsplit("/", 1)[-1]
+        milestones = [str(i) for i in range(len(ROADMAPS_DB[roadmap_id]["roadmap"]))]
+
+        response = client.post(
+            f"/roadmaps/{roadmap_id}/update-milestones", data={"milestone": milestones, "completed": ["0", "2"]}
+        )
+
+        assert response.status_code == 302
+        roadmap = ROADMAPS_DB[roadmap_id]
+        assert [i for i, m in enumerate(roadmap["roadmap"]) if m["completed"]] == [0, 2]
+        assert roadmap["version"] == 3
+        assert b"update-milestones" in client.get(f"/roadmaps/{roadmap_id}").data
+
+    def test_http_dispatch_uses_loopback(self, client):
+        client.application.config["API_DISPATCH"] = "http"
+        try:
+            with patch("requests.get") as mock_get:
+                mock_get.return_value.ok = True
+                mock_get.return_value.json.return_value = {"text": "Quote", "author": "Author"}
+                response = client.get("/home")
+
+            assert response.status_code == 200
+            assert mock_get.call_args[0][0] == "http://localhost/quote"
+        finally:
+            client.application.config["API_DISPATCH"] = "internal"
+
+
+def fake_api(responses, delay=0):
+    # Stands in for requests.get, responses maps an endpoint prefix to a JSON body or an exception
+    def get(url, headers=None, timeout=None):
+        time.sleep(delay)
+        endpoint = url.split("/", 3)[-1]
+        for prefix, body in responses.items():
+            if endpoint.startswith(prefix):
+                if isinstance(body, Exception):
+                    raise body
+                return Mock(ok=True, json=Mock(return_value=body))
+        return Mock(ok=False)
+
+    return get
+
+
+class TestDashboardFanOut:
+    @pytest.fixture
+    def http_dispatch(self, client):
+        config = client.application.config
+        saved = {key: config[key] for key in ("API_DISPATCH", "PAGE_DEADLINE")}
+        config["API_DISPATCH"] = "http"
+        yield config
+        config.update(saved)
+
+    def test_loads_page_data_concurrently(self, client, http_dispatch):
+        with client.session_transaction() as session:
+            session["user_roadmaps"] = ["a"]
+        roadmap = {"id": "a", "name": "Fan User", "interests": [], "timeframe": 3, "progress": 0}
+        responses = {
+            "quote": {"text": "Quote", "author": "Author"},
+            "paths": {"available_paths": ["frontend"]},
+            "roadmaps": {"results": [{"id": "a", "roadmap": roadmap}]},
+        }
+
+        start = time.perf_counter()
+        with patch("requests.get", side_effect=fake_api(responses, delay=0.2)):
+            response = client.get("/dashboard")
+
+        assert response.status_code == 200
+        assert b"Fan User" in response.data
+        assert b"Quote" in response.data
+        assert time.perf_counter() - start < 0.5
+
+    def test_renders_partial_page_when_a_call_fails(self, client, http_dispatch):
+        with client.session_transaction() as session:
+            session["user_roadmaps"] = ["a"]
+        responses = {"quote": ConnectionError("down"), "paths": {"available_paths": []}, "roadmaps": TimeoutError()}
+
+        with patch("requests.get", side_effect=fake_api(responses)):
+            response = client.get("/dashboard")
+
+        assert response.status_code == 200
+        assert b"Loading failed" in response.data
+        assert b"could not be loaded" in response.data
+        with client.session_transaction() as session:
+            assert session["user_roadmaps"] == ["a"]
+
+    def test_renders_what_arrived_by_the_deadline(self, client, http_dispatch):
+        http_dispatch["PAGE_DEADLINE"] = 0.1
+        with client.session_transaction() as session:
+            session["user_roadmaps"] = ["a"]
+
+        start = time.perf_counter()
+        with patch("requests.get", side_effect=fake_api({}, delay=0.5)):
+            response = client.get("/dashboard")
+
+        assert response.status_code == 200
+        assert b"could not be loaded" in response.data
+        assert time.perf_counter() - start < 0.4
+
+    def test_internal_dispatch_respects_the_deadline(self, client):
+        client.application.config["PAGE_DEADLINE"] = 0
+        try:
+            response = client.get("/dashboard")
+        finally:
+            client.application.config["PAGE_DEADLINE"] = 5.0
+
+        assert response.status_code == 200
+        assert b"Loading failed" in response.data